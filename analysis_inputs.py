@@ -0,0 +1,43 @@
+"""
+Analysis Inputs Module
+Contains the per-block store of analysis-ready check inputs (the HOLD clock-group, FMAX and TCQ slices, the
+MIN_PULSE_WIDTH frame, the DRV table and the raw IR drop values) that whatif.py re-summarizes with other thresholds
+and settings and cube.py assembles into the project-wide metric cube.
+"""
+
+import os
+import pandas as pd
+from utils import custom_print
+
+
+ANALYSIS_INPUTS_FILE = "analysis_inputs.pkl"
+# Version 2: the HOLD clock groups and the DRV sheet are stored as CornerMetrics tables instead of frames
+ANALYSIS_INPUTS_VERSION = 2
+
+# Checks whose inputs are kept; the other summary columns are reused as reported
+ANALYSIS_INPUT_CHECKS = ["HOLD", "FMAX", "TCQ", "MPW", "DRV"]
+
+
+def load_analysis_inputs(output_dir):
+
+    path = os.path.join(output_dir, ANALYSIS_INPUTS_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        inputs = pd.read_pickle(path)
+    except Exception as e:
+        custom_print(f"[WARNING] Ignoring unreadable analysis inputs {path}: {e}")
+        return None
+    if inputs.get("version") != ANALYSIS_INPUTS_VERSION:
+        custom_print(f"[WARNING] Ignoring analysis inputs {path} stored by an earlier version")
+        return None
+    return inputs
+
+
+def save_analysis_inputs(output_dir, inputs):
+
+    path = os.path.join(output_dir, ANALYSIS_INPUTS_FILE)
+    tmp_path = path + ".tmp"
+    inputs["version"] = ANALYSIS_INPUTS_VERSION
+    pd.to_pickle(inputs, tmp_path)
+    os.replace(tmp_path, path)
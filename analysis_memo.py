@@ -0,0 +1,67 @@
+"""
+Analysis Memo Module
+Contains the content-hash memo for the per-clock-group (HOLD) and per-sub-block (FMAX, TCQ) analyses: a slice is
+keyed by a hash of its exact values plus the group name and the analysis parameters, so identical slices in
+other workbooks (clk_grp_CDM, clk_grp_bist_i36, ...) reuse the first result and the CSV it left behind.
+"""
+
+import pickle
+import hashlib
+import pandas as pd
+from collections import OrderedDict
+from config import ANALYSIS_MEMO_MAX_ENTRIES
+
+
+class AnalysisMemo:
+
+    def __init__(self, max_entries=ANALYSIS_MEMO_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        # kind -> [hits, lookups]
+        self.stats = {}
+
+    def key(self, kind, name, data, params):
+        # Values are hashed with their Python types, so only slices that analyze identically share a key; frames
+        # are hashed by shape, dtypes and values, other slices (CornerMetrics tables) by their pickle
+        if not isinstance(data, pd.DataFrame):
+            return hashlib.sha1(pickle.dumps((kind, name, tuple(params), data), protocol=pickle.HIGHEST_PROTOCOL)).hexdigest()
+        digest = hashlib.sha1(pickle.dumps((kind, name, tuple(params), data.shape, [str(dtype) for dtype in data.dtypes]),
+                                           protocol=pickle.HIGHEST_PROTOCOL))
+        digest.update(pickle.dumps(data.to_numpy(), protocol=pickle.HIGHEST_PROTOCOL))
+        return digest.hexdigest()
+
+    def get(self, kind, key):
+        stats = self.stats.setdefault(kind, [0, 0])
+        stats[1] += 1
+        entry = self.entries.get(key)
+        if entry is not None:
+            stats[0] += 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, result, csv_text):
+        self.entries[key] = (result, csv_text)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def merge_memo_stats(total, stats):
+
+    for kind, (hits, lookups) in stats.items():
+        kind_total = total.setdefault(kind, [0, 0])
+        kind_total[0] += hits
+        kind_total[1] += lookups
+
+
+def format_memo_stats(stats):
+
+    if not stats:
+        return "no slices looked up"
+    hits = sum(kind_stats[0] for kind_stats in stats.values())
+    lookups = sum(kind_stats[1] for kind_stats in stats.values())
+    per_kind = ", ".join(f"{kind} {kind_hits}/{kind_lookups}" for kind, (kind_hits, kind_lookups) in sorted(stats.items()))
+    return f"{hits}/{lookups} slices reused ({100.0 * hits / max(lookups, 1):.0f}%: {per_kind})"
+
+
+# The memo shared by every block analyzed in this process
+analysis_memo = AnalysisMemo()
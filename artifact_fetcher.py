@@ -0,0 +1,90 @@
+"""
+Artifact Fetcher Module
+Contains an asyncio-based prefetch layer for the per-block PV, IR drop and formality artifacts
+"""
+
+import asyncio
+import threading
+from config import ARTIFACT_FETCH_CONCURRENCY, ARTIFACT_FETCH_TIMEOUT
+from utils import custom_print, block_name_from_excel
+from checks import ARTIFACTS
+
+
+def _start_read(loop, slots, done, reader, args):
+
+    # Runs the read on a daemon thread, so a read hung on NFS never holds up the fetch or interpreter exit.
+    # Its concurrency slot is only given back once the read has really finished.
+    def finish(outcome):
+        slots.release()
+        if not done.done():
+            value, error = outcome
+            if error is None:
+                done.set_result(value)
+            else:
+                done.set_exception(error)
+
+    def read():
+        try:
+            outcome = (reader(*args), None)
+        except Exception as e:
+            outcome = (None, e)
+        try:
+            loop.call_soon_threadsafe(finish, outcome)
+        except RuntimeError:
+            # The fetch has returned and its event loop is closed; nobody waits for this read any more
+            pass
+
+    threading.Thread(target=read, daemon=True).start()
+
+
+async def _fetch_artifact(slots, key, excel_file, proj_dir_path, timeout):
+
+    # The artifact's value, or the exception its read raised (a timeout too); the checks map it through their error
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    async def fetch():
+        await slots.acquire()
+        _start_read(loop, slots, done, ARTIFACTS[key].read, (excel_file, proj_dir_path))
+        return await asyncio.shield(done)
+
+    # The timeout also covers waiting for a slot, in case every slot is held by a hung read
+    try:
+        return await asyncio.wait_for(fetch(), timeout)
+    except asyncio.TimeoutError:
+        custom_print(f"[WARNING] Timed out after {timeout}s reading {key.upper()} artifact for {excel_file}")
+        return TimeoutError("timed out")
+    except Exception as e:
+        return e
+
+
+async def _fetch_all(excel_files, proj_dir_path, concurrency, timeout, keys):
+
+    slots = asyncio.Semaphore(concurrency)
+    tasks = {}
+    for excel_file in excel_files:
+        block_name = block_name_from_excel(excel_file)
+        for key in keys:
+            tasks[(block_name, key)] = asyncio.ensure_future(
+                _fetch_artifact(slots, key, excel_file, proj_dir_path, timeout))
+    await asyncio.gather(*tasks.values())
+
+    artifacts = {}
+    for (block_name, key), task in tasks.items():
+        artifacts.setdefault(block_name, {})[key] = task.result()
+    return artifacts
+
+
+def fetch_block_artifacts(excel_files, proj_dir_path, concurrency=ARTIFACT_FETCH_CONCURRENCY, timeout=ARTIFACT_FETCH_TIMEOUT,
+                          keys=None):
+
+    # Returns {block_name: {artifact key: value}} for the registry's report inputs (checks.ARTIFACTS), each read
+    # once per block; process_excel_file hands them to the checks through CheckContext.
+    # keys limits the fetch to some of the artifacts (checks.prefetch_keys of the selected checks).
+    keys = list(ARTIFACTS) if keys is None else [key for key in ARTIFACTS if key in keys]
+    if not excel_files or not keys:
+        return {}
+    custom_print(f"[INFO] Prefetching artifacts for {len(excel_files)} blocks (concurrency={concurrency}, timeout={timeout}s)")
+    artifacts = asyncio.run(_fetch_all(list(excel_files), proj_dir_path, max(1, concurrency), timeout, keys))
+    custom_print(f"[INFO] Prefetched artifacts for blocks: {list(artifacts)}")
+    return artifacts
@@ -0,0 +1,168 @@
+"""
+Batch Module
+Contains the multi-project batch mode: the blocks of several projects are dispatched longest-first on one
+shared pipeline (and intra-block pool), and one block summary is written per project.
+
+Usage:
+    python batch.py projects.json
+
+projects.json is a list of projects:
+    [
+        {"proj_dir_path": "scdc/wefw/rwfrwg/dveqw/", "workbook_dir": "dveqw_metrics",
+         "output": "dveqw_block_summary.xlsx", "block_info": [{"block_name": "...", "compiler": "...", "owner": "..."}]},
+        ...
+    ]
+workbook_dir defaults to the current directory, output to <project>_block_summary.xlsx and block_info to
+BLOCK_INFO from config.py.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import builtins
+from config import (
+    ALL_BLOCK_CSV_FILES_DIR,
+    MAIN_HEADERS,
+    SUB_HEADERS,
+    BLOCK_INFO,
+    ARTIFACT_PREFETCH,
+    PIPELINE_ENABLE,
+    PIPELINE_ANALYSIS_WORKERS,
+    SCHEDULER_ENABLE,
+    RESULTS_DB_ENABLE
+)
+from utils import toggle_print, custom_print, block_name_from_excel
+from excel_processor import process_excel_file, create_output_excel, summary_row, block_measures
+from artifact_fetcher import fetch_block_artifacts
+from pipeline import run_pipeline
+from scheduler import estimate_block_costs, lpt_order, record_block_runtimes, runtime_report, format_runtime_report
+from results_db import record_run
+from main import sort_block_info
+
+
+def project_name(proj_dir_path):
+
+    return proj_dir_path.rstrip('/').split('/')[-1]
+
+
+def load_projects(batch_file):
+
+    with open(batch_file, "r") as f:
+        projects = json.load(f)
+    loaded = []
+    for project in projects:
+        proj_dir_path = project["proj_dir_path"]
+        block_info_sorted = sort_block_info(project.get("block_info", BLOCK_INFO))
+        workbook_dir = project.get("workbook_dir", ".")
+        loaded.append({
+            "proj_dir_path": proj_dir_path,
+            "output": project.get("output", f"{project_name(proj_dir_path)}_block_summary.xlsx"),
+            "csv_dir": os.path.join(ALL_BLOCK_CSV_FILES_DIR, project_name(proj_dir_path)),
+            "block_info": block_info_sorted,
+            "workbooks": {block["block_name"]: os.path.join(workbook_dir, f"{block['block_name']}_metrics.xlsx")
+                          for block in block_info_sorted},
+        })
+    return loaded
+
+
+def run_batch(projects, runtime_stats=None):
+
+    # Returns {proj_dir_path: all_output_data}. Workbook paths and block names are only unique within one project
+    # (workbook_dir defaults to "."), so every block is keyed by (proj_dir_path, excel_file). runtime_stats (if given)
+    # receives the predicted-versus-actual runtime report of the whole batch (see scheduler.runtime_report)
+    file_kwargs = {}
+    block_costs = {}
+    for project in projects:
+        os.makedirs(project["csv_dir"], exist_ok=True)
+        existing_files = [excel_file for excel_file in project["workbooks"].values() if os.path.exists(excel_file)]
+        artifacts = fetch_block_artifacts(existing_files, project["proj_dir_path"]) if ARTIFACT_PREFETCH else {}
+        for excel_file in existing_files:
+            file_kwargs[(project["proj_dir_path"], excel_file)] = {
+                "artifacts": artifacts.get(block_name_from_excel(excel_file)),
+                "proj_dir_path": project["proj_dir_path"], "csv_dir": project["csv_dir"]}
+        if SCHEDULER_ENABLE:
+            costs = estimate_block_costs(existing_files, project["proj_dir_path"])
+            block_costs.update(((project["proj_dir_path"], excel_file), cost) for excel_file, cost in costs.items())
+
+    # One dispatch order across every project so the largest blocks of the whole batch start first
+    dispatch_order = list(file_kwargs)
+    if SCHEDULER_ENABLE and dispatch_order:
+        dispatch_order = lpt_order(dispatch_order, block_costs)
+    custom_print("[DEBUG] Batch dispatch order:", dispatch_order)
+
+    block_timings = {}
+    results = {}
+    processing_start = time.time()
+    if PIPELINE_ENABLE:
+        for task, output_data in run_pipeline(dispatch_order, MAIN_HEADERS, SUB_HEADERS,
+                                              timings=block_timings, file_kwargs=file_kwargs):
+            results[task] = output_data
+    else:
+        for task in dispatch_order:
+            start_time = time.time()
+            results[task] = process_excel_file(task[1], MAIN_HEADERS, SUB_HEADERS, **file_kwargs[task])
+            block_timings[task] = time.time() - start_time
+    if SCHEDULER_ENABLE and block_timings:
+        # The runtime history is kept per project
+        for project in projects:
+            proj_dir_path = project["proj_dir_path"]
+            timings = {excel_file: seconds for (proj, excel_file), seconds in block_timings.items() if proj == proj_dir_path}
+            costs = {excel_file: cost for (proj, excel_file), cost in block_costs.items() if proj == proj_dir_path}
+            if timings:
+                record_block_runtimes(costs, timings, proj_dir_path)
+        if runtime_stats is not None:
+            workers = PIPELINE_ANALYSIS_WORKERS if PIPELINE_ENABLE else 1
+            runtime_stats.update(runtime_report(block_costs, block_timings, time.time() - processing_start, workers))
+
+    all_results = {}
+    for project in projects:
+        all_output_data = []
+        for block in project["block_info"]:
+            task = (project["proj_dir_path"], project["workbooks"][block["block_name"]])
+            if task in results:
+                all_output_data.append(summary_row(block["block_name"], results[task]))
+            else:
+                custom_print(f"File not found: {task[1]}")
+                all_output_data.append(["File Not Found", block["block_name"]])
+        all_results[project["proj_dir_path"]] = all_output_data
+    return all_results
+
+
+def write_project_outputs(projects, all_results):
+
+    for project in projects:
+        all_output_data = all_results[project["proj_dir_path"]]
+        blocks_comp_names = {block["block_name"]: block["compiler"] for block in project["block_info"]}
+        blocks_owners = {block["block_name"]: block["owner"] for block in project["block_info"]}
+        create_output_excel(all_output_data, SUB_HEADERS, MAIN_HEADERS, blocks_comp_names, blocks_owners,
+                            output_file=project["output"])
+        if RESULTS_DB_ENABLE:
+            record_run(all_output_data, blocks_comp_names, blocks_owners, output_file=project["output"],
+                       project=project["proj_dir_path"], measures=block_measures(blocks_comp_names, project["csv_dir"]))
+        missing = sum(1 for row in all_output_data if row[0] == "File Not Found")
+        print(f" {project_name(project['proj_dir_path'])}: {len(all_output_data)} blocks ({missing} not found) -> '{project['output']}'", flush=True)
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Summarize the blocks of several projects in one run")
+    parser.add_argument("batch_file", help="JSON list of projects (proj_dir_path, workbook_dir, output, block_info)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    toggle_print(False)
+    builtins.custom_print = custom_print
+    projects = load_projects(args.batch_file)
+    if not projects:
+        print(f"No projects in {args.batch_file}", file=sys.stderr)
+        sys.exit(1)
+    start_time = time.time()
+    runtime_stats = {}
+    all_results = run_batch(projects, runtime_stats=runtime_stats)
+    write_project_outputs(projects, all_results)
+    print(f"    [ Batch of {len(projects)} projects done in {time.time() - start_time:.1f}s ]", flush=True)
+    print(f"    Runtime prediction: {format_runtime_report(runtime_stats)}", flush=True)
@@ -0,0 +1,333 @@
+"""
+Checks Module
+Contains the check registry and its executor. Every summary check declares its inputs - the workbook sheets it
+reads, the per-block reports (path templates under proj_dir_path) it parses and the other checks whose results
+it uses - and the executor resolves each input once per block, runs independent checks concurrently and
+returns the check's "missing" value without running it when one of its inputs does not exist.
+
+Adding a check is one Check(...) entry: a check on the NON_CLK_CELLS sheet would declare sheets=["NON_CLK_CELLS"]
+and read it through context.sheets, sharing the block's open workbook and decoded sheets with the others.
+
+Checks can be selected by group (main.py --only / --skip, see select_checks): unselected checks read nothing and
+report "skipped".
+"""
+
+import os
+import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import CHECK_WORKERS, SUMMARY_CHECK_COLUMNS
+from utils import custom_print, check_clean_status, block_name_from_excel, read_head_lines
+from sheet_loader import ProjectedExcelFile, FIRST_SHEET
+from physical_verification import (
+    DRC_RESULTS, LVS_RESULTS, ANT_RESULTS, ERC_RESULT_LINE,
+    artifact_path, drc_status, lvs_status, erc_status, ant_status
+)
+from timing_analysis import process_hold_data, process_fmax_data, process_tcq_data, process_min_pulse_width
+from design_checks import (
+    IR_REPORTS, FORMALITY_LOG,
+    process_drv_data, ir_values, ir_percentage, formality_status
+)
+
+
+# Value reported for the checks left out of a run
+SKIPPED_VALUE = "skipped"
+
+
+class ArtifactInput:
+
+    # A per-block report under proj_dir_path. Resolves to its first head_lines lines (the whole text when
+    # head_lines is None), to the matching paths for a glob template, or to None when there is nothing there.
+    # key names the report in the values artifact_fetcher prefetches.
+    def __init__(self, key, template, head_lines=None, is_glob=False):
+        self.key = key
+        self.template = template
+        self.head_lines = head_lines
+        self.is_glob = is_glob
+
+    def read(self, excel_file, proj_dir_path):
+        path = artifact_path(self.template, excel_file, proj_dir_path)
+        if self.is_glob:
+            return glob.glob(path) or None
+        if not os.path.exists(path):
+            return None
+        if self.head_lines is not None:
+            return read_head_lines(path, self.head_lines)
+        with open(path, 'r') as f:
+            return f.read()
+
+
+class Check:
+
+    # compute(context, *artifact values, *dependency results) returns the check's summary value.
+    # sheets: workbook sheets the check reads (through context.sheets); such checks go through the sheet cache
+    #     and take turns on the workbook.
+    # missing: value reported without running compute when an input is absent (None: compute handles it).
+    # error: maps (context, exception) raised while reading an artifact to the value reported.
+    # group: name the check is selected by with --only / --skip (the lower-case check name by default).
+    def __init__(self, name, compute, sheets=(), artifacts=(), depends=(), missing=None, error=None, group=None):
+        self.name = name
+        self.group = group or name.lower()
+        self.compute = compute
+        self.sheets = list(sheets)
+        self.artifacts = list(artifacts)
+        self.depends = list(depends)
+        self.missing = missing
+        self.error = error
+
+
+class SheetInputs:
+
+    # Workbook view handed to the checks: opened on first use, each (sheet, header) decoded once; callers get copies
+    def __init__(self, excel_file, xls=None):
+        self.excel_file = excel_file
+        self._xls = xls
+        self._opened = False
+        self._frames = {}
+
+    @property
+    def xls(self):
+        if self._xls is None:
+            self._xls = ProjectedExcelFile(self.excel_file)
+            self._opened = True
+        return self._xls
+
+    @property
+    def sheet_names(self):
+        return self.xls.sheet_names
+
+    def sheet_name(self, sheet):
+        return self.sheet_names[0] if sheet == FIRST_SHEET else sheet
+
+    def parse(self, sheet_name, header=0):
+        key = (sheet_name, header)
+        if key not in self._frames:
+            self._frames[key] = self.xls.parse(sheet_name, header=header)
+        return self._frames[key].copy()
+
+    def close(self):
+        if self._opened:
+            self._xls.close()
+
+
+class CheckContext:
+
+    def __init__(self, excel_file, output_dir, proj_dir_path, xls=None, artifacts=None, sheet_cache=None):
+        self.excel_file = excel_file
+        self.base_name = os.path.splitext(os.path.basename(excel_file))[0]
+        self.block_name = block_name_from_excel(excel_file)
+        self.output_dir = output_dir
+        self.proj_dir_path = proj_dir_path
+        self.artifacts = artifacts
+        self.sheet_cache = sheet_cache
+        self.sheets = SheetInputs(excel_file, xls)
+        # Inputs of the recomputed checks, kept for what-if runs (see analysis_inputs.py)
+        self.capture = {}
+        # Numbers behind each computed check's reported value, [(entry, value, corner)] (see summary_values.py)
+        self.measures = {}
+        self.workbook_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._resolved = {}
+
+    def measure(self, check):
+        return self.measures.setdefault(check, [])
+
+    def resolve(self, artifact):
+        # Each artifact is read once per block, also when several checks declare it. Artifacts prefetched by
+        # artifact_fetcher are taken from `artifacts` ({key: value, or the exception its read raised}).
+        if self.artifacts is not None and artifact.key in self.artifacts:
+            value = self.artifacts[artifact.key]
+            if isinstance(value, Exception):
+                raise value
+            return value
+        with self._lock:
+            entry = self._resolved.setdefault(id(artifact), {"lock": threading.Lock()})
+        with entry["lock"]:
+            if "value" not in entry:
+                entry["value"] = artifact.read(self.excel_file, self.proj_dir_path)
+        return entry["value"]
+
+
+def _ir_error(context, e):
+
+    custom_print(f"[WARNING] Error processing IR value for {context.excel_file}: {e}")
+    return None, None
+
+
+def _formality_error(context, e):
+
+    custom_print(f"[WARNING] Error processing formality log for {context.excel_file}: {e}")
+    return "Error Processing Log"
+
+
+# LVS and ERC both read the LVS results file (its first and 11th lines)
+DRC_REPORT = ArtifactInput("drc", DRC_RESULTS, head_lines=1)
+LVS_REPORT = ArtifactInput("lvs", LVS_RESULTS, head_lines=ERC_RESULT_LINE)
+ANT_REPORT = ArtifactInput("ant", ANT_RESULTS, head_lines=1)
+IR_REPORT_FILES = ArtifactInput("ir", IR_REPORTS, is_glob=True)
+FORMALITY_REPORT = ArtifactInput("formality", FORMALITY_LOG)
+
+CHECKS = [
+    Check("PARA ERRORS", lambda ctx: check_clean_status(ctx.sheets.parse(ctx.sheets.sheet_names[0]), "PARA ERRORS"),
+          sheets=[FIRST_SHEET], group="dashboard"),
+    Check("NOT ANNOTATED", lambda ctx: check_clean_status(ctx.sheets.parse(ctx.sheets.sheet_names[0]), "NOT ANNOTATED"),
+          sheets=[FIRST_SHEET], group="dashboard"),
+    Check("MPW", lambda ctx: process_min_pulse_width(ctx.excel_file, ctx.output_dir, xls=ctx.sheets, capture=ctx.capture,
+                                                     measures=ctx.measure("MPW")),
+          sheets=["MIN_PULSE_WIDTH"], missing="Error processing MIN_PULSE_WIDTH data"),
+    Check("MPW VIOLATION", lambda ctx, mpw: "CLEAN" if mpw == "CLEAN" else "NOT CLEAN", depends=["MPW"], group="mpw"),
+    Check("HOLD", lambda ctx: process_hold_data(ctx.excel_file, ctx.output_dir, xls=ctx.sheets, capture=ctx.capture,
+                                                measures=ctx.measure("HOLD")),
+          sheets=["HOLD_MASTER_CLK_SUM", "HOLD_MASTER_CLK"]),
+    Check("FMAX", lambda ctx: process_fmax_data(ctx.excel_file, ctx.base_name.split("_"), ctx.sheets, ctx.output_dir,
+                                                capture=ctx.capture, measures=ctx.measure("FMAX")),
+          sheets=["FMAX"]),
+    Check("DRV", lambda ctx: process_drv_data(ctx.sheets, ctx.output_dir, capture=ctx.capture, measures=ctx.measure("DRV")),
+          sheets=["DRV"], missing=""),
+    Check("TCQ", lambda ctx: process_tcq_data(ctx.excel_file, ctx.output_dir, xls=ctx.sheets, capture=ctx.capture,
+                                              measures=ctx.measure("TCQ")),
+          sheets=["TCQ"], missing="TCQ Not Applicable"),
+    Check("DRC", lambda ctx, head: drc_status(head), artifacts=[DRC_REPORT], missing="DRC File Not Found",
+          error=lambda ctx, e: f"Error reading DRC file: {e}"),
+    Check("LVS", lambda ctx, head: lvs_status(head), artifacts=[LVS_REPORT], missing="LVS File Not Found",
+          error=lambda ctx, e: f"Error reading LVS file: {e}"),
+    Check("ERC", lambda ctx, head: erc_status(head), artifacts=[LVS_REPORT], missing="ERC File Not Found",
+          error=lambda ctx, e: f"Error reading ERC file: {e}"),
+    Check("ANT", lambda ctx, head: ant_status(head), artifacts=[ANT_REPORT], missing="ANT File Not Found",
+          error=lambda ctx, e: f"Error reading ANT file: {e}"),
+    Check("IR", lambda ctx, ir_files: ir_values(ir_files, ctx.block_name), artifacts=[IR_REPORT_FILES],
+          missing=(None, None), error=_ir_error),
+    Check("VDD", lambda ctx, ir: ir_percentage(ir[0], measures=ctx.measure("VDD")), depends=["IR"], group="ir"),
+    Check("VSS", lambda ctx, ir: ir_percentage(ir[1], measures=ctx.measure("VSS")), depends=["IR"], group="ir"),
+    Check("Formality", lambda ctx, log: formality_status(log), artifacts=[FORMALITY_REPORT], missing="Log File Not Found",
+          error=_formality_error),
+]
+
+
+# Group names accepted by --only / --skip, in registry order
+CHECK_GROUPS = list(dict.fromkeys(check.group for check in CHECKS))
+
+# Report inputs by key, in registry order (what artifact_fetcher prefetches)
+ARTIFACTS = {artifact.key: artifact for check in CHECKS for artifact in check.artifacts}
+
+
+def select_checks(only=None, skip=None, checks=CHECKS):
+
+    # only / skip are comma-separated group names; returns the names of the selected checks, or None for all
+    if not only and not skip:
+        return None
+    groups = list(dict.fromkeys(check.group for check in checks))
+
+    def parse(option, value):
+        names = [name.strip().lower() for name in value.split(",") if name.strip()]
+        unknown = [name for name in names if name not in groups]
+        if unknown:
+            raise ValueError(f"{option}: unknown check(s) {', '.join(unknown)} (choose from {', '.join(groups)})")
+        return set(names)
+
+    selected = parse("--only", only) if only else set(groups)
+    if skip:
+        selected -= parse("--skip", skip)
+    return {check.name for check in checks if check.group in selected}
+
+
+def selected_sheets(selected, checks=CHECKS):
+
+    # Sheets the selected checks read (FIRST_SHEET standing for the first sheet); None when every check runs
+    if selected is None:
+        return None
+    return {sheet for check in checks if check.name in selected for sheet in check.sheets}
+
+
+def prefetch_keys(selected, checks=CHECKS):
+
+    # Keys of the report inputs the selected checks read, each once (LVS and ERC share the LVS report)
+    return list(dict.fromkeys(artifact.key for check in checks if selected is None or check.name in selected
+                              for artifact in check.artifacts))
+
+
+def check_order(checks):
+
+    # Dependencies first, otherwise registry order; raises on unknown or circular dependencies
+    by_name = {check.name: check for check in checks}
+    ordered = []
+    state = {}
+
+    def visit(check, chain):
+        if state.get(check.name) == "done":
+            return
+        if state.get(check.name) == "visiting":
+            raise ValueError(f"Circular check dependencies: {' -> '.join(chain + [check.name])}")
+        state[check.name] = "visiting"
+        for dep in check.depends:
+            if dep not in by_name:
+                raise ValueError(f"Check '{check.name}' depends on unknown check '{dep}'")
+            visit(by_name[dep], chain + [check.name])
+        state[check.name] = "done"
+        ordered.append(check)
+
+    for check in checks:
+        visit(check, [])
+    return ordered
+
+
+def _sheet_check(check, context):
+
+    absent = [sheet for sheet in check.sheets if context.sheets.sheet_name(sheet) not in context.sheets.sheet_names]
+    if absent and check.missing is not None:
+        return check.missing
+    return check.compute(context)
+
+
+def _run_check(check, context, results):
+
+    if check.sheets:
+        # The open workbook, the intra-block pool and the memo are shared, so sheet checks run one at a time
+        with context.workbook_lock:
+            if context.sheet_cache is None:
+                return _sheet_check(check, context)
+            return context.sheet_cache.result(check.name, lambda: _sheet_check(check, context))
+    try:
+        values = [context.resolve(artifact) for artifact in check.artifacts]
+    except Exception as e:
+        if check.error is None:
+            raise
+        return check.error(context, e)
+    if any(value is None for value in values):
+        return check.missing
+    return check.compute(context, *values, *[results[dep] for dep in check.depends])
+
+
+def run_checks(context, checks=CHECKS, workers=CHECK_WORKERS, selected=None):
+
+    # Returns {check name: value}; an exception raised by a check propagates to the caller.
+    # Checks outside `selected` (check names, None for all) and checks depending on them report SKIPPED_VALUE.
+    ordered = check_order(checks)
+    results = {}
+    if selected is not None:
+        for check in ordered:
+            if check.name not in selected or any(dep in results for dep in check.depends):
+                results[check.name] = SKIPPED_VALUE
+        ordered = [check for check in ordered if check.name not in results]
+    if workers <= 1:
+        for check in ordered:
+            results[check.name] = _run_check(check, context, results)
+        return results
+
+    pending = list(ordered)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            for check in [check for check in pending if all(dep in results for dep in check.depends)]:
+                pending.remove(check)
+                running[pool.submit(_run_check, check, context, results)] = check
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future).name] = future.result()
+    return results
+
+
+def summary_values(results):
+
+    # The summary row's check columns, in SUMMARY_CHECK_COLUMNS order
+    return [results[column] for column in SUMMARY_CHECK_COLUMNS]
@@ -1,3 +1,4 @@
+import os
 
 
 # Directory and file paths
@@ -22,6 +23,99 @@ TCQ_HIGHEST_ONLY = 1       # Controls process_tcq_data function
 MPW_HIGHEST_ONLY = 1       # Controls process_min_pulse_width function
 DRV_HIGHEST_ONLY = 1       # Controls process_drv_data function (default 0 for detailed DRV info)
 
+# Thresholds applied when the checks are summarized (whatif.py can re-apply other values to a finished run)
+TCQ_THRESHOLD_PERCENT = 10        # TCQ entries below this |percentage| are not reported
+IR_NOMINAL_VOLTAGE = 0.825        # Nominal supply (V) the IR drop percentage is relative to
+IR_DROP_CLEAN_PERCENT = 1.0       # VDD / VSS drops up to this percentage of the nominal supply count as CLEAN
+
+# Artifact prefetch (PV / IR drop / formality reads under proj_dir_path, done with asyncio ahead of the workbooks)
+ARTIFACT_PREFETCH = 1             # Set to 0 to read artifacts one by one inside process_excel_file
+ARTIFACT_FETCH_CONCURRENCY = 32   # Max artifact reads in flight at once (keep modest on shared NFS)
+ARTIFACT_FETCH_TIMEOUT = 30       # Seconds allowed per artifact read before it is reported as timed out
+
+# Staged parse/analyze pipeline (parser processes -> bounded queue -> analysis processes)
+PIPELINE_ENABLE = 1               # Set to 0 to parse and analyze blocks one after another in-process
+PIPELINE_PARSER_WORKERS = 2       # Processes decoding <block>_metrics.xlsx workbooks
+PIPELINE_ANALYSIS_WORKERS = 2     # Processes running the HOLD/FMAX/TCQ/MPW/DRV checks
+PIPELINE_QUEUE_SIZE = 4           # Decoded workbooks allowed to wait for analysis (bounds peak memory)
+
+# Intra-block parallelism for giant partitions (HOLD clock groups, FMAX/TCQ sub-blocks)
+INTRA_BLOCK_WORKERS = 0           # Worker processes per block; 0 or 1 keeps the per-group loops serial
+INTRA_BLOCK_MIN_ITEMS = 16        # Only fan out when a block has at least this many groups / sub-blocks
+
+# Content-hash memo of the HOLD clock-group / FMAX and TCQ sub-block analyses (identical slices reuse the first result)
+ANALYSIS_MEMO_ENABLE = 1
+ANALYSIS_MEMO_MAX_ENTRIES = 4096  # Per process; least recently used entries are dropped first
+
+# Compiled column-extraction plans (HOLD clock-group ranges, FMAX / TCQ sub-block columns) keyed by a sheet-header fingerprint
+LAYOUT_PLAN_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "layout_plans.json")
+
+# Block scheduler (largest blocks dispatched first; runtimes recorded for the next run's estimates)
+SCHEDULER_ENABLE = 1
+RUNTIME_HISTORY_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "block_runtime_history.json")
+
+# Progressive output (per-block NDJSON as blocks finish, partial summary refreshed during the run)
+PROGRESSIVE_OUTPUT = 1
+PROGRESS_NDJSON_FILE = f"{os.path.splitext(Output_xls_name)[0]}_progress.ndjson"
+PARTIAL_SUMMARY_FILE = f"{os.path.splitext(Output_xls_name)[0]}_partial.xlsx"
+PARTIAL_SUMMARY_INTERVAL = 60     # Seconds between partial summary refreshes (0 = after every block)
+
+# Run journal (one atomically written checkpoint per finished block, replayed by --resume)
+RUN_JOURNAL_DIR = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "run_journal")
+
+# SQLite result history (every run's per-block, per-check status / worst value / corner)
+RESULTS_DB_ENABLE = 1
+RESULTS_DB_FILE = "block_summary_history.db"
+
+# Run-to-run delta report written by --diff-against
+DELTA_XLSX_FILE = f"{os.path.splitext(Output_xls_name)[0]}_delta.xlsx"
+DELTA_JSON_FILE = f"{os.path.splitext(Output_xls_name)[0]}_delta.json"
+
+# Watch mode (--watch): input polling interval and quiet time before a changed block is re-summarized
+WATCH_POLL_INTERVAL = 5     # Seconds
+WATCH_DEBOUNCE = 10         # Seconds
+
+# Resident summary daemon (summary_daemon.py) and its client (summary_client.py)
+DAEMON_SOCKET = os.path.expanduser("~/.block_summary_daemon.sock")
+
+# Read-only HTTP/JSON results API (results_api.py), answered from the latest run in RESULTS_DB_FILE
+RESULTS_API_HOST = "127.0.0.1"
+RESULTS_API_PORT = 8765
+RESULTS_API_REFRESH_INTERVAL = 2  # Seconds between checks for a newly recorded or updated run
+RESULTS_API_CACHE_SIZE = 256      # Response bodies kept per run revision (least recently used are evicted)
+
+# Distributed work queue (work_queue.py): WORK_QUEUE_DIR must be on a filesystem every worker host shares
+WORK_QUEUE_DIR = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "work_queue")
+CLAIM_HEARTBEAT = 30          # Seconds between claim refreshes while a block is processed
+CLAIM_STALE_SECONDS = 600     # A claim whose heartbeat counter a worker sees unchanged this long is reclaimed by it
+WORK_QUEUE_POLL = 5           # Seconds between queue checks while waiting on other workers
+MERGE_TIMEOUT = 6 * 3600      # Seconds merge waits for missing results before merging what is there
+
+# Check executor (checks.py): independent checks of a block run on this many threads (1 runs them in registry order)
+CHECK_WORKERS = 4
+
+# Per-sheet change detection: checks whose workbook sheets are unchanged reuse their stored result
+SHEET_CACHE_ENABLE = 1
+
+# Projected sheet decoding: checks declare the columns / corner prefixes they read (sheet_loader.declare_projection)
+SHEET_PROJECTION_ENABLE = 1
+
+# What-if re-summarize (whatif.py) output
+WHATIF_XLSX_FILE = f"{os.path.splitext(Output_xls_name)[0]}_whatif.xlsx"
+
+# Project-wide block x corner x metric cube (cube.py), rebuilt after every main.py run
+CUBE_ENABLE = 1
+CUBE_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "metric_cube.npy")
+CUBE_INDEX_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "metric_cube_index.json")
+CORNER_TABLE_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "corner_table.json")
+
+# Status bitmask index (status_index.py) written after every run; --filter writes the matching rows to FILTERED_XLSX_FILE
+STATUS_INDEX_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "status_index.npz")
+FILTERED_XLSX_FILE = f"{os.path.splitext(Output_xls_name)[0]}_filtered.xlsx"
+
+# Block hierarchy roll-up (hierarchy.py): worst status / value per check for every compiler, block and sub-block
+HIERARCHY_FILE = os.path.join(ALL_BLOCK_CSV_FILES_DIR, "block_hierarchy.json")
+
 # Excel headers configuration
 MAIN_HEADERS = [
     "Compiler", "Block Name", "Block Owner",
@@ -48,6 +142,14 @@ SUB_HEADERS = [
     "VDD", "VSS", ""
 ]
 
+# Check columns of one block's summary row, in the order process_excel_file returns them (after the block name)
+SUMMARY_CHECK_COLUMNS = [
+    "PARA ERRORS", "NOT ANNOTATED", "MPW VIOLATION",
+    "HOLD", "FMAX", "DRV", "TCQ", "MPW",
+    "DRC", "LVS", "ERC", "ANT",
+    "VDD", "VSS", "Formality"
+]
+
 # Column widths for Excel output
 COLUMN_WIDTHS = {
     0: 20, 1: 15, 2: 15,  # Compiler, Block Name, Block Owner
@@ -0,0 +1,211 @@
+"""
+Corners Module
+Contains the project-wide corner table: every corner name (e.g. func.min.ffgnp.0.815v_-40c.cbest_ccbest) is
+interned once and given an integer id, with its mode, min/max, process, voltage, temperature and RC extraction
+parsed into compact integer codes. Sheet columns are turned into corner-id arrays, so corner filtering and
+grouping are integer operations instead of repeated string parsing.
+
+CornerMetrics holds one block's per-corner rows (HOLD, MIN_PULSE_WIDTH, DRV, TCQ) the same way: a corner-id array
+plus one NumPy array per metric column, which the checks filter and reduce without building a row at a time.
+"""
+
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+from utils import custom_print
+
+
+# Parsed fields of a corner name; voltage is kept in millivolts and temperature in degrees C
+CORNER_FIELDS = ("mode", "delay", "process", "voltage", "temperature", "rc")
+_CATEGORICAL_FIELDS = ("mode", "delay", "process", "rc")
+
+# <mode>.<min|max>.<process>.<voltage>v_<temperature>c.<rc extraction>
+_CORNER_RE = re.compile(r"^(?P<mode>[^.]+)\.(?P<delay>[^.]+)\.(?P<process>[^.]+)\."
+                        r"(?P<voltage>\d+(?:\.\d+)?)v_(?P<temperature>[-m]?\d+)c\.(?P<rc>.+)$")
+
+# Code for a field that could not be parsed (and corner id of an empty cell)
+UNKNOWN = -1
+
+
+def parse_corner(name):
+
+    # Returns {field: value} for a well-formed corner name, else None
+    match = _CORNER_RE.match(name)
+    if not match:
+        return None
+    fields = match.groupdict()
+    fields["voltage"] = int(round(float(fields["voltage"]) * 1000))
+    fields["temperature"] = int(fields["temperature"].replace("m", "-"))
+    return fields
+
+
+class CornerTable:
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.codes = {field: [] for field in CORNER_FIELDS}
+        self.vocab = {field: {} for field in _CATEGORICAL_FIELDS}
+        self._prefix_flags = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        corner_id = self.ids.get(name)
+        if corner_id is not None:
+            return corner_id
+        corner_id = len(self.names)
+        self.ids[name] = corner_id
+        self.names.append(name)
+        fields = parse_corner(name) or {}
+        for field in CORNER_FIELDS:
+            value = fields.get(field)
+            if value is not None and field in self.vocab:
+                value = self.vocab[field].setdefault(value, len(self.vocab[field]))
+            self.codes[field].append(UNKNOWN if value is None else value)
+        return corner_id
+
+    def intern_column(self, values):
+        # Corner-id array (int32) for a sheet column; each distinct value is looked up once, empty cells get UNKNOWN
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=True)
+        unique_ids = np.array([self.intern(str(value)) for value in uniques] + [UNKNOWN], dtype=np.int32)
+        return unique_ids[codes]
+
+    def field_codes(self, corner_ids, field):
+        # Field code per corner id (UNKNOWN where the id or the field is unknown)
+        table = np.array(self.codes[field] + [UNKNOWN], dtype=np.int32)
+        return table[corner_ids]
+
+    def code_of(self, field, value):
+        return self.vocab[field].get(value, UNKNOWN) if field in self.vocab else value
+
+    def startswith_mask(self, corner_ids, prefixes):
+        # Boolean mask of the corners whose name starts with one of the prefixes; the string test runs once per corner
+        flags = self._prefix_flags.get(prefixes)
+        if flags is None or len(flags) < len(self.names):
+            known = 0 if flags is None else len(flags)
+            new_flags = np.fromiter((name.startswith(prefixes) for name in self.names[known:]), dtype=bool,
+                                    count=len(self.names) - known)
+            flags = new_flags if flags is None else np.concatenate([flags, new_flags])
+            self._prefix_flags[prefixes] = flags
+        return np.append(flags, False)[corner_ids]
+
+    def group(self, corner_ids, field):
+        # {field value: positions of the rows in that group}; rows with an unknown value are left out
+        field_codes = self.field_codes(corner_ids, field)
+        values = {code: value for value, code in self.vocab[field].items()} if field in self.vocab else None
+        return {(values[code] if values else int(code)): np.flatnonzero(field_codes == code)
+                for code in np.unique(field_codes) if code != UNKNOWN}
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"names": self.names}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        # Ids are the positions in the stored name list, so they stay stable across runs
+        table = cls()
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    for name in json.load(f)["names"]:
+                        table.intern(name)
+            except (OSError, ValueError, KeyError) as e:
+                custom_print(f"[WARNING] Ignoring unreadable corner table {path}: {e}")
+                table = cls()
+        return table
+
+
+# The corner table shared by every check in this process
+corner_table = CornerTable()
+
+
+def _raw_column(values):
+
+    # Numbers as a numeric array (int64 / float64 as pd.to_numeric infers, so values print as before); columns
+    # holding anything else keep the values as parsed
+    try:
+        return pd.to_numeric(values).to_numpy()
+    except (ValueError, TypeError):
+        return values.to_numpy()
+
+
+def _restore_metrics(names, codes, columns, labels):
+
+    # Unpickles a CornerMetrics into this process's corner table (see CornerMetrics.__reduce__)
+    return CornerMetrics(corner_table.intern_column(names)[codes], columns, labels=labels)
+
+
+class CornerMetrics:
+
+    # corner_ids: int32 ids in `corners`; columns: {name: array}, all of the same length; labels: the sheet header
+    # of the corner column ("corner") and of each column, when kept for dumps of the rows
+    __slots__ = ("corner_ids", "columns", "corners", "labels")
+
+    def __init__(self, corner_ids, columns, corners=corner_table, labels=None):
+        self.corner_ids = corner_ids
+        self.columns = columns
+        self.corners = corners
+        self.labels = labels
+
+    @classmethod
+    def from_frame(cls, frame, metrics, raw=None, corner_column=0, corners=corner_table, corner_ids=None, labels=False):
+        # metrics / raw map a column name to its position in frame. Metric columns are coerced as
+        # pd.to_numeric(errors='coerce') does (keeping its int64 / float64 dtype, so values print as before);
+        # raw columns are reported verbatim, numeric ones stored as numbers. corner_ids: the rows' ids when
+        # already interned (frames sharing one corner column); labels: keep the frame's column headers.
+        columns = {name: pd.to_numeric(frame.iloc[:, position], errors="coerce").to_numpy()
+                   for name, position in metrics.items()}
+        for name, position in (raw or {}).items():
+            columns[name] = _raw_column(frame.iloc[:, position])
+        if corner_ids is None:
+            corner_ids = corners.intern_column(frame.iloc[:, corner_column])
+        if labels:
+            labels = {"corner": frame.columns[corner_column]}
+            labels.update((name, frame.columns[position]) for name, position in {**metrics, **(raw or {})}.items())
+        return cls(corner_ids, columns, corners, labels or None)
+
+    def __reduce__(self):
+        # Pickled (pool arguments, stored analysis inputs) with the names of its corners rather than the whole
+        # corner table; the ids are interned again where it is loaded
+        ids, codes = np.unique(self.corner_ids, return_inverse=True)
+        names = [None if corner_id == UNKNOWN else self.corners.names[corner_id] for corner_id in ids]
+        return _restore_metrics, (names, codes.astype(np.int32), self.columns, self.labels)
+
+    def __len__(self):
+        return len(self.corner_ids)
+
+    def take(self, rows):
+        # Rows by position array or boolean mask
+        return CornerMetrics(self.corner_ids[rows], {name: values[rows] for name, values in self.columns.items()},
+                             self.corners, self.labels)
+
+    def present(self, names):
+        # Mask of the rows holding a value in every named column
+        mask = np.ones(len(self), dtype=bool)
+        for name in names:
+            mask &= ~pd.isna(self.columns[name])
+        return mask
+
+    def farthest(self, name, rows=None):
+        # Position of the first row (among `rows`, if given) with the largest magnitude, as Series.abs().idxmax()
+        values = self.columns[name] if rows is None else self.columns[name][rows]
+        position = int(np.nanargmax(np.abs(values)))
+        return position if rows is None else int(rows[position])
+
+    def corner(self, row):
+        corner_id = self.corner_ids[row]
+        return "nan" if corner_id == UNKNOWN else self.corners.names[corner_id]
+
+    def corner_names(self):
+        # Corner name of every row (None where the corner is unknown)
+        names = np.array(self.corners.names + [None], dtype=object)
+        return names[self.corner_ids]
+
+    def value(self, name, row):
+        return self.columns[name][row]
@@ -0,0 +1,261 @@
+"""
+Cube Module
+Contains the project-wide block x corner x metric cube: the per-corner numbers behind every check (HOLD WNS /
+TNS / FEP, FMAX margins, TCQ %, MPW WNS / FEP, DRV tran / cap WNS) are assembled from the blocks' stored analysis
+inputs into one dense float32 array, persisted as a memory-mapped .npy file. Roll-ups by compiler, owner or
+corner family are single vectorized reductions over it, and any number of report generators can map the
+same file without copying it.
+
+Usage:
+    python cube.py build                                                # from the last run's stored inputs
+    python cube.py worst hold_wns --compiler HSPRAM --process ffgnp --temperature -40
+    python cube.py rollup drv_tran_wns --by owner
+"""
+
+import os
+import sys
+import json
+import argparse
+import builtins
+import numpy as np
+import pandas as pd
+from config import (
+    ALL_BLOCK_CSV_FILES_DIR,
+    BLOCK_INFO,
+    CUBE_FILE,
+    CUBE_INDEX_FILE,
+    CORNER_TABLE_FILE
+)
+from utils import toggle_print, custom_print
+from corners import CornerTable, CORNER_FIELDS, UNKNOWN
+from analysis_inputs import load_analysis_inputs
+from excel_processor import block_output_dir
+
+
+# Metrics along the cube's last axis and how the worst of several values for one block and corner is picked
+CUBE_METRICS = {
+    "hold_wns": "min",
+    "hold_tns": "min",
+    "hold_fep": "max",
+    "fmax_tcc_margin": "max",
+    "fmax_hold_margin": "max",
+    "tcq_pct": "absmax",
+    "mpw_wns": "absmax",
+    "mpw_fep": "max",
+    "drv_tran_wns": "absmax",
+    "drv_cap_wns": "absmax",
+}
+METRIC_NAMES = list(CUBE_METRICS)
+
+# Block attributes rollups can group by; anything else is a corner field
+BLOCK_GROUPS = ("compiler", "owner")
+
+
+def _numeric(column):
+
+    values = pd.Series(column, dtype=object).map(lambda value: value.rstrip('%') if isinstance(value, str) else value)
+    return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def metric_records(inputs):
+
+    # Yields (corner column, metric, values) for every per-corner number in one block's analysis inputs
+    for clk_grp_name, table in inputs.get("HOLD") or []:
+        if len(table.columns) == 3:
+            for metric, name in (("hold_wns", "wns"), ("hold_tns", "tns"), ("hold_fep", "fep")):
+                yield table.corner_names(), metric, _numeric(table.columns[name])
+    for part, part_data in inputs.get("FMAX") or []:
+        if part_data is None or part_data.shape[1] < 4:
+            continue
+        part_data = part_data[part_data.iloc[:, 1] != "-"]
+        yield part_data.iloc[:, 0], "fmax_tcc_margin", _numeric(part_data.iloc[:, -2])
+        yield part_data.iloc[:, 0], "fmax_hold_margin", _numeric(part_data.iloc[:, -1])
+    for block, combined_data in inputs.get("TCQ") or []:
+        block_df = combined_data.iloc[1:]
+        if block_df.shape[1] >= 2:
+            with np.errstate(all="ignore"):
+                yield block_df.iloc[:, 0], "tcq_pct", _numeric(block_df.iloc[:, -1]) / _numeric(block_df.iloc[:, 1]) * 100
+    df_mpw = inputs.get("MPW")
+    if df_mpw is not None and df_mpw.shape[1] >= 3:
+        yield df_mpw.iloc[:, 0], "mpw_wns", _numeric(df_mpw.iloc[:, 1])
+        yield df_mpw.iloc[:, 0], "mpw_fep", _numeric(df_mpw.iloc[:, 2])
+    table = inputs.get("DRV")
+    if table is not None and {"tran_wns", "cap_wns"} <= set(table.columns):
+        yield table.corner_names(), "drv_tran_wns", _numeric(table.columns["tran_wns"])
+        yield table.corner_names(), "drv_cap_wns", _numeric(table.columns["cap_wns"])
+
+
+def _reduce(values, how, axis):
+
+    # Worst value along an axis (NaN where there is none) and its position
+    with np.errstate(invalid="ignore"):
+        key = {"min": -values, "max": values, "absmax": np.abs(values)}[how]
+    positions = np.where(np.isnan(key), -np.inf, key).argmax(axis=axis)
+    worst = np.take_along_axis(values, np.expand_dims(positions, axis), axis).squeeze(axis)
+    return worst, positions
+
+
+def _block_worst(corner_ids, values, how):
+
+    # {corner id: worst value} over every record of one block for one metric
+    keep = (corner_ids != UNKNOWN) & ~np.isnan(values)
+    series = pd.Series(values[keep])
+    groups = corner_ids[keep]
+    if how == "absmax":
+        picked = series.loc[series.abs().groupby(groups).idxmax()]
+        return dict(zip(groups[picked.index], picked))
+    return series.groupby(groups).agg(how).to_dict()
+
+
+def build_cube(block_info=BLOCK_INFO, csv_dir=ALL_BLOCK_CSV_FILES_DIR, cube_file=CUBE_FILE,
+               index_file=CUBE_INDEX_FILE, corner_table_file=CORNER_TABLE_FILE):
+
+    # Corner ids come from the project's persisted corner table, so the corner axis stays stable across runs
+    corner_table = CornerTable.load(corner_table_file)
+    block_worsts = []
+    for block in block_info:
+        inputs = load_analysis_inputs(block_output_dir(f"{block['block_name']}_metrics.xlsx", csv_dir)) or {}
+        per_metric = {}
+        for corners, metric, values in metric_records(inputs):
+            corner_ids = corner_table.intern_column(corners)
+            per_metric.setdefault(metric, []).append((corner_ids, values))
+        block_worsts.append({
+            metric: _block_worst(np.concatenate([ids for ids, _ in parts]), np.concatenate([v for _, v in parts]),
+                                 CUBE_METRICS[metric])
+            for metric, parts in per_metric.items()
+        })
+
+    shape = (len(block_info), max(len(corner_table), 1), len(METRIC_NAMES))
+    tmp_file = cube_file + ".tmp.npy"
+    cube = np.lib.format.open_memmap(tmp_file, mode="w+", dtype=np.float32, shape=shape)
+    cube[:] = np.nan
+    for block_idx, worsts in enumerate(block_worsts):
+        for metric, by_corner in worsts.items():
+            if by_corner:
+                cube[block_idx, list(by_corner), METRIC_NAMES.index(metric)] = list(by_corner.values())
+    cube.flush()
+    del cube
+    corner_table.save(corner_table_file)
+    os.replace(tmp_file, cube_file)
+    index_tmp = index_file + ".tmp"
+    with open(index_tmp, "w") as f:
+        json.dump({
+            "blocks": [block["block_name"] for block in block_info],
+            "compiler": [block["compiler"] for block in block_info],
+            "owner": [block["owner"] for block in block_info],
+            "metrics": METRIC_NAMES,
+            "corner_table": corner_table_file,
+        }, f, indent=1)
+    os.replace(index_tmp, index_file)
+    custom_print(f"[CREATED] Metric cube {shape} -> {cube_file}")
+    return shape
+
+
+class MetricCube:
+
+    # Read-only view of the persisted cube; the array is memory-mapped, never copied
+    def __init__(self, cube_file=CUBE_FILE, index_file=CUBE_INDEX_FILE):
+        with open(index_file, "r") as f:
+            self.index = json.load(f)
+        self.cube = np.load(cube_file, mmap_mode="r")
+        self.corners = CornerTable.load(self.index["corner_table"])
+        self.blocks = self.index["blocks"]
+        self.metrics = self.index["metrics"]
+
+    def block_mask(self, compiler=None, owner=None):
+        mask = np.ones(len(self.blocks), dtype=bool)
+        for attribute, value in (("compiler", compiler), ("owner", owner)):
+            if value is not None:
+                mask &= np.array(self.index[attribute]) == value
+        return mask
+
+    def corner_mask(self, **fields):
+        # e.g. corner_mask(process="ffgnp", temperature=-40); fields left out match every corner
+        corner_ids = np.arange(self.cube.shape[1], dtype=np.int32)
+        mask = np.ones(len(corner_ids), dtype=bool)
+        for field, value in fields.items():
+            if value is not None:
+                mask &= self.corners.field_codes(corner_ids, field) == self.corners.code_of(field, value)
+        return mask
+
+    def _masked(self, metric, block_mask, corner_mask):
+        values = self.cube[:, :, self.metrics.index(metric)]
+        if block_mask is None and corner_mask is None:
+            return values
+        block_mask = np.ones(values.shape[0], dtype=bool) if block_mask is None else block_mask
+        corner_mask = np.ones(values.shape[1], dtype=bool) if corner_mask is None else corner_mask
+        return np.where(block_mask[:, None] & corner_mask[None, :], values, np.nan)
+
+    def worst(self, metric, block_mask=None, corner_mask=None):
+        # Returns (worst value, block, corner), or None when nothing matches
+        values = self._masked(metric, block_mask, corner_mask)
+        worst, position = _reduce(values.reshape(-1), CUBE_METRICS[metric], 0)
+        if np.isnan(worst):
+            return None
+        block_idx, corner_idx = np.unravel_index(position, values.shape)
+        return float(worst), self.blocks[block_idx], self.corners.names[corner_idx]
+
+    def rollup(self, metric, by, block_mask=None, corner_mask=None):
+        # {group: worst value} with groups being compilers / owners or the values of a corner field
+        how = CUBE_METRICS[metric]
+        values = self._masked(metric, block_mask, corner_mask)
+        if by in BLOCK_GROUPS:
+            per_item, _ = _reduce(values, how, 1)
+            groups = np.array(self.index[by])
+        else:
+            per_item, _ = _reduce(values, how, 0)
+            groups = self.corners.field_codes(np.arange(values.shape[1], dtype=np.int32), by)
+        result = {}
+        for group in np.unique(groups):
+            worst, _ = _reduce(per_item[groups == group], how, 0)
+            if not np.isnan(worst) and group != UNKNOWN:
+                result[group] = float(worst)
+        if by in self.corners.vocab:
+            names = {code: value for value, code in self.corners.vocab[by].items()}
+            result = {names[code]: worst for code, worst in result.items()}
+        elif by not in BLOCK_GROUPS:
+            result = {int(code): worst for code, worst in result.items()}
+        return result
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Project-wide block x corner x metric cube")
+    parser.add_argument("command", choices=["build", "worst", "rollup"])
+    parser.add_argument("metric", nargs="?", choices=METRIC_NAMES)
+    parser.add_argument("--by", choices=list(BLOCK_GROUPS) + list(CORNER_FIELDS), help="rollup: group by")
+    parser.add_argument("--compiler")
+    parser.add_argument("--owner")
+    parser.add_argument("--mode")
+    parser.add_argument("--delay")
+    parser.add_argument("--process")
+    parser.add_argument("--voltage", type=int, help="Millivolts")
+    parser.add_argument("--temperature", type=int, help="Degrees C")
+    parser.add_argument("--rc")
+    args = parser.parse_args(argv)
+    if args.command != "build" and args.metric is None:
+        parser.error(f"{args.command} needs a metric")
+    if args.command == "rollup" and args.by is None:
+        parser.error("rollup needs --by")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    toggle_print(False)
+    builtins.custom_print = custom_print
+    if args.command == "build":
+        print(f" Metric cube {build_cube()} -> '{CUBE_FILE}'", flush=True)
+        sys.exit(0)
+    if not os.path.exists(CUBE_FILE):
+        print(f"No metric cube at {CUBE_FILE}; run main.py or 'python cube.py build' first", file=sys.stderr)
+        sys.exit(1)
+    metric_cube = MetricCube()
+    block_mask = metric_cube.block_mask(compiler=args.compiler, owner=args.owner)
+    corner_mask = metric_cube.corner_mask(**{field: getattr(args, field) for field in CORNER_FIELDS})
+    if args.command == "worst":
+        found = metric_cube.worst(args.metric, block_mask, corner_mask)
+        print("No matching values" if found is None else f"{args.metric}: {found[0]:g} ({found[1]}, {found[2]})")
+    else:
+        for group, worst in metric_cube.rollup(args.metric, args.by, block_mask, corner_mask).items():
+            print(f"{group}: {worst:g}")
@@ -4,90 +4,127 @@ Contains functions for processing DRV, IR drop, and formality checks
 """
 
 import os
-import glob
+import numpy as np
 import pandas as pd
+from config import IR_NOMINAL_VOLTAGE
 from utils import custom_print
+from sheet_loader import SheetProjection, declare_projection
+from corners import CornerMetrics, UNKNOWN
 
 
-def process_drv_data(xls, output_dir, highest_only=1):
+# DRV columns analyze_drv_data reads: corners, max-transition WNS / BEP / FEP, max-capacitance WNS / BEP / FEP
+DRV_COLUMNS = 7
+DRV_METRICS = {"tran_wns": 1, "tran_bep": 2, "tran_fep": 3, "cap_wns": 4, "cap_bep": 5, "cap_fep": 6}
+
+declare_projection("DRV", SheetProjection(columns=range(DRV_COLUMNS)))
+
+# Report paths under proj_dir_path; {block} is the block name
+IR_REPORTS = os.path.join("ir_drop_rh", "{block}", "func*", "voltage*.rpt")
+FORMALITY_LOG = os.path.join("formality", "{block}", "fm.log")
+
+
+def drv_table(df_excel):
+
+    # The DRV metric columns as numbers, with the sheet headers kept for the dumps; rows missing a value in a
+    # column outside DRV_METRICS are left out here, rows missing a metric in analyze_drv_data
+    table = CornerMetrics.from_frame(df_excel, {name: position for name, position in DRV_METRICS.items()
+                                                if position < df_excel.shape[1]}, labels=True)
+    other_columns = [position for position in range(1, df_excel.shape[1]) if position not in DRV_METRICS.values()]
+    if other_columns:
+        table = table.take(df_excel.iloc[:, other_columns].notna().all(axis=1).to_numpy())
+    return table
+
+
+def process_drv_data(xls, output_dir, highest_only=1, capture=None, measures=None):
+
+    if "DRV" not in xls.sheet_names:
+        return ""
+    table = drv_table(xls.parse('DRV'))
+    if capture is not None:
+        capture["DRV"] = table
+    return analyze_drv_data(table, output_dir, highest_only, measures=measures)
+
+
+def _drv_rows(table, rows):
+
+    # Sheet rows as they are dumped: the corner column, then the DRV metric columns as numbers
+    frame = pd.DataFrame({table.labels["corner"]: table.corner_names()[rows]})
+    for name in DRV_METRICS:
+        if name in table.columns:
+            frame[table.labels[name]] = table.columns[name][rows]
+    return frame
+
+
+def _drv_measures(measures, kind, table, rows):
+
+    # (TRAN / CAP, WNS, corner) of the reported rows
+    if measures is not None:
+        measures.extend((kind, float(table.columns[f"{kind.lower()}_wns"][row]), table.corner(row)) for row in rows)
 
-    drv_details = ""
 
-    if "DRV" in xls.sheet_names:
-        df_excel = pd.read_excel(xls, sheet_name='DRV')
+def _drv_cap_details(table, highest_only, measures=None):
 
-        corners_col = df_excel.columns[0]
-        maxtran_cols = df_excel.columns[1:4]
-        maxcap_cols = df_excel.columns[4:7]
+    cap_wns = table.columns["cap_wns"]
+    if highest_only == 1:
+        row = table.farthest("cap_wns")
+        _drv_measures(measures, "CAP", table, [row])
+        return (f" | CAP: {table.corner(row)} - WNS:{cap_wns[row]}; BEP:{table.value('cap_bep', row)}; "
+                f"FEP:{table.value('cap_fep', row)}.")
+    cap_details_list = []
+    cap_rows = np.flatnonzero(cap_wns != 0)
+    for row in cap_rows:
+        cap_details = f"CAP: {table.corner(row)} - WNS:{cap_wns[row]}; BEP:{table.value('cap_bep', row)}; FEP: {table.value('cap_fep', row)}"
+        cap_details_list.append(cap_details)
+    _drv_measures(measures, "CAP", table, cap_rows)
+    if cap_details_list:
+        return " | " + ", ".join(cap_details_list)
+    return " | CAP: CLEAN"
 
-        df_excel[maxtran_cols] = df_excel[maxtran_cols].apply(pd.to_numeric, errors='coerce')
-        df_excel[maxcap_cols] = df_excel[maxcap_cols].apply(pd.to_numeric, errors='coerce')
 
-        df_excel.dropna(inplace=True)
+def analyze_drv_data(table, output_dir, highest_only=1, measures=None):
 
-        tran_wns_col = maxtran_cols[0]
-        cap_wns_col = maxcap_cols[0]
+    # table: the DRV sheet as drv_table reads it; measures, when given, collects the (TRAN / CAP, WNS, corner) of
+    # every reported row
+    drv_details = ""
+
+    if table is not None:
+        # Rows missing a value in any column are left out, as dropna() would
+        table = table.take(table.present(table.columns) & (table.corner_ids != UNKNOWN))
+        tran_wns = table.columns["tran_wns"]
+        cap_wns = table.columns["cap_wns"]
 
-        if not df_excel.empty and (df_excel[tran_wns_col] == 0).all():
+        if len(table) and (tran_wns == 0).all():
             drv_details = "TRAN: CLEAN"
-            if (df_excel[cap_wns_col] == 0).all():
+            if (cap_wns == 0).all():
                 drv_details += " | CAP: CLEAN"
                 block_tran_cap_file = os.path.join(output_dir, "block_tran_cap.csv")
                 with open(block_tran_cap_file, 'w') as f:
                     f.write("TRAN : CLEAN | CAP: CLEAN")
                 custom_print(f"[CREATED] Dumped 'block_tran_cap.csv' to: {block_tran_cap_file}")
-            elif not df_excel.empty:
-                if highest_only == 1:
-                    maxcap_farthest_index = df_excel[cap_wns_col].abs().idxmax()
-                    maxcap_result = df_excel.loc[maxcap_farthest_index]
-                    drv_details += f" | CAP: {maxcap_result[corners_col]} - WNS:{maxcap_result[cap_wns_col]}; BEP:{maxcap_result[maxcap_cols[1]]}; FEP:{maxcap_result[maxcap_cols[2]]}."
-                else:
-                    cap_not_zero = df_excel[df_excel[cap_wns_col] != 0]
-                    cap_details_list = []
-                    for index, row in cap_not_zero.iterrows():
-                        cap_details = f"CAP: {row[corners_col]} - WNS:{row[cap_wns_col]}; BEP:{row[maxcap_cols[1]]}; FEP: {row[maxcap_cols[2]]}"
-                        cap_details_list.append(cap_details)
-                    if cap_details_list:
-                        drv_details += " | " + ", ".join(cap_details_list)
-                    else:
-                        drv_details += " | CAP: CLEAN"
-        elif not df_excel.empty:
-            maxtran_not_zero = df_excel[df_excel[tran_wns_col] != 0]
+            else:
+                drv_details += _drv_cap_details(table, highest_only, measures)
+        elif len(table):
+            tran_rows = np.flatnonzero(tran_wns != 0)
             block_tran_csv_file = os.path.join(output_dir, "block_tran_cap.csv")
-            if highest_only == 1 and not maxtran_not_zero.empty:
-                maxtran_farthest_index = maxtran_not_zero[tran_wns_col].abs().idxmax()
-                maxtran_result = maxtran_not_zero.loc[[maxtran_farthest_index]]
-                maxtran_result.to_csv(block_tran_csv_file, index=False)
+            if highest_only == 1 and len(tran_rows):
+                tran_rows = np.array([table.farthest("tran_wns", tran_rows)])
+                _drv_rows(table, tran_rows).to_csv(block_tran_csv_file, index=False)
                 custom_print(f"[CREATED] Dumped 'DRV' sheet (Highest TRAN WNS) to: {block_tran_csv_file}")
-                maxtran_to_report = maxtran_result
             else:
-                maxtran_not_zero.to_csv(block_tran_csv_file, index=False)
+                _drv_rows(table, tran_rows).to_csv(block_tran_csv_file, index=False)
                 custom_print(f"[CREATED] Dumped 'DRV' sheet (TRAN WNS != 0) to: {block_tran_csv_file}")
-                maxtran_to_report = maxtran_not_zero
 
             drv_details_list = []
-            for index, row in maxtran_to_report.iterrows():
-                tran_details = f"TRAN: {row[corners_col]} - WNS:{row[tran_wns_col]}; BEP:{row[maxtran_cols[1]]}; FEP: {row[maxtran_cols[2]]}"
+            for row in tran_rows:
+                tran_details = f"TRAN: {table.corner(row)} - WNS:{tran_wns[row]}; BEP:{table.value('tran_bep', row)}; FEP: {table.value('tran_fep', row)}"
                 drv_details_list.append(tran_details)
             drv_details = ", ".join(drv_details_list)
+            _drv_measures(measures, "TRAN", table, tran_rows)
 
-            if (df_excel[cap_wns_col] == 0).all():
+            if (cap_wns == 0).all():
                 drv_details += " | CAP: CLEAN"
             else:
-                if highest_only == 1:
-                    maxcap_farthest_index = df_excel[cap_wns_col].abs().idxmax()
-                    maxcap_result = df_excel.loc[maxcap_farthest_index]
-                    drv_details += f" | CAP: {maxcap_result[corners_col]} - WNS:{maxcap_result[cap_wns_col]}; BEP:{maxcap_result[maxcap_cols[1]]}; FEP:{maxcap_result[maxcap_cols[2]]}."
-                else:
-                    cap_not_zero = df_excel[df_excel[cap_wns_col] != 0]
-                    cap_details_list = []
-                    for index, row in cap_not_zero.iterrows():
-                        cap_details = f"CAP: {row[corners_col]} - WNS:{row[cap_wns_col]}; BEP:{row[maxcap_cols[1]]}; FEP: {row[maxcap_cols[2]]}"
-                        cap_details_list.append(cap_details)
-                    if cap_details_list:
-                        drv_details += " | " + ", ".join(cap_details_list)
-                    else:
-                        drv_details += " | CAP: CLEAN"
+                drv_details += _drv_cap_details(table, highest_only, measures)
         else:
             drv_details = "TRAN: CLEAN | CAP: CLEAN"
             block_tran_cap_file = os.path.join(output_dir, "block_tran_cap.csv")
@@ -101,75 +138,59 @@ def process_drv_data(xls, output_dir, highest_only=1):
     return drv_details
 
 
-def process_ir_value_to_csv(excel_file, proj_dir_path):
-
-    try:
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-
-        ir_file_pattern = os.path.join(proj_dir_path, "ir_drop_rh", block_name, "func*", f"voltage*.rpt")
-        ir_files = glob.glob(ir_file_pattern)
-
-        if not ir_files:
-            custom_print(f"[INFO] No IR voltage report files found for block: {block_name} using pattern: {ir_file_pattern}")
-            return None, None
-
-        custom_print(f"[INFO] Found IR voltage report files for block {block_name}: {ir_files}")
-
-        vdd_value_str = None
-        vss_value_str = None
-
-        for ir_file in ir_files:
-            try:
-                with open(ir_file, 'r') as f_vdd:
-                    for line in f_vdd:
-                        if "/VDD" in line:
+def ir_values(ir_files, block_name):
+
+    # (VDD, VSS) drop strings from the first report holding both; None where not found
+    custom_print(f"[INFO] Found IR voltage report files for block {block_name}: {ir_files}")
+
+    vdd_value_str = None
+    vss_value_str = None
+
+    for ir_file in ir_files:
+        try:
+            with open(ir_file, 'r') as f_vdd:
+                for line in f_vdd:
+                    if "/VDD" in line:
+                        columns = line.split()
+                        if columns:
+                            vdd_value_str = columns[-1]
+                            custom_print(f"[INFO] First VDD Value Found in {ir_file}: {vdd_value_str}")
+                            break
+            if vdd_value_str is not None:
+                with open(ir_file, 'r') as f_vss:
+                    for line in f_vss:
+                        if "/VSS" in line:
                             columns = line.split()
                             if columns:
-                                vdd_value_str = columns[-1]
-                                custom_print(f"[INFO] First VDD Value Found in {ir_file}: {vdd_value_str}")
+                                vss_value_str = columns[-1]
+                                custom_print(f"[INFO] First VSS Value Found in {ir_file}: {vss_value_str}")
                                 break
-                if vdd_value_str is not None:
-                    with open(ir_file, 'r') as f_vss:
-                        for line in f_vss:
-                            if "/VSS" in line:
-                                columns = line.split()
-                                if columns:
-                                    vss_value_str = columns[-1]
-                                    custom_print(f"[INFO] First VSS Value Found in {ir_file}: {vss_value_str}")
-                                    break
-            except Exception as e:
-                custom_print(f"[WARNING] Error reading IR report file {ir_file}: {e}")
+        except Exception as e:
+            custom_print(f"[WARNING] Error reading IR report file {ir_file}: {e}")
 
-            if vdd_value_str is not None and vss_value_str is not None:
-                break
+        if vdd_value_str is not None and vss_value_str is not None:
+            break
 
-        return vdd_value_str, vss_value_str
-    except Exception as e:
-        custom_print(f"[WARNING] Error processing IR value for {excel_file}: {e}")
-        return None, None
+    return vdd_value_str, vss_value_str
 
 
-def process_formality_value(excel_file, proj_dir_path):
+def ir_percentage(value_str, nominal=IR_NOMINAL_VOLTAGE, measures=None):
 
+    # IR drop as a percentage of the nominal supply; measures, when given, collects (None, percentage, None)
+    if value_str is None:
+        return "Vol*.rpt File Not Found"
     try:
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-        log_file_path = os.path.join(proj_dir_path, "formality", block_name, f"fm.log")
-
-        if not os.path.exists(log_file_path):
-            return "Log File Not Found"
-
-        with open(log_file_path, 'r') as f:
-            log_content = f.read()
-            if "Verification SUCCEEDED" in log_content:
-                return "PASSING"
-            else:
-                return "NOT PASSING"
-    except Exception as e:
-        custom_print(f"[WARNING] Error processing formality log for {excel_file}: {e}")
-        return "Error Processing Log"
+        percentage = float(value_str.replace('D', 'e')) / nominal * 100
+    except ValueError:
+        return "Error"
+    if measures is not None:
+        measures.append((None, percentage, None))
+    return f"{percentage:.2f}%"
+
+
+def formality_status(log_content):
+
+    if "Verification SUCCEEDED" in log_content:
+        return "PASSING"
+    else:
+        return "NOT PASSING"
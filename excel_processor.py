@@ -5,19 +5,26 @@ Contains functions for processing Excel files and creating output reports
 
 import os
 import pandas as pd
-from config import ALL_BLOCK_CSV_FILES_DIR, proj_dir_path, COLUMN_WIDTHS, Output_xls_name
-from utils import custom_print, check_clean_status
-from physical_verification import process_drc_value, process_lvs_value, process_erc_value, process_ant_value
-from timing_analysis import process_hold_data, process_fmax_data, process_tcq_data, process_min_pulse_width
-from design_checks import process_drv_data, process_ir_value_to_csv, process_formality_value
+from config import ALL_BLOCK_CSV_FILES_DIR, proj_dir_path, COLUMN_WIDTHS, Output_xls_name, SHEET_CACHE_ENABLE
+from utils import custom_print
+from sheet_cache import SheetResultCache
+from analysis_inputs import load_analysis_inputs, save_analysis_inputs, ANALYSIS_INPUT_CHECKS
+from checks import CheckContext, run_checks, summary_values, selected_sheets, SKIPPED_VALUE
 
 
-def process_excel_file(excel_file, main_headers, sub_headers):
+def block_output_dir(excel_file, csv_dir=ALL_BLOCK_CSV_FILES_DIR):
+
+    base_name = os.path.splitext(os.path.basename(excel_file))[0]
+    return os.path.join(csv_dir, base_name + "_csv")
+
+
+def process_excel_file(excel_file, main_headers, sub_headers, artifacts=None, xls=None,
+                       proj_dir_path=proj_dir_path, csv_dir=ALL_BLOCK_CSV_FILES_DIR, selected=None):
+
+    # selected: names of the checks to run (see checks.select_checks); the others are reported as skipped
 
     try:
-        xls = pd.ExcelFile(excel_file)
-        base_name = os.path.splitext(excel_file)[0]
-        output_dir = os.path.join(ALL_BLOCK_CSV_FILES_DIR, base_name + "_csv")
+        output_dir = block_output_dir(excel_file, csv_dir)
 
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
@@ -25,62 +32,41 @@ def process_excel_file(excel_file, main_headers, sub_headers):
         else:
             custom_print(f"[WARNING] Directory already exists: {output_dir}. Files might be overwritten.")
 
-        first_sheet_name = xls.sheet_names[0]
-        df_main = xls.parse(first_sheet_name)
-
-        para_status = check_clean_status(df_main, "PARA ERRORS")
-        not_annotated_status = check_clean_status(df_main, "NOT ANNOTATED")
-
-        mpw_details = process_min_pulse_width(excel_file, output_dir)
-        mpw_violation_status = "CLEAN" if mpw_details == "CLEAN" else "NOT CLEAN"
-        hold_clk_grp_output = process_hold_data(excel_file, output_dir)
-
-        clock_groups = base_name.split("_")
-        fmax_details = process_fmax_data(excel_file, clock_groups, xls, output_dir)
-
-        drv_details = process_drv_data(xls, output_dir)
-
-        tcq_percentage = process_tcq_data(excel_file, output_dir)
-
-        mpw_details = process_min_pulse_width(excel_file, output_dir)
-
-        drc_value = process_drc_value(excel_file, proj_dir_path)
-        lvs_value = process_lvs_value(excel_file, proj_dir_path)
-        erc_value = process_erc_value(excel_file, proj_dir_path)
-        ant_value = process_ant_value(excel_file, proj_dir_path)
-
-        vdd_value_str, vss_value_str = process_ir_value_to_csv(excel_file, proj_dir_path)
-        calculated_vdd = "Vol*.rpt File Not Found"
-        calculated_vss = "Vol*.rpt File Not Found"
-        vdd_numeric = None
-        vss_numeric = None
-
-        if vdd_value_str is not None:
-            try:
-                vdd_numeric = float(vdd_value_str.replace("D", "e"))
-                calculated_vdd = f"{vdd_numeric / 0.825 * 100:.2f}%"
-            except ValueError:
-                calculated_vdd = "Error"
-
-        if vss_value_str is not None:
-            try:
-                vss_numeric = float(vss_value_str.replace("D", "e"))
-                calculated_vss = f"{vss_numeric / 0.825 * 100:.2f}%"
-            except ValueError:
-                calculated_vss = "Error"
-
-        formality_value = process_formality_value(excel_file, proj_dir_path)
-
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-
-        output_data = [
-            [block_name, para_status, not_annotated_status, mpw_violation_status,
-             hold_clk_grp_output, fmax_details, drv_details, tcq_percentage, mpw_details,
-             drc_value, lvs_value, erc_value, ant_value, calculated_vdd, calculated_vss, formality_value]
-        ]
+        # Checks whose sheets are unchanged since the last run reuse their stored result; the workbook is not
+        # fingerprinted when no selected check reads it
+        sheet_cache = None
+        if SHEET_CACHE_ENABLE and selected_sheets(selected) != set():
+            sheet_cache = SheetResultCache(excel_file, output_dir)
+
+        # Reports prefetched by artifact_fetcher are served to the checks in place of their own reads
+        context = CheckContext(excel_file, output_dir, proj_dir_path, xls=xls, artifacts=artifacts, sheet_cache=sheet_cache)
+        try:
+            results = run_checks(context, selected=selected)
+        finally:
+            context.sheets.close()
+        if sheet_cache is not None:
+            sheet_cache.save()
+
+        output_data = [[context.block_name] + summary_values(results)]
+
+        # Inputs of the recomputed checks are kept for what-if runs; cached checks keep their stored inputs
+        analysis_inputs = load_analysis_inputs(output_dir) or {}
+        recomputed = ANALYSIS_INPUT_CHECKS if sheet_cache is None else sheet_cache.misses
+        for check in ANALYSIS_INPUT_CHECKS:
+            if check in recomputed and results[check] != SKIPPED_VALUE:
+                analysis_inputs[check] = context.capture.get(check)
+        # The numbers behind each computed check's value; checks served from the sheet cache keep their stored ones
+        measures = analysis_inputs.setdefault("measures", {})
+        cached = set() if sheet_cache is None else set(sheet_cache.hits)
+        for check, value in results.items():
+            if value != SKIPPED_VALUE and check not in cached:
+                measures[check] = context.measures.get(check, [])
+        # What-if runs start from the last full row (a run of selected checks would leave "skipped" cells in it)
+        if selected is None:
+            analysis_inputs["row"] = output_data[0]
+        if results["IR"] != SKIPPED_VALUE:
+            analysis_inputs["ir"] = results["IR"]
+        save_analysis_inputs(output_dir, analysis_inputs)
 
         custom_print(f"\nExcel Output Table for {excel_file}:")
 
@@ -121,6 +107,23 @@ def process_excel_file(excel_file, main_headers, sub_headers):
         return ["Error processing file"]
 
 
+def block_measures(block_names, csv_dir=ALL_BLOCK_CSV_FILES_DIR):
+
+    # {block_name: {check: [(entry, value, corner)]}} as the blocks' checks last computed them (see CheckContext.measures)
+    measures = {}
+    for block_name in block_names:
+        inputs = load_analysis_inputs(block_output_dir(f"{block_name}_metrics.xlsx", csv_dir)) or {}
+        measures[block_name] = inputs.get("measures", {})
+    return measures
+
+
+def summary_row(block_name, output_data):
+
+    if output_data and output_data[0] != "Error processing file":
+        return output_data[0]
+    return ["File Not Found", block_name]
+
+
 def create_output_excel(all_output_data, sub_headers, main_headers, blocks_comp_names, blocks_owners, output_file=Output_xls_name):
 
     with pd.ExcelWriter(output_file, engine="xlsxwriter") as writer:
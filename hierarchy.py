@@ -0,0 +1,208 @@
+"""
+Hierarchy Module
+Contains the block hierarchy tree: project -> compiler -> block workbook -> sub-block, built from the block
+registry (BLOCK_INFO) and the sub-block names in each workbook name (i36_i50_i51 holds i36, i50 and i51). Every
+node keeps the worst status and worst value per check over its subtree. FMAX and TCQ results are split per
+sub-block; the other checks belong to the block node. A changed result only updates its ancestors (status
+counts make each level a constant-time step; siblings are rescanned only when the child holding the worst
+value improves) and stops as soon as an ancestor's aggregate is unchanged.
+"""
+
+import os
+import json
+from config import SUMMARY_CHECK_COLUMNS, HIERARCHY_FILE
+from utils import custom_print
+from summary_values import check_status, worst_measure, LOWER_IS_WORSE, STATUS_CLEAN, STATUS_NA, STATUS_MISSING, STATUS_NOT_CLEAN
+from results_sink import summary_record
+
+
+# Worst-case order of the statuses rolled up into a parent
+SEVERITY = [STATUS_CLEAN, STATUS_NA, STATUS_MISSING, STATUS_NOT_CLEAN]
+_SEVERITY_RANK = {status: rank for rank, status in enumerate(SEVERITY)}
+
+# Checks whose summary cell has one "<sub-block>: ..." entry per sub-block
+SUB_BLOCK_CHECKS = ("FMAX", "TCQ")
+
+
+def sub_block_names(block_name):
+
+    # i36_i50_i51 -> [i36, i50, i51]; the same split the FMAX / TCQ checks use
+    return [part for part in block_name.split("_") if part and part != "metrics"]
+
+
+def split_sub_block_results(value):
+
+    # {sub-block: entry} from an FMAX / TCQ cell such as "i36: TCC | i50: <corner> (Memory: 12%); Hold_margin: 3."
+    entries = {}
+    for part in str(value).rstrip(".").split(" | "):
+        name, sep, entry = part.partition(": ")
+        if sep:
+            entries[name.strip()] = part
+    return entries
+
+
+def _is_worse(check, candidate, than):
+
+    # candidate / than are (value, source path); equal values go to the first path so the result is order-independent
+    if than is None:
+        return True
+    if candidate[0] == than[0]:
+        return candidate[1] < than[1]
+    if check in LOWER_IS_WORSE:
+        return candidate[0] < than[0]
+    return abs(candidate[0]) > abs(than[0])
+
+
+class HierarchyNode:
+
+    def __init__(self, name, parent=None, kind="block"):
+        self.name = name
+        self.parent = parent
+        self.kind = kind
+        self.children = {}
+        self.path = name if parent is None or parent.parent is None else f"{parent.path}/{name}"
+        self.own = {}
+        # Per check: number of own + child results at each severity, and the worst (value, source path)
+        self.counts = {check: [0] * len(SEVERITY) for check in SUMMARY_CHECK_COLUMNS}
+        self.worst = {}
+
+    def child(self, name, kind):
+        if name not in self.children:
+            self.children[name] = HierarchyNode(name, self, kind)
+        return self.children[name]
+
+    def status(self, check):
+        counts = self.counts[check]
+        for rank in range(len(SEVERITY) - 1, -1, -1):
+            if counts[rank]:
+                return SEVERITY[rank]
+        return None
+
+    def aggregate(self, check):
+        return self.status(check), self.worst.get(check)
+
+    def _rescan_worst(self, check):
+        candidates = [self.own[check][1]] if check in self.own and self.own[check][1] is not None else []
+        candidates += [child.worst[check] for child in self.children.values() if child.worst.get(check) is not None]
+        best = None
+        for candidate in candidates:
+            if best is None or _is_worse(check, candidate, best):
+                best = candidate
+        if best is None:
+            self.worst.pop(check, None)
+        else:
+            self.worst[check] = best
+
+    def apply(self, check, old, new):
+        # old / new are (status, (value, source) or None) contributions of this node's own result or of a child
+        counts = self.counts[check]
+        if old is not None and old[0] is not None:
+            counts[_SEVERITY_RANK[old[0]]] -= 1
+        if new is not None and new[0] is not None:
+            counts[_SEVERITY_RANK[new[0]]] += 1
+        current = self.worst.get(check)
+        new_worst = new[1] if new is not None else None
+        old_worst = old[1] if old is not None else None
+        if new_worst is not None and _is_worse(check, new_worst, current):
+            self.worst[check] = new_worst
+        elif old_worst is not None and old_worst == current and new_worst != current:
+            # The contribution that held the worst value got better: only then look at the siblings again
+            self._rescan_worst(check)
+
+
+class BlockHierarchy:
+
+    def __init__(self, block_info):
+        self.root = HierarchyNode("project", kind="project")
+        self.blocks = {}
+        for block in block_info:
+            compiler = self.root.child(block["compiler"], "compiler")
+            node = compiler.child(block["block_name"], "block")
+            node.owner = block["owner"]
+            for sub_block in sub_block_names(block["block_name"]):
+                node.child(sub_block, "sub-block")
+            self.blocks[block["block_name"]] = node
+        self.updates = 0
+
+    def set_result(self, node, check, status, value=None):
+        # Sets a node's own result and walks up while the aggregate keeps changing; returns the levels updated
+        old = node.own.get(check)
+        new_own = (status, None if value is None else (value, node.path))
+        if old == new_own:
+            return 0
+        node.own[check] = new_own
+        levels = 0
+        old_aggregate = node.aggregate(check)
+        node.apply(check, old, new_own)
+        new_aggregate = node.aggregate(check)
+        while node.parent is not None and new_aggregate != old_aggregate:
+            parent = node.parent
+            parent_old = parent.aggregate(check)
+            parent.apply(check, old_aggregate, new_aggregate)
+            old_aggregate, new_aggregate = parent_old, parent.aggregate(check)
+            node = parent
+            levels += 1
+        self.updates += 1
+        return levels
+
+    def update_block(self, row, measures=None):
+        # Applies one all_output_data row and its {check: [(entry, value, corner)]} measures; unchanged checks cost nothing
+        record = summary_record(row, {}, {})
+        node = self.blocks.get(record["block_name"])
+        if node is None:
+            return 0
+        measures = measures or {}
+        levels = 0
+        for check, detail in record["checks"].items():
+            sub_results = split_sub_block_results(detail) if check in SUB_BLOCK_CHECKS else {}
+            if sub_results and set(sub_results) <= set(node.children):
+                for sub_block, child in node.children.items():
+                    entry = sub_results.get(sub_block)
+                    if entry is None:
+                        levels += self.set_result(child, check, None)
+                    else:
+                        levels += self.set_result(child, check, check_status(check, entry),
+                                                  worst_measure(check, measures.get(check), sub_block)[0])
+                levels += self.set_result(node, check, None)
+            else:
+                for child in node.children.values():
+                    levels += self.set_result(child, check, None)
+                levels += self.set_result(node, check, check_status(check, detail), worst_measure(check, measures.get(check))[0])
+        return levels
+
+    def node(self, path):
+        # "HSPRAM/i36_i50/i36" -> node; the empty path is the project root
+        node = self.root
+        for name in [name for name in path.split("/") if name]:
+            node = node.children[name]
+        return node
+
+    def to_dict(self, node=None):
+        node = self.root if node is None else node
+        return {
+            "name": node.name,
+            "kind": node.kind,
+            "checks": {check: {"status": node.status(check),
+                               "worst_value": node.worst[check][0] if check in node.worst else None,
+                               "worst_at": node.worst[check][1] if check in node.worst else None}
+                       for check in SUMMARY_CHECK_COLUMNS if node.status(check) is not None},
+            "children": [self.to_dict(child) for child in node.children.values()],
+        }
+
+    def save(self, path=HIERARCHY_FILE):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1, default=str)
+        os.replace(tmp_path, path)
+        custom_print(f"[CREATED] Block hierarchy roll-up -> {path}")
+
+
+def build_hierarchy(block_info_sorted, all_output_data, measures=None):
+
+    # measures: {block_name: {check: [(entry, value, corner)]}} (excel_processor.block_measures)
+    measures = measures or {}
+    hierarchy = BlockHierarchy(block_info_sorted)
+    for row in all_output_data:
+        if row != ["Error processing file"]:
+            hierarchy.update_block(row, measures.get(summary_record(row, {}, {})["block_name"]))
+    return hierarchy
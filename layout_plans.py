@@ -0,0 +1,73 @@
+"""
+Layout Plans Module
+Contains the layout fingerprint cache: the header row of a sheet (plus the names the extraction depends on,
+such as the clock groups or sub-blocks) is fingerprinted and compiled once into an extraction plan - the
+column positions of every clock group / sub-block - kept in memory and on disk, so later workbooks with the
+same layout skip header analysis entirely.
+"""
+
+import os
+import json
+import hashlib
+from config import LAYOUT_PLAN_FILE
+from utils import custom_print
+
+
+class LayoutPlanCache:
+
+    def __init__(self, path=LAYOUT_PLAN_FILE):
+        self.path = path
+        self.plans = None
+        self.hits = 0
+        self.compiled = 0
+
+    def _load(self):
+        self.plans = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    self.plans = json.load(f)
+            except (OSError, ValueError) as e:
+                custom_print(f"[WARNING] Ignoring unreadable layout plans {self.path}: {e}")
+
+    @staticmethod
+    def fingerprint(kind, header, extra=()):
+        return hashlib.sha1(repr((kind, [repr(col) for col in header], [repr(item) for item in extra])).encode("utf-8")).hexdigest()
+
+    def plan(self, kind, header, extra, compile_plan):
+        # Returns the plan for this layout, compiling (and storing) it on first sight; compile_plan may return
+        # None for layouts that cannot be planned from the header alone, which are then never cached
+        if self.plans is None:
+            self._load()
+        key = self.fingerprint(kind, header, extra)
+        if key in self.plans:
+            self.hits += 1
+            return self.plans[key]
+        plan = compile_plan()
+        if plan is not None:
+            self.plans[key] = plan
+            self.compiled += 1
+            self.save({key: plan})
+            custom_print(f"[INFO] Compiled {kind} layout plan {key[:10]}")
+        return plan
+
+    def save(self, new_plans):
+        # Merge with what other processes stored meanwhile, then swap the file in
+        if not os.path.isdir(os.path.dirname(self.path) or "."):
+            return
+        stored = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = {}
+        stored.update(new_plans)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, self.path)
+
+
+# The plan cache shared by every block analyzed in this process
+layout_plans = LayoutPlanCache()
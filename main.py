@@ -1,18 +1,146 @@
 import os
 import time
+import argparse
 import builtins
 from config import (
     ALL_BLOCK_CSV_FILES_DIR, 
     proj_dir_path, 
     MAIN_HEADERS, 
     SUB_HEADERS, 
-    BLOCK_INFO
+    BLOCK_INFO,
+    ARTIFACT_PREFETCH,
+    PIPELINE_ENABLE,
+    PIPELINE_ANALYSIS_WORKERS,
+    SCHEDULER_ENABLE,
+    PROGRESSIVE_OUTPUT,
+    PROGRESS_NDJSON_FILE,
+    PARTIAL_SUMMARY_FILE,
+    PARTIAL_SUMMARY_INTERVAL,
+    Output_xls_name
 )
-from utils import toggle_print, print_header, custom_print
-from excel_processor import process_excel_file, create_output_excel
+from utils import toggle_print, print_header, custom_print, block_name_from_excel
+from excel_processor import process_excel_file, summary_row
+from artifact_fetcher import fetch_block_artifacts
+from pipeline import run_pipeline
+from scheduler import estimate_block_costs, lpt_order, record_block_runtimes, runtime_report, format_runtime_report
+from results_sink import ResultsSink
+from run_journal import start_journal, checkpoint_block, load_journal
+from run_outputs import RunOutputs
+from watch import snapshot_inputs, watch_blocks
+from status_index import parse_filter
+from analysis_memo import analysis_memo, merge_memo_stats, format_memo_stats
+from checks import select_checks, prefetch_keys, CHECK_GROUPS
 
 
-def main():
+def sort_block_info(block_info):
+
+    # Sort block information: i-blocks first, then others
+    i_blocks = [block for block in block_info if block["block_name"].lower().startswith('i')]
+    i_blocks_sorted = sorted(i_blocks, key=lambda x: x["block_name"].lower())
+    non_i_blocks = [block for block in block_info if not block["block_name"].lower().startswith('i')]
+    non_i_blocks_sorted = sorted(non_i_blocks, key=lambda x: x["block_name"].lower())
+    return i_blocks_sorted + non_i_blocks_sorted
+
+
+def process_blocks(block_info_sorted, blocks_comp_names, blocks_owners, resume=False, proj_dir_path=proj_dir_path,
+                   memo_stats=None, selected=None, subset=False, runtime_stats=None):
+
+    # Returns all_output_data in block_info_sorted order; memo_stats (if given) receives the analysis memo hits / lookups,
+    # runtime_stats (if given) the predicted-versus-actual runtime report (see scheduler.runtime_report).
+    # selected: names of the checks to run (see checks.select_checks), None for all.
+    # subset: only some of the project's blocks are processed (summary daemon jobs); the run journal and the
+    # progress NDJSON / partial summary describe whole-project runs, so they are only read (resume), never reset
+    if not subset:
+        start_journal(resume=resume)
+    workbooks = {b['block_name']: f"{b['block_name']}_metrics.xlsx" for b in block_info_sorted}
+    replayed = load_journal(workbooks, selected=selected) if resume else {}
+
+    existing_files = [excel_file for block_name, excel_file in workbooks.items()
+                      if block_name not in replayed and os.path.exists(excel_file)]
+
+    # Prefetch the selected checks' PV / IR drop / formality artifacts for every block with a workbook
+    block_artifacts = {}
+    if ARTIFACT_PREFETCH:
+        block_artifacts = fetch_block_artifacts(existing_files, proj_dir_path, keys=prefetch_keys(selected))
+
+    # Estimate per-block cost so the largest blocks start first; the cost model (and the runtime history it is
+    # calibrated from) covers full runs only, so runs of selected checks keep the canonical order
+    block_costs = {}
+    block_timings = {}
+    dispatch_order = existing_files
+    if SCHEDULER_ENABLE and existing_files and selected is None:
+        block_costs = estimate_block_costs(existing_files, proj_dir_path)
+        dispatch_order = lpt_order(existing_files, block_costs)
+        custom_print("[DEBUG] Dispatch order:", dispatch_order)
+
+    # Publish each block's row as soon as it finishes
+    results_sink = None
+    if PROGRESSIVE_OUTPUT and not subset:
+        results_sink = ResultsSink(PROGRESS_NDJSON_FILE, PARTIAL_SUMMARY_FILE, PARTIAL_SUMMARY_INTERVAL,
+                                   [block["block_name"] for block in block_info_sorted],
+                                   blocks_comp_names, blocks_owners)
+        for block_name, row in replayed.items():
+            results_sink.publish(block_name, row)
+
+    def finish_block(block_name, excel_file, row):
+        if not subset:
+            checkpoint_block(block_name, excel_file, row, selected=selected)
+        if results_sink is not None:
+            results_sink.publish(block_name, row)
+
+    # Parse and analyze the workbooks in the staged pipeline; results are collected per file
+    processing_start = time.time()
+    pipeline_results = None
+    if PIPELINE_ENABLE and existing_files:
+        pipeline_results = {}
+        file_kwargs = {excel_file: {"proj_dir_path": proj_dir_path, "selected": selected} for excel_file in dispatch_order}
+        for excel_file, output_data in run_pipeline(dispatch_order, MAIN_HEADERS, SUB_HEADERS, block_artifacts,
+                                                    timings=block_timings, file_kwargs=file_kwargs,
+                                                    memo_stats=memo_stats):
+            pipeline_results[excel_file] = output_data
+            block_name = block_name_from_excel(excel_file)
+            finish_block(block_name, excel_file, summary_row(block_name, output_data))
+
+    # Process each Excel file
+    all_output_data = []
+    for block in block_info_sorted:
+        excel_file = workbooks[block['block_name']]
+        if block['block_name'] in replayed:
+            custom_print(f"Resumed from checkpoint: {excel_file}")
+            all_output_data.append(replayed[block['block_name']])
+        elif os.path.exists(excel_file):
+            custom_print(f"Processing Excel file: {excel_file}")
+            if pipeline_results is not None:
+                output_data = pipeline_results[excel_file]
+            else:
+                start_time = time.time()
+                output_data = process_excel_file(excel_file, MAIN_HEADERS, SUB_HEADERS,
+                                                 artifacts=block_artifacts.get(block['block_name']),
+                                                 proj_dir_path=proj_dir_path, selected=selected)
+                block_timings[excel_file] = time.time() - start_time
+                finish_block(block['block_name'], excel_file, summary_row(block['block_name'], output_data))
+            custom_print(f"Output for {block['block_name']}: {output_data}")
+            all_output_data.append(summary_row(block['block_name'], output_data))
+        else:
+            custom_print(f"File not found: {excel_file}")
+            all_output_data.append(["File Not Found", block['block_name']])
+            if results_sink is not None:
+                results_sink.publish(block['block_name'], all_output_data[-1])
+
+    if results_sink is not None:
+        results_sink.close()
+    custom_print("Final all_output_data:", all_output_data)
+    if SCHEDULER_ENABLE and block_timings and selected is None:
+        record_block_runtimes(block_costs, block_timings, proj_dir_path)
+        if runtime_stats is not None:
+            workers = PIPELINE_ANALYSIS_WORKERS if pipeline_results is not None else 1
+            runtime_stats.update(runtime_report(block_costs, block_timings, time.time() - processing_start, workers))
+    if memo_stats is not None and pipeline_results is None:
+        merge_memo_stats(memo_stats, analysis_memo.stats)
+    return all_output_data
+
+
+def main(resume=False, diff_against=None, watch=False, status_filter=None, selected=None):
 
     try:
         # Initialize print control
@@ -28,35 +156,22 @@ def main():
         else:
             custom_print(f"[WARNING] Main directory already exists: {ALL_BLOCK_CSV_FILES_DIR}. Files might be overwritten.")
 
-        # Sort block information: i-blocks first, then others
-        i_blocks = [block for block in BLOCK_INFO if block["block_name"].lower().startswith('i')]
-        i_blocks_sorted = sorted(i_blocks, key=lambda x: x["block_name"].lower())
-        non_i_blocks = [block for block in BLOCK_INFO if not block["block_name"].lower().startswith('i')]
-        non_i_blocks_sorted = sorted(non_i_blocks, key=lambda x: x["block_name"].lower())
-        block_info_sorted = i_blocks_sorted + non_i_blocks_sorted
+        block_info_sorted = sort_block_info(BLOCK_INFO)
         custom_print("[DEBUG] Sorted block_info:", [block["block_name"] for block in block_info_sorted])
 
         # Create dictionaries for block metadata
         blocks_comp_names = {block["block_name"]: block["compiler"] for block in block_info_sorted}
         blocks_owners = {block["block_name"]: block["owner"] for block in block_info_sorted}
-        
-        # Process each Excel file
-        all_output_data = []
-        for block in block_info_sorted:
-            excel_file = f"{block['block_name']}_metrics.xlsx"
-            if os.path.exists(excel_file):
-                custom_print(f"Processing Excel file: {excel_file}")
-                output_data = process_excel_file(excel_file, MAIN_HEADERS, SUB_HEADERS)
-                custom_print(f"Output for {block['block_name']}: {output_data}")
-                if output_data and output_data[0] != "Error processing file":
-                    all_output_data.append(output_data[0])
-                else:
-                    all_output_data.append(["File Not Found", block['block_name']])
-            else:
-                custom_print(f"File not found: {excel_file}")
-                all_output_data.append(["File Not Found", block['block_name']])
-        
-        custom_print("Final all_output_data:", all_output_data)
+
+        # In watch mode, snapshot the inputs before processing so changes made during the run are picked up
+        input_snapshot = None
+        if watch:
+            input_snapshot = snapshot_inputs([block["block_name"] for block in block_info_sorted])
+
+        memo_stats = {}
+        runtime_stats = {}
+        all_output_data = process_blocks(block_info_sorted, blocks_comp_names, blocks_owners, resume=resume,
+                                         memo_stats=memo_stats, selected=selected, runtime_stats=runtime_stats)
         print("    [ Done Processing! ]", flush=True)
 
         # Print processing summary
@@ -88,13 +203,14 @@ def main():
             print(f"Failed to process: \033[31m{len(failed_files)}\033[0m", flush=True)
         else:
             print(f"Failed to process: {len(failed_files)}", flush=True)
+        print(f"Analysis memo: {format_memo_stats(memo_stats)}", flush=True)
+        print(f"Runtime prediction: {format_runtime_report(runtime_stats)}", flush=True)
 
         # Print final status
         if len(failed_files) == 0:
             print("\n" + "*" * 100, flush=True)
             print(f"\033[1;32mSUCCESS\033[0m: All files processed successfully!", flush=True)
             print("*" * 100, flush=True)
-            from config import Output_xls_name
             print(f"\033[1;31mNOTE\033[0m: Please check the output file '{Output_xls_name}' for the processed results.", flush=True)
         else:
             print("\n" + "!" * 100, flush=True)
@@ -105,13 +221,50 @@ def main():
 
         print("=" * 100 + "\n", flush=True)
         
-        # Create consolidated Excel output
-        create_output_excel(all_output_data, SUB_HEADERS, MAIN_HEADERS, blocks_comp_names, blocks_owners)
+        # Summary workbook, delta report, results history, cube, hierarchy, status index and filtered rows
+        outputs = RunOutputs(block_info_sorted, blocks_comp_names, blocks_owners, selected=selected,
+                             diff_against=diff_against, status_filter=status_filter)
+        outputs.publish(all_output_data)
+
+        # Keep the summary current: re-summarize only blocks whose inputs change
+        if watch:
+            watch_blocks(block_info_sorted, blocks_comp_names, blocks_owners, all_output_data, input_snapshot, outputs,
+                         selected=selected)
 
     except Exception as e:
         print(f"Error during execution: {e}", flush=True)
         raise
 
 
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Block Summary Processing Script")
+    parser.add_argument("--resume", action="store_true",
+                        help="Replay the run journal and only process blocks missing from it")
+    parser.add_argument("--diff-against", metavar="RUN",
+                        help="Write a delta report of cells changed since a stored run (run id or 'last')")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and re-summarize blocks whenever their workbooks or PV / IR drop / formality results change")
+    parser.add_argument("--filter", metavar="EXPR", dest="status_filter",
+                        help="Also write the blocks matching a status filter, e.g. \"HOLD=NOT CLEAN,DRV=NOT CLEAN\" (see status_index.py)")
+    parser.add_argument("--only", metavar="CHECKS",
+                        help=f"Run only these checks, comma-separated ({','.join(CHECK_GROUPS)}); the other columns read \"skipped\"")
+    parser.add_argument("--skip", metavar="CHECKS",
+                        help="Leave these checks out (same names as --only); their columns read \"skipped\"")
+    args = parser.parse_args(argv)
+    if args.status_filter is not None:
+        try:
+            parse_filter(args.status_filter)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        args.selected = select_checks(args.only, args.skip)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(resume=args.resume, diff_against=args.diff_against, watch=args.watch, status_filter=args.status_filter,
+         selected=args.selected)
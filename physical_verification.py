@@ -4,111 +4,59 @@ Contains functions for processing DRC, LVS, ERC, and ANT verification results
 """
 
 import os
+from utils import block_name_from_excel
 
 
-def process_drc_value(excel_file, proj_dir_path):
-
-    try:
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-            
-        drc_file_path = os.path.join(proj_dir_path, "PV", "drc", block_name, "icv_mf_drc_run", f"{block_name}.RESULTS")
-
-        if os.path.exists(drc_file_path):
-            with open(drc_file_path, 'r') as f:
-                first_line = f.readline().strip()
-            if "RESULTS: CLEAN" in first_line:
-                return "CLEAN"
-            elif "RESULTS: NOT CLEAN" in first_line:
-                return "NOT CLEAN"
-            else:
-                return first_line
-        else:
-            return "DRC File Not Found"
-    except Exception as e:
-        return f"Error reading DRC file: {e}"
-
-
-def process_lvs_value(excel_file, proj_dir_path):
-
-    try:
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-
-        lvs_file_path = os.path.join(proj_dir_path, "PV", "lvs", block_name, "icv_mf_lvs_run", f"{block_name}.RESULTS")
-
-        if os.path.exists(lvs_file_path):
-            with open(lvs_file_path, 'r') as f:
-                first_line = f.readline().strip()
-            if "LVS Compare Results: PASS" in first_line:
-                return "CLEAN"
-            elif "LVS Compare Results: NOT CLEAN" in first_line:
-                return "NOT CLEAN"
-            else:
-                return first_line
-        else:
-            return "LVS File Not Found"
-    except Exception as e:
-        return f"Error reading LVS file: {e}"
-
-
-def process_erc_value(excel_file, proj_dir_path):
-
-    try:
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-
-        erc_file_path = os.path.join(proj_dir_path, "PV", "lvs", block_name, "icv_mf_lvs_run", f"{block_name}.RESULTS")
-
-        if os.path.exists(erc_file_path):
-            with open(erc_file_path, 'r') as f:
-                line = None
-                for i in range(11):  # Read up to 11 lines
-                    line = f.readline()
-                    if not line:  # Break if end of file is reached before 11 lines
-                        break
-                if line:
-                    eleventh_line = line.strip()
-                    if "DRC and Extraction Results: CLEAN" in eleventh_line:
-                        return "CLEAN"
-                    elif "DRC and Extraction Results: NOT CLEAN" in eleventh_line:
-                        return "NOT CLEAN"
-                    else:
-                        return eleventh_line
-                else:
-                    return "ERC File Empty or Less than 11 lines"
-        else:
-            return "ERC File Not Found"
-    except Exception as e:
-        return f"Error reading ERC file: {e}"
-
-
-def process_ant_value(excel_file, proj_dir_path):
-
-    try:
-        block_name_with_ext = os.path.basename(excel_file)
-        block_name = os.path.splitext(block_name_with_ext)[0]
-        if block_name.endswith("_metrics"):
-            block_name = block_name[:-len("_metrics")]
-
-        ant_file_path = os.path.join(proj_dir_path, "PV", "ant", block_name, "icv_mf_ant_run", f"{block_name}.RESULTS")
-
-        if os.path.exists(ant_file_path):
-            with open(ant_file_path, 'r') as f:
-                first_line = f.readline().strip()
-            if "RESULTS: CLEAN" in first_line:
-                return "CLEAN"
-            elif "RESULTS: NOT CLEAN" in first_line:
-                return "NOT CLEAN"
-            else:
-                return first_line
-        else:
-            return "ANT File Not Found"
-    except Exception as e:
-        return f"Error reading ANT file: {e}"
+# Report paths under proj_dir_path; {block} is the block name
+DRC_RESULTS = os.path.join("PV", "drc", "{block}", "icv_mf_drc_run", "{block}.RESULTS")
+LVS_RESULTS = os.path.join("PV", "lvs", "{block}", "icv_mf_lvs_run", "{block}.RESULTS")
+ANT_RESULTS = os.path.join("PV", "ant", "{block}", "icv_mf_ant_run", "{block}.RESULTS")
+
+# ERC status is the 11th line of the LVS results file
+ERC_RESULT_LINE = 11
+
+
+def artifact_path(template, excel_file, proj_dir_path):
+
+    return os.path.join(proj_dir_path, template.format(block=block_name_from_excel(excel_file)))
+
+
+def drc_status(head_lines):
+
+    first_line = head_lines[0].strip() if head_lines else ""
+    if "RESULTS: CLEAN" in first_line:
+        return "CLEAN"
+    elif "RESULTS: NOT CLEAN" in first_line:
+        return "NOT CLEAN"
+    else:
+        return first_line
+
+
+def lvs_status(head_lines):
+
+    first_line = head_lines[0].strip() if head_lines else ""
+    if "LVS Compare Results: PASS" in first_line:
+        return "CLEAN"
+    elif "LVS Compare Results: NOT CLEAN" in first_line:
+        return "NOT CLEAN"
+    else:
+        return first_line
+
+
+def erc_status(head_lines):
+
+    if len(head_lines) < ERC_RESULT_LINE:
+        return "ERC File Empty or Less than 11 lines"
+    eleventh_line = head_lines[ERC_RESULT_LINE - 1].strip()
+    if "DRC and Extraction Results: CLEAN" in eleventh_line:
+        return "CLEAN"
+    elif "DRC and Extraction Results: NOT CLEAN" in eleventh_line:
+        return "NOT CLEAN"
+    else:
+        return eleventh_line
+
+
+def ant_status(head_lines):
+
+    # ANT reports use the same first-line format as DRC
+    return drc_status(head_lines)
@@ -0,0 +1,242 @@
+"""
+Pipeline Module
+Contains the staged parse/analyze pipeline: parser processes decode <block>_metrics.xlsx workbooks,
+analysis processes run the checks, and the two stages are joined by a bounded queue. Numeric sheet
+columns travel through multiprocessing.shared_memory instead of being pickled.
+"""
+
+import time
+import queue
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+import pandas as pd
+from config import ALL_BLOCK_CSV_FILES_DIR, PIPELINE_PARSER_WORKERS, PIPELINE_ANALYSIS_WORKERS, PIPELINE_QUEUE_SIZE, SHEET_CACHE_ENABLE
+from utils import custom_print, block_name_from_excel
+from sheet_loader import load_workbook_sheets, ParsedWorkbook
+from sheet_cache import SheetResultCache
+from checks import selected_sheets
+from excel_processor import process_excel_file, block_output_dir
+from analysis_memo import analysis_memo, merge_memo_stats
+
+
+def _is_shareable(series):
+
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufmM"
+
+
+def _pack_sheets(sheets):
+
+    # Lay every numeric column of every sheet out back to back (8-byte aligned) in one segment
+    layout = {}
+    total_bytes = 0
+    for sheet_name, (header, df) in sheets.items():
+        numeric = {}
+        for pos in range(df.shape[1]):
+            series = df.iloc[:, pos]
+            if _is_shareable(series):
+                numeric[pos] = (series.dtype.str, total_bytes, len(series))
+                total_bytes += (series.dtype.itemsize * len(series) + 7) // 8 * 8
+        layout[sheet_name] = numeric
+
+    shm = shared_memory.SharedMemory(create=True, size=total_bytes) if total_bytes else None
+    descriptor = {"shm_name": shm.name if shm else None, "sheets": {}}
+    for sheet_name, (header, df) in sheets.items():
+        numeric = layout[sheet_name]
+        objects = {}
+        for pos in range(df.shape[1]):
+            series = df.iloc[:, pos]
+            if pos in numeric:
+                dtype, offset, length = numeric[pos]
+                np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset)[:] = series.to_numpy()
+            else:
+                objects[pos] = series.array
+        descriptor["sheets"][sheet_name] = {
+            "header": header,
+            "index": df.index,
+            "columns": df.columns,
+            "numeric": numeric,
+            "objects": objects,
+        }
+    if shm is not None:
+        shm.close()
+    return descriptor
+
+
+def _unpack_sheets(descriptor):
+
+    # Copy the numeric columns out and release the segment straight away
+    shm = shared_memory.SharedMemory(name=descriptor["shm_name"]) if descriptor["shm_name"] else None
+    try:
+        sheets = {}
+        for sheet_name, info in descriptor["sheets"].items():
+            arrays = {}
+            for pos in range(len(info["columns"])):
+                if pos in info["numeric"]:
+                    dtype, offset, length = info["numeric"][pos]
+                    arrays[pos] = np.ndarray(length, dtype=dtype, buffer=shm.buf, offset=offset).copy()
+                else:
+                    arrays[pos] = info["objects"][pos]
+            df = pd.DataFrame(arrays, index=info["index"])
+            df.columns = info["columns"]
+            sheets[sheet_name] = (info["header"], df)
+        return sheets
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+
+def task_workbook(task):
+
+    # A pipeline task is a workbook path, or a (proj_dir_path, excel_file) pair when several projects share a run
+    return task[1] if isinstance(task, tuple) else task
+
+
+def _parser_worker(task_queue, parsed_queue, file_kwargs):
+
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        excel_file = task_workbook(task)
+        try:
+            start_time = time.time()
+            # Only the sheets of the selected checks are decoded, and of those only the ones whose checks do not
+            # all have a stored result for the same sheet fingerprint; with no sheet check selected the workbook
+            # is not opened at all
+            sheet_names = None
+            selected = file_kwargs.get(task, {}).get("selected")
+            only = selected_sheets(selected)
+            if SHEET_CACHE_ENABLE and only != set():
+                csv_dir = file_kwargs.get(task, {}).get("csv_dir", ALL_BLOCK_CSV_FILES_DIR)
+                sheet_cache = SheetResultCache(excel_file, block_output_dir(excel_file, csv_dir))
+                sheet_names = sheet_cache.sheet_names
+                stale = sheet_cache.stale_sheets(selected)
+                only = only if stale is None else stale
+            sheets = load_workbook_sheets(excel_file, only=only) if only != set() else {}
+            descriptor = _pack_sheets(sheets)
+            descriptor["sheet_names"] = sheet_names
+            descriptor["parse_seconds"] = time.time() - start_time
+            # Blocks while the analysis stage is PIPELINE_QUEUE_SIZE workbooks behind
+            parsed_queue.put((task, descriptor, None))
+        except Exception as e:
+            parsed_queue.put((task, None, str(e)))
+
+
+def _analysis_worker(parsed_queue, result_queue, main_headers, sub_headers, artifacts, file_kwargs):
+
+    while True:
+        item = parsed_queue.get()
+        if item is None:
+            break
+        task, descriptor, error = item
+        excel_file = task_workbook(task)
+        if error is not None:
+            custom_print(f"[WARNING] Error processing file {excel_file}: {error}")
+            result_queue.put((task, ["Error processing file"], None, None))
+            continue
+        start_time = time.time()
+        try:
+            xls = ParsedWorkbook(excel_file, _unpack_sheets(descriptor), descriptor["sheet_names"])
+        except Exception as e:
+            custom_print(f"[WARNING] Error processing file {excel_file}: {e}")
+            result_queue.put((task, ["Error processing file"], None, None))
+            continue
+        kwargs = {"artifacts": artifacts.get(block_name_from_excel(excel_file))}
+        kwargs.update(file_kwargs.get(task, {}))
+        memo_before = {kind: list(stats) for kind, stats in analysis_memo.stats.items()}
+        output_data = process_excel_file(excel_file, main_headers, sub_headers, xls=xls, **kwargs)
+        # This block's memo hits / lookups travel back with its result
+        memo_delta = {kind: [hits - memo_before.get(kind, [0, 0])[0], lookups - memo_before.get(kind, [0, 0])[1]]
+                      for kind, (hits, lookups) in analysis_memo.stats.items()}
+        result_queue.put((task, output_data, descriptor["parse_seconds"] + time.time() - start_time, memo_delta))
+
+
+def _put_stop_markers(parsed_queue, count):
+
+    # Returns how many of the count stop markers did not fit in the queue
+    for queued in range(count):
+        try:
+            parsed_queue.put_nowait(None)
+        except queue.Full:
+            return count - queued
+    return 0
+
+
+def run_pipeline(excel_files, main_headers, sub_headers, artifacts=None,
+                 parser_workers=PIPELINE_PARSER_WORKERS, analysis_workers=PIPELINE_ANALYSIS_WORKERS,
+                 queue_size=PIPELINE_QUEUE_SIZE, timings=None, file_kwargs=None, memo_stats=None):
+
+    # Yields (task, output_data) in completion order; excel_files are the tasks (see task_workbook), dispatched in the
+    # order given. When a timings dict is passed, it receives the parse + analysis seconds of each task; a memo_stats
+    # dict receives the analysers' analysis memo hits / lookups (see analysis_memo.py).
+    # file_kwargs maps a task to extra process_excel_file arguments (artifacts, proj_dir_path, csv_dir, selected) for
+    # runs that mix blocks of several projects (tasks keyed by (proj_dir_path, excel_file)) or run only some checks.
+    excel_files = list(excel_files)
+    if not excel_files:
+        return
+    artifacts = artifacts or {}
+    file_kwargs = file_kwargs or {}
+    parser_workers = max(1, min(parser_workers, len(excel_files)))
+    analysis_workers = max(1, min(analysis_workers, len(excel_files)))
+
+    # Start the resource tracker here so parsers and analysers share it for the shared-memory segments
+    resource_tracker.ensure_running()
+    task_queue = multiprocessing.Queue()
+    parsed_queue = multiprocessing.Queue(maxsize=max(1, queue_size))
+    result_queue = multiprocessing.Queue()
+    for excel_file in excel_files:
+        task_queue.put(excel_file)
+    for _ in range(parser_workers):
+        task_queue.put(None)
+
+    # Analysers are not daemonic so they can start the intra-block pool (timing_analysis.map_ordered)
+    parsers = [multiprocessing.Process(target=_parser_worker, args=(task_queue, parsed_queue, file_kwargs), daemon=True)
+               for _ in range(parser_workers)]
+    analysers = [multiprocessing.Process(target=_analysis_worker,
+                                         args=(parsed_queue, result_queue, main_headers, sub_headers, artifacts, file_kwargs))
+                 for _ in range(analysis_workers)]
+    for proc in parsers + analysers:
+        proc.start()
+    custom_print(f"[INFO] Pipeline started: {parser_workers} parser(s), {analysis_workers} analyser(s), queue size {queue_size}")
+
+    pending = set(excel_files)
+    # Stop markers still to be queued; they are only queued without blocking, as a full parsed_queue whose
+    # analysers have died would never drain
+    markers_left = len(analysers)
+    try:
+        while pending:
+            # Once every parser has exited, queue one stop marker per analyser behind the remaining work
+            if markers_left and not any(proc.is_alive() for proc in parsers):
+                markers_left = _put_stop_markers(parsed_queue, markers_left)
+            try:
+                task, output_data, seconds, memo_delta = result_queue.get(timeout=1)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in analysers):
+                    # Every analyser has exited (after its stop marker, or killed by OOM / a native crash); nothing
+                    # more can arrive, and parsers blocked on the full parsed_queue would never exit
+                    for proc in parsers:
+                        if proc.is_alive():
+                            proc.terminate()
+                    break
+                continue
+            pending.discard(task)
+            if timings is not None and seconds is not None:
+                timings[task] = seconds
+            if memo_stats is not None and memo_delta is not None:
+                merge_memo_stats(memo_stats, memo_delta)
+            yield task, output_data
+
+        for task in excel_files:
+            if task in pending:
+                custom_print(f"[WARNING] Pipeline lost {task_workbook(task)} (worker exited before reporting)")
+                yield task, ["Error processing file"]
+    finally:
+        # The last result can arrive before the parsers are seen to exit; analysers still need their stop markers
+        if markers_left:
+            _put_stop_markers(parsed_queue, markers_left)
+        for proc in parsers + analysers:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
@@ -0,0 +1,220 @@
+"""
+Results API Module
+Contains the local read-only HTTP/JSON results service. It answers from an in-memory index of the latest
+run in the result history, rebuilt only when a new run is recorded or the latest run is updated in place
+(watch mode), and serves ETags so unchanged results cost a 304.
+
+Usage:
+    python results_api.py [--host 127.0.0.1] [--port 8765]
+
+    GET /run                      latest run metadata
+    GET /blocks                   every block with its per-check status
+    GET /blocks?filter=HOLD=NOT%20CLEAN,DRV=NOT%20CLEAN   blocks matching a status filter (see status_index.py)
+    GET /blocks/<block>           one block, all checks with value / worst value / corner
+    GET /checks/<check>           one check across all blocks
+    GET /owners/<owner>           blocks of one owner
+    GET /compilers/<compiler>     blocks of one compiler
+    GET /worst/<check>?n=10       worst N blocks of the project for one check
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+from config import (
+    RESULTS_DB_FILE,
+    SUMMARY_CHECK_COLUMNS,
+    proj_dir_path,
+    RESULTS_API_HOST,
+    RESULTS_API_PORT,
+    RESULTS_API_REFRESH_INTERVAL,
+    RESULTS_API_CACHE_SIZE
+)
+from summary_values import LOWER_IS_WORSE
+from results_db import open_results_db
+from status_index import StatusIndex, encode_statuses
+
+
+class ResultsIndex:
+
+    # Query parameters the answers depend on; others are left out of the response cache key
+    QUERY_PARAMS = ("filter", "n")
+
+    def __init__(self, db_path=RESULTS_DB_FILE, project=proj_dir_path, refresh_interval=RESULTS_API_REFRESH_INTERVAL,
+                 cache_size=RESULTS_API_CACHE_SIZE):
+        self.db_path = db_path
+        self.project = project
+        self.refresh_interval = refresh_interval
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.run = None
+        self.blocks = {}
+        self.status_index = None
+        self.responses = OrderedDict()
+        self.last_check = 0.0
+
+    def refresh(self):
+        # Only one cheap latest-run query per refresh interval; the index is rebuilt when a new run appears or the
+        # latest run's revision changes (results_db.update_run)
+        with self.lock:
+            if time.time() - self.last_check < self.refresh_interval:
+                return
+            self.last_check = time.time()
+            if not os.path.exists(self.db_path):
+                return
+            conn = open_results_db(self.db_path)
+            try:
+                run = conn.execute("SELECT run_id, started, output_file, revision FROM runs WHERE project = ? "
+                                   "ORDER BY run_id DESC LIMIT 1", (self.project,)).fetchone()
+                if run is None or (self.run is not None and (run[0], run[3]) == (self.run["run_id"], self.run["revision"])):
+                    return
+                blocks = {}
+                for block_name, compiler, owner, check_name, status, value, corner, detail in conn.execute(
+                        "SELECT block_name, compiler, owner, check_name, status, worst_value, corner, detail "
+                        "FROM block_results WHERE run_id = ?", (run[0],)):
+                    block = blocks.setdefault(block_name, {"block_name": block_name, "compiler": compiler,
+                                                           "owner": owner, "checks": {}})
+                    block["checks"][check_name] = {"status": status, "value": detail,
+                                                   "worst_value": value, "corner": corner}
+            finally:
+                conn.close()
+            self.run = {"run_id": run[0], "started": run[1], "output_file": run[2], "revision": run[3], "project": self.project}
+            self.blocks = blocks
+            names = sorted(blocks)
+            self.status_index = StatusIndex(
+                names, [blocks[name]["compiler"] for name in names], [blocks[name]["owner"] for name in names],
+                [run[0]] * len(names),
+                [encode_statuses({check: result["status"] for check, result in blocks[name]["checks"].items()})
+                 for name in names])
+            self.responses = OrderedDict()
+
+    def _block_summaries(self, blocks):
+        return [{"block_name": block["block_name"], "compiler": block["compiler"], "owner": block["owner"],
+                 "status": {check: block["checks"][check]["status"] for check in SUMMARY_CHECK_COLUMNS
+                            if check in block["checks"]}}
+                for block in sorted(blocks, key=lambda block: block["block_name"])]
+
+    def query(self, path, params):
+        # Returns (HTTP status, payload)
+        parts = [unquote(part) for part in path.strip("/").split("/") if part]
+        if self.run is None:
+            return 503, {"error": f"No runs recorded for {self.project} in {self.db_path}"}
+        if parts == ["run"]:
+            return 200, self.run
+        if parts == ["blocks"]:
+            if "filter" not in params:
+                return 200, self._block_summaries(self.blocks.values())
+            try:
+                matching = self.status_index.select(params["filter"][0])
+            except ValueError as e:
+                return 400, {"error": str(e)}
+            return 200, self._block_summaries([self.blocks[name] for name in matching])
+        if len(parts) == 2 and parts[0] == "blocks":
+            if parts[1] not in self.blocks:
+                return 404, {"error": f"Unknown block: {parts[1]}"}
+            return 200, self.blocks[parts[1]]
+        if len(parts) == 2 and parts[0] in ("owners", "compilers"):
+            field = "owner" if parts[0] == "owners" else "compiler"
+            return 200, self._block_summaries([block for block in self.blocks.values() if block[field] == parts[1]])
+        if len(parts) == 2 and parts[0] in ("checks", "worst"):
+            check = parts[1]
+            if check not in SUMMARY_CHECK_COLUMNS:
+                return 404, {"error": f"Unknown check: {check}", "checks": SUMMARY_CHECK_COLUMNS}
+            results = [{"block_name": name, **block["checks"][check]}
+                       for name, block in sorted(self.blocks.items()) if check in block["checks"]]
+            if parts[0] == "checks":
+                return 200, results
+            results = [result for result in results if result["worst_value"] is not None]
+            if check in LOWER_IS_WORSE:
+                results.sort(key=lambda result: result["worst_value"])
+            else:
+                results.sort(key=lambda result: abs(result["worst_value"]), reverse=True)
+            try:
+                n = int(params.get("n", ["10"])[0])
+            except ValueError:
+                return 400, {"error": "n must be an integer"}
+            return 200, results[:n]
+        return 404, {"error": f"Unknown path: {path}"}
+
+    def response(self, path, query_string):
+        # Returns (HTTP status, etag, body); bodies are cached per run revision until the next rebuild, keyed by the
+        # path and the parameters the answer depends on, and at most cache_size of them are kept
+        self.refresh()
+        params = {name: values for name, values in parse_qs(query_string).items() if name in self.QUERY_PARAMS}
+        key = (tuple(unquote(part) for part in path.split("/") if part), tuple(sorted((name, tuple(values))
+                                                                                      for name, values in params.items())))
+        with self.lock:
+            cached = self.responses.get(key)
+            if cached is not None:
+                self.responses.move_to_end(key)
+                return cached
+        run = self.run
+        status, payload = self.query(path, params)
+        body = json.dumps(payload, default=str).encode("utf-8")
+        cached = (status, f'"{hashlib.sha1(body).hexdigest()}"', body)
+        # A body built while the index was being rebuilt is not kept for the new revision
+        if status == 200 and self.run is run:
+            with self.lock:
+                self.responses[key] = cached
+                while len(self.responses) > self.cache_size:
+                    self.responses.popitem(last=False)
+        return cached
+
+
+class ResultsRequestHandler(BaseHTTPRequestHandler):
+
+    index = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, etag, body = self.index.response(url.path, url.query)
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Polling dashboards would flood the console
+        pass
+
+
+def serve(host=RESULTS_API_HOST, port=RESULTS_API_PORT, db_path=RESULTS_DB_FILE, project=proj_dir_path):
+
+    ResultsRequestHandler.index = ResultsIndex(db_path, project)
+    server = ThreadingHTTPServer((host, port), ResultsRequestHandler)
+    print(f"    [ Results API on http://{host}:{server.server_address[1]}/ for {project} (Ctrl-C to stop) ]", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n    [ Results API stopped ]", flush=True)
+    finally:
+        server.server_close()
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Serve the latest block summary results over HTTP/JSON")
+    parser.add_argument("--host", default=RESULTS_API_HOST)
+    parser.add_argument("--port", type=int, default=RESULTS_API_PORT)
+    parser.add_argument("--db", default=RESULTS_DB_FILE, help="SQLite history file")
+    parser.add_argument("--project", default=proj_dir_path, help="Project directory the runs were made for")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    serve(args.host, args.port, args.db, args.project)
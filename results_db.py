@@ -0,0 +1,206 @@
+"""
+Results Database Module
+Contains the SQLite result history: every run's per-block, per-check status, worst value and corner,
+indexed for cross-run queries (regressions since the last run, worst value per compiler, ...).
+
+Usage:
+    python results_db.py regressed HOLD
+    python results_db.py worst FMAX --runs 30
+"""
+
+import os
+import sqlite3
+import argparse
+from datetime import datetime
+from config import RESULTS_DB_FILE, SUMMARY_CHECK_COLUMNS, proj_dir_path
+from utils import custom_print
+from summary_values import check_status, worst_measure, row_fingerprint, LOWER_IS_WORSE
+from results_sink import summary_record
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    started     TEXT NOT NULL,
+    project     TEXT NOT NULL,
+    output_file TEXT,
+    revision    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS block_results (
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    block_name  TEXT NOT NULL,
+    compiler    TEXT,
+    owner       TEXT,
+    check_name  TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    worst_value REAL,
+    corner      TEXT,
+    detail      TEXT,
+    PRIMARY KEY (run_id, block_name, check_name)
+);
+CREATE TABLE IF NOT EXISTS block_fingerprints (
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    block_name  TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (run_id, block_name)
+);
+CREATE INDEX IF NOT EXISTS idx_results_block ON block_results(block_name, check_name, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_check ON block_results(check_name, run_id);
+CREATE INDEX IF NOT EXISTS idx_results_run ON block_results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_corner ON block_results(corner, check_name);
+CREATE INDEX IF NOT EXISTS idx_results_compiler ON block_results(compiler, check_name, run_id);
+"""
+
+
+def open_results_db(db_path=RESULTS_DB_FILE):
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    # History files written before runs could be updated in place (update_run) have no revision column
+    if "revision" not in [column[1] for column in conn.execute("PRAGMA table_info(runs)")]:
+        conn.execute("ALTER TABLE runs ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        conn.commit()
+    return conn
+
+
+def _run_rows(run_id, all_output_data, blocks_comp_names, blocks_owners, measures):
+
+    # (block_results rows, block_fingerprints rows) of the given summary rows
+    rows = []
+    fingerprints = []
+    for row in all_output_data:
+        if row == ["Error processing file"]:
+            continue
+        record = summary_record(row, blocks_comp_names, blocks_owners)
+        fingerprints.append((run_id, record["block_name"], row_fingerprint(record["checks"].values())))
+        for check_name in SUMMARY_CHECK_COLUMNS:
+            detail = record["checks"][check_name]
+            value, corner = worst_measure(check_name, measures.get(record["block_name"], {}).get(check_name))
+            rows.append((run_id, record["block_name"], record["compiler"], record["owner"], check_name,
+                         check_status(check_name, detail), value, corner, str(detail)))
+    return rows, fingerprints
+
+
+def record_run(all_output_data, blocks_comp_names, blocks_owners, output_file=None, db_path=RESULTS_DB_FILE, project=proj_dir_path,
+               measures=None):
+
+    # measures: {block_name: {check: [(entry, value, corner)]}} (excel_processor.block_measures) the worst values come from
+    conn = open_results_db(db_path)
+    try:
+        with conn:
+            cursor = conn.execute("INSERT INTO runs (started, project, output_file) VALUES (?, ?, ?)",
+                                  (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), project, output_file))
+            run_id = cursor.lastrowid
+            rows, fingerprints = _run_rows(run_id, all_output_data, blocks_comp_names, blocks_owners, measures or {})
+            conn.executemany("INSERT OR REPLACE INTO block_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO block_fingerprints VALUES (?, ?, ?)", fingerprints)
+        custom_print(f"[CREATED] Recorded run {run_id} ({len(rows)} results) in {db_path}")
+        return run_id
+    finally:
+        conn.close()
+
+
+def update_run(run_id, changed_rows, blocks_comp_names, blocks_owners, db_path=RESULTS_DB_FILE, measures=None):
+
+    # Replaces the stored results of the blocks in changed_rows within an existing run (watch mode keeps the run it
+    # started from current instead of appending a run per change)
+    conn = open_results_db(db_path)
+    try:
+        with conn:
+            rows, fingerprints = _run_rows(run_id, changed_rows, blocks_comp_names, blocks_owners, measures or {})
+            conn.executemany("INSERT OR REPLACE INTO block_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT OR REPLACE INTO block_fingerprints VALUES (?, ?, ?)", fingerprints)
+            # Readers of the latest run (results_api.ResultsIndex) rebuild when its revision changes
+            conn.execute("UPDATE runs SET revision = revision + 1 WHERE run_id = ?", (run_id,))
+        custom_print(f"[INFO] Updated {len(fingerprints)} blocks of run {run_id} in {db_path}")
+    finally:
+        conn.close()
+
+
+def latest_run_id(db_path=RESULTS_DB_FILE, project=proj_dir_path):
+
+    conn = open_results_db(db_path)
+    try:
+        row = conn.execute("SELECT MAX(run_id) FROM runs WHERE project = ?", (project,)).fetchone()
+        return row[0]
+    finally:
+        conn.close()
+
+
+def _worse_expression(check_name, current, previous):
+
+    if check_name in LOWER_IS_WORSE:
+        return f"{current} < {previous}"
+    return f"ABS({current}) > ABS({previous})"
+
+
+def regressed_blocks(check_name, db_path=RESULTS_DB_FILE, project=proj_dir_path):
+
+    # Blocks whose worst value for check_name got worse between the two latest runs of the project
+    conn = open_results_db(db_path)
+    try:
+        run_ids = [run_id for (run_id,) in conn.execute(
+            "SELECT run_id FROM runs WHERE project = ? ORDER BY run_id DESC LIMIT 2", (project,))]
+        if len(run_ids) < 2:
+            return []
+        query = f"""
+            SELECT cur.block_name, prev.worst_value, cur.worst_value, cur.corner
+            FROM block_results AS cur
+            JOIN block_results AS prev
+              ON prev.block_name = cur.block_name AND prev.check_name = cur.check_name AND prev.run_id = ?
+            WHERE cur.run_id = ? AND cur.check_name = ?
+              AND cur.worst_value IS NOT NULL
+              AND (prev.worst_value IS NULL OR {_worse_expression(check_name, 'cur.worst_value', 'prev.worst_value')})
+            ORDER BY cur.block_name
+        """
+        return conn.execute(query, (run_ids[1], run_ids[0], check_name)).fetchall()
+    finally:
+        conn.close()
+
+
+def worst_per_compiler(check_name, runs=30, db_path=RESULTS_DB_FILE, project=proj_dir_path):
+
+    # Worst value of check_name per compiler over the latest `runs` runs of the project
+    conn = open_results_db(db_path)
+    try:
+        if check_name in LOWER_IS_WORSE:
+            worst = "MIN(worst_value)"
+        else:
+            worst = "MAX(ABS(worst_value))"
+        query = f"""
+            SELECT compiler, {worst}, COUNT(DISTINCT block_name)
+            FROM block_results
+            WHERE check_name = ? AND worst_value IS NOT NULL
+              AND run_id IN (SELECT run_id FROM runs WHERE project = ? ORDER BY run_id DESC LIMIT ?)
+            GROUP BY compiler
+            ORDER BY compiler
+        """
+        return conn.execute(query, (check_name, project, runs)).fetchall()
+    finally:
+        conn.close()
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Query the block summary result history")
+    parser.add_argument("--db", default=RESULTS_DB_FILE, help="SQLite history file")
+    parser.add_argument("--project", default=proj_dir_path, help="Project directory the runs were made for")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    regressed = subparsers.add_parser("regressed", help="Blocks whose worst value got worse since the last run")
+    regressed.add_argument("check", choices=SUMMARY_CHECK_COLUMNS)
+    worst = subparsers.add_parser("worst", help="Worst value per compiler over recent runs")
+    worst.add_argument("check", choices=SUMMARY_CHECK_COLUMNS)
+    worst.add_argument("--runs", type=int, default=30)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.path.exists(args.db):
+        print(f"No result history found at {args.db}")
+    elif args.command == "regressed":
+        for block_name, previous, current, corner in regressed_blocks(args.check, args.db, args.project):
+            print(f"{block_name}: {previous} -> {current} ({corner})")
+    else:
+        for compiler, value, blocks in worst_per_compiler(args.check, args.runs, args.db, args.project):
+            print(f"{compiler}: {value} over {blocks} blocks")
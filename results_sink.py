@@ -0,0 +1,76 @@
+"""
+Results Sink Module
+Contains the streaming results sink: every finished block is appended to an NDJSON file straight away
+and a partial block summary workbook is refreshed at a fixed interval while the run continues.
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from config import MAIN_HEADERS, SUB_HEADERS, SUMMARY_CHECK_COLUMNS
+from utils import custom_print
+from excel_processor import create_output_excel
+
+
+def summary_record(row, blocks_comp_names, blocks_owners):
+
+    # row is an all_output_data entry: [block_name, <15 check values>] or ["File Not Found", block_name]
+    if row[0] == "File Not Found":
+        block_name = row[1]
+        values = ["File Not Found"] * len(SUMMARY_CHECK_COLUMNS)
+    else:
+        block_name = row[0]
+        values = list(row[1:1 + len(SUMMARY_CHECK_COLUMNS)])
+        values += ["N/A"] * (len(SUMMARY_CHECK_COLUMNS) - len(values))
+    return {
+        "block_name": block_name,
+        "compiler": blocks_comp_names.get(block_name, "N/A"),
+        "owner": blocks_owners.get(block_name, "N/A"),
+        "checks": dict(zip(SUMMARY_CHECK_COLUMNS, values)),
+    }
+
+
+class ResultsSink:
+
+    def __init__(self, ndjson_file, partial_file, refresh_interval, block_order, blocks_comp_names, blocks_owners):
+        self.ndjson_file = ndjson_file
+        self.partial_file = partial_file
+        self.refresh_interval = refresh_interval
+        self.block_order = {block_name: idx for idx, block_name in enumerate(block_order)}
+        self.blocks_comp_names = blocks_comp_names
+        self.blocks_owners = blocks_owners
+        self.rows = {}
+        self.dirty = False
+        self.last_refresh = time.time()
+        # Each run starts a fresh progress file
+        open(self.ndjson_file, "w").close()
+        custom_print(f"[CREATED] Streaming block results to {self.ndjson_file}")
+
+    def publish(self, block_name, row):
+        self.rows[block_name] = row
+        record = summary_record(row, self.blocks_comp_names, self.blocks_owners)
+        record["completed"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.ndjson_file, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+        self.dirty = True
+        if self.refresh_interval >= 0 and time.time() - self.last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    def refresh(self):
+        if not self.dirty:
+            return
+        ordered_rows = [self.rows[name] for name in sorted(self.rows, key=lambda name: self.block_order.get(name, len(self.block_order)))]
+        # Write next to the target and swap it in, so readers never open a half-written workbook
+        tmp_file = os.path.splitext(self.partial_file)[0] + ".tmp.xlsx"
+        create_output_excel(ordered_rows, SUB_HEADERS, MAIN_HEADERS, self.blocks_comp_names, self.blocks_owners,
+                            output_file=tmp_file)
+        if os.path.exists(tmp_file):
+            os.replace(tmp_file, self.partial_file)
+            custom_print(f"[CREATED] Refreshed partial summary {self.partial_file} ({len(ordered_rows)} blocks)")
+        self.dirty = False
+        self.last_refresh = time.time()
+
+    def close(self):
+        self.refresh()
@@ -0,0 +1,99 @@
+"""
+Run Diff Module
+Contains the run-to-run diff: the current results are compared block by block with a run stored in the
+result history, unchanged rows are skipped by fingerprint, and only the changed cells are reported.
+"""
+
+import json
+import pandas as pd
+from config import RESULTS_DB_FILE, SUMMARY_CHECK_COLUMNS, proj_dir_path
+from utils import custom_print
+from summary_values import check_status, row_fingerprint
+from results_sink import summary_record
+from results_db import open_results_db, latest_run_id
+
+
+DELTA_HEADERS = ["Block Name", "Check", "Old Value", "New Value", "Old Status", "New Status"]
+
+
+def resolve_run_id(run_ref, db_path=RESULTS_DB_FILE, project=proj_dir_path):
+
+    # run_ref is a run id from the history, or "last" for the latest stored run
+    if str(run_ref).lower() == "last":
+        return latest_run_id(db_path, project)
+    return int(run_ref)
+
+
+def load_stored_run(run_id, db_path=RESULTS_DB_FILE):
+
+    # Returns ({block: fingerprint}, {block: {check: detail}}) for a stored run
+    conn = open_results_db(db_path)
+    try:
+        fingerprints = dict(conn.execute(
+            "SELECT block_name, fingerprint FROM block_fingerprints WHERE run_id = ?", (run_id,)))
+        details = {}
+        for block_name, check_name, detail in conn.execute(
+                "SELECT block_name, check_name, detail FROM block_results WHERE run_id = ?", (run_id,)):
+            details.setdefault(block_name, {})[check_name] = detail
+        return fingerprints, details
+    finally:
+        conn.close()
+
+
+def diff_against_run(all_output_data, blocks_comp_names, blocks_owners, run_id, db_path=RESULTS_DB_FILE):
+
+    old_fingerprints, old_details = load_stored_run(run_id, db_path)
+    changes = []
+    unchanged = 0
+    current_blocks = set()
+    for row in all_output_data:
+        if row == ["Error processing file"]:
+            continue
+        record = summary_record(row, blocks_comp_names, blocks_owners)
+        block_name = record["block_name"]
+        current_blocks.add(block_name)
+        new_checks = {check: str(value) for check, value in record["checks"].items()}
+        if old_fingerprints.get(block_name) == row_fingerprint(new_checks.values()):
+            unchanged += 1
+            continue
+        old_checks = old_details.get(block_name, {})
+        for check in SUMMARY_CHECK_COLUMNS:
+            old_value = old_checks.get(check)
+            if old_value != new_checks[check]:
+                changes.append([block_name, check, old_value, new_checks[check],
+                                check_status(check, old_value) if old_value is not None else None,
+                                check_status(check, new_checks[check])])
+
+    # Blocks that were in the stored run but are gone from this one
+    for block_name in sorted(set(old_details) - current_blocks):
+        for check in SUMMARY_CHECK_COLUMNS:
+            old_value = old_details[block_name].get(check)
+            changes.append([block_name, check, old_value, None, check_status(check, old_value), None])
+
+    custom_print(f"[INFO] Diff against run {run_id}: {unchanged} unchanged blocks, {len(changes)} changed cells")
+    return changes
+
+
+def write_delta_report(changes, run_id, xlsx_file, json_file):
+
+    delta_df = pd.DataFrame(changes, columns=DELTA_HEADERS)
+    with pd.ExcelWriter(xlsx_file, engine="xlsxwriter") as writer:
+        delta_df.to_excel(writer, sheet_name="Delta", index=False)
+        workbook = writer.book
+        worksheet = writer.sheets["Delta"]
+        header_format = workbook.add_format({"bold": True, "align": "center", "valign": "vcenter", "border": 2, "bg_color": "#6EACDA", "text_wrap": True})
+        cell_format = workbook.add_format({"valign": "vcenter", "border": 1, "text_wrap": True})
+        for col_num, header in enumerate(DELTA_HEADERS):
+            worksheet.write(0, col_num, header, header_format)
+        worksheet.set_column(0, 1, 18, cell_format)
+        worksheet.set_column(2, 3, 60, cell_format)
+        worksheet.set_column(4, 5, 15, cell_format)
+        worksheet.freeze_panes(1, 2)
+        if changes:
+            worksheet.autofilter(0, 0, len(changes), len(DELTA_HEADERS) - 1)
+
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump({"against_run": run_id,
+                   "changes": [dict(zip(DELTA_HEADERS, change)) for change in changes]},
+                  f, indent=4, ensure_ascii=False)
+    custom_print(f"[CREATED] Saved delta report to {xlsx_file} and {json_file}")
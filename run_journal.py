@@ -0,0 +1,84 @@
+"""
+Run Journal Module
+Contains the per-block checkpoint journal used to resume an interrupted summary run
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from config import RUN_JOURNAL_DIR
+from utils import custom_print
+
+
+def _entry_path(journal_dir, block_name):
+
+    return os.path.join(journal_dir, f"{block_name}.json")
+
+
+def _workbook_stamp(excel_file):
+
+    # A checkpoint is only replayed while its workbook is unchanged
+    if not os.path.exists(excel_file):
+        return None
+    stat = os.stat(excel_file)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _selection_stamp(selected):
+
+    # Checks a row was computed with (see checks.select_checks); None for a full run
+    return None if selected is None else sorted(selected)
+
+
+def start_journal(journal_dir=RUN_JOURNAL_DIR, resume=False):
+
+    if not resume and os.path.isdir(journal_dir):
+        shutil.rmtree(journal_dir)
+        custom_print(f"[INFO] Cleared previous run journal: {journal_dir}")
+    os.makedirs(journal_dir, exist_ok=True)
+
+
+def checkpoint_block(block_name, excel_file, row, journal_dir=RUN_JOURNAL_DIR, selected=None):
+
+    entry = {"block_name": block_name, "excel_file": excel_file, "workbook": _workbook_stamp(excel_file),
+             "selected": _selection_stamp(selected), "row": row}
+    # Write to a temp file in the same directory, fsync, then rename over the entry: readers see
+    # either the previous checkpoint or the complete new one, never a torn file
+    fd, tmp_path = tempfile.mkstemp(dir=journal_dir, prefix=f".{block_name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, _entry_path(journal_dir, block_name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_journal(excel_files_by_block, journal_dir=RUN_JOURNAL_DIR, selected=None):
+
+    # Returns {block_name: row} for every checkpoint that still matches its workbook and was computed with the
+    # same check selection as this run
+    replayed = {}
+    for block_name, excel_file in excel_files_by_block.items():
+        path = _entry_path(journal_dir, block_name)
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            custom_print(f"[WARNING] Ignoring unreadable checkpoint {path}: {e}")
+            continue
+        if entry.get("workbook") != _workbook_stamp(excel_file):
+            custom_print(f"[INFO] Workbook changed since checkpoint, reprocessing: {excel_file}")
+            continue
+        if entry.get("selected") != _selection_stamp(selected):
+            custom_print(f"[INFO] Checkpoint was computed with other checks selected, reprocessing: {excel_file}")
+            continue
+        replayed[block_name] = entry["row"]
+    custom_print(f"[INFO] Replayed {len(replayed)} checkpointed blocks from {journal_dir}")
+    return replayed
@@ -0,0 +1,128 @@
+"""
+Run Outputs Module
+Contains the post-processing shared by a batch run, watch mode and the summary daemon: the summary
+workbook, the delta report, the results history, the cube, the hierarchy roll-up, the status index
+and the filtered workbook are all written from one set of summary rows.
+"""
+
+import os
+from config import (
+    MAIN_HEADERS,
+    SUB_HEADERS,
+    Output_xls_name,
+    RESULTS_DB_ENABLE,
+    RESULTS_DB_FILE,
+    DELTA_XLSX_FILE,
+    DELTA_JSON_FILE,
+    CUBE_ENABLE,
+    STATUS_INDEX_FILE,
+    FILTERED_XLSX_FILE
+)
+from utils import custom_print
+from excel_processor import create_output_excel, block_measures
+from results_sink import summary_record
+from results_db import record_run, update_run
+from run_diff import resolve_run_id, diff_against_run, write_delta_report
+from cube import build_cube
+from status_index import StatusIndex, filter_rows
+from hierarchy import build_hierarchy
+
+
+class RunOutputs:
+
+    def __init__(self, block_info_sorted, blocks_comp_names, blocks_owners, output_file=Output_xls_name, selected=None,
+                 diff_against=None, status_filter=None, record=True, rollups=True):
+        # selected: the checks that were run (None for all); record: store the run in the results history;
+        # rollups: rewrite the project-wide cube, hierarchy and status index (off for a subset of the blocks)
+        self.block_info_sorted = block_info_sorted
+        self.blocks_comp_names = blocks_comp_names
+        self.blocks_owners = blocks_owners
+        self.output_file = output_file
+        self.selected = selected
+        self.diff_against = diff_against
+        self.status_filter = status_filter
+        self.record = record
+        self.rollups = rollups
+        self.run_id = None
+        self.against_run_id = None
+        self.hierarchy = None
+        self.publishes = 0
+
+    @property
+    def full_run(self):
+        return self.selected is None
+
+    def publish(self, all_output_data, changed=None):
+        # changed: the blocks re-summarized since the last publish (None: every row is new); returns the run id
+        first = self.publishes == 0
+        self.publishes += 1
+        block_names = [block["block_name"] for block in self.block_info_sorted]
+        changed_rows = all_output_data if changed is None else \
+            [row for block_name, row in zip(block_names, all_output_data) if block_name in changed]
+
+        # Write the summary next to the target and swap it in, so readers never see a half-written workbook
+        tmp_file = os.path.splitext(self.output_file)[0] + ".tmp.xlsx"
+        create_output_excel(all_output_data, SUB_HEADERS, MAIN_HEADERS, self.blocks_comp_names, self.blocks_owners,
+                            output_file=tmp_file)
+        os.replace(tmp_file, self.output_file)
+
+        # Runs of selected checks (--only / --skip) are not recorded: the history, the cube, the hierarchy and the
+        # status index keep describing the last full run, and the delta report would only list "skipped" cells
+        if first and not self.full_run:
+            print("\033[31mNOTE\033[0m: Only some checks were run; results history, cube, hierarchy and status index "
+                  "left unchanged.", flush=True)
+
+        # Report only the cells that changed since the stored run; it is resolved before this run is recorded
+        if self.diff_against is not None and not self.full_run:
+            if first:
+                print("\033[31mNOTE\033[0m: Delta report skipped for a run of selected checks.", flush=True)
+        elif self.diff_against is not None:
+            if first:
+                self.against_run_id = resolve_run_id(self.diff_against) if os.path.exists(RESULTS_DB_FILE) else None
+            if self.against_run_id is None:
+                if first:
+                    print(f"\033[31mNOTE\033[0m: No stored run '{self.diff_against}' in {RESULTS_DB_FILE}; delta report skipped.",
+                          flush=True)
+            else:
+                changes = diff_against_run(all_output_data, self.blocks_comp_names, self.blocks_owners, self.against_run_id)
+                write_delta_report(changes, self.against_run_id, DELTA_XLSX_FILE, DELTA_JSON_FILE)
+                print(f"Delta against run {self.against_run_id}: {len(changes)} changed cells -> '{DELTA_XLSX_FILE}'", flush=True)
+
+        if self.full_run:
+            measures = block_measures(block_names if first or changed is None else changed)
+
+            # Keep the run's results in the history database; later publishes replace the changed blocks in place
+            if RESULTS_DB_ENABLE and self.record:
+                if self.run_id is None:
+                    self.run_id = record_run(all_output_data, self.blocks_comp_names, self.blocks_owners,
+                                             output_file=self.output_file, measures=measures)
+                elif changed_rows:
+                    update_run(self.run_id, changed_rows, self.blocks_comp_names, self.blocks_owners, measures=measures)
+
+            if self.rollups:
+                # Assemble the per-corner numbers of every block for project-wide roll-ups
+                if CUBE_ENABLE:
+                    build_cube(self.block_info_sorted)
+
+                # Worst-case roll-up of sub-block and block results; only the changed blocks' ancestors are updated
+                if first or changed is None:
+                    self.hierarchy = build_hierarchy(self.block_info_sorted, all_output_data, measures)
+                else:
+                    for row in changed_rows:
+                        if row == ["Error processing file"]:
+                            continue
+                        self.hierarchy.update_block(row, measures.get(summary_record(row, {}, {})["block_name"]))
+                self.hierarchy.save()
+
+                # Per-block status bitmasks for fast filtering
+                StatusIndex.from_rows(all_output_data, self.blocks_comp_names, self.blocks_owners).save(STATUS_INDEX_FILE)
+
+        # --filter also writes the matching rows
+        if self.status_filter is not None:
+            filtered_rows = filter_rows(all_output_data, self.blocks_comp_names, self.blocks_owners, self.status_filter)
+            create_output_excel(filtered_rows, SUB_HEADERS, MAIN_HEADERS, self.blocks_comp_names, self.blocks_owners,
+                                output_file=FILTERED_XLSX_FILE)
+            print(f"Filter '{self.status_filter}': {len(filtered_rows)} blocks -> '{FILTERED_XLSX_FILE}'", flush=True)
+
+        custom_print(f"[INFO] Published {len(changed_rows)} changed rows -> '{self.output_file}'")
+        return self.run_id
@@ -0,0 +1,173 @@
+"""
+Scheduler Module
+Contains the makespan-aware block scheduler: per-block cost estimates from workbook size, sheet
+dimensions, artifact sizes and the runtimes recorded in earlier runs, longest-processing-time-first
+dispatch order, and the predicted-versus-actual runtime report.
+"""
+
+import os
+import re
+import glob
+import json
+import zipfile
+from config import RUNTIME_HISTORY_FILE
+from utils import custom_print, block_name_from_excel
+from checks import ARTIFACTS
+
+
+# Weights turning raw workbook/artifact features into work units
+CELL_WEIGHT = 1.0
+WORKBOOK_KB_WEIGHT = 0.1
+ARTIFACT_KB_WEIGHT = 0.01
+DEFAULT_SECONDS_PER_UNIT = 1e-4
+
+_DIMENSION_RE = re.compile(rb'<dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+
+
+def _column_number(letters):
+
+    number = 0
+    for char in letters:
+        number = number * 26 + (char - ord("A") + 1)
+    return number
+
+
+def workbook_cell_count(excel_file):
+
+    # Reads only the <dimension> element at the top of each sheet part, not the sheet itself
+    cells = 0
+    try:
+        with zipfile.ZipFile(excel_file) as archive:
+            for part in archive.namelist():
+                if not (part.startswith("xl/worksheets/") and part.endswith(".xml")):
+                    continue
+                with archive.open(part) as f:
+                    match = _DIMENSION_RE.search(f.read(4096))
+                if not match:
+                    continue
+                first_col, first_row, last_col, last_row = match.groups()
+                last_col = last_col or first_col
+                last_row = last_row or first_row
+                rows = int(last_row) - int(first_row) + 1
+                cols = _column_number(last_col) - _column_number(first_col) + 1
+                cells += rows * cols
+    except (OSError, zipfile.BadZipFile) as e:
+        custom_print(f"[WARNING] Could not read sheet dimensions from {excel_file}: {e}")
+    return cells
+
+
+def artifact_bytes(block_name, proj_dir_path):
+
+    # Sizes of the block's report inputs, located through the check registry
+    paths = []
+    for artifact in ARTIFACTS.values():
+        path = os.path.join(proj_dir_path, artifact.template.format(block=block_name))
+        paths += glob.glob(path) if artifact.is_glob else [path]
+    return sum(os.path.getsize(path) for path in paths if os.path.isfile(path))
+
+
+def load_runtime_history(history_file=RUNTIME_HISTORY_FILE):
+
+    if not os.path.exists(history_file):
+        return {}
+    try:
+        with open(history_file, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        custom_print(f"[WARNING] Ignoring unreadable runtime history {history_file}: {e}")
+        return {}
+
+
+def save_runtime_history(history, history_file=RUNTIME_HISTORY_FILE):
+
+    tmp_file = history_file + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(history, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, history_file)
+
+
+def history_key(proj_dir_path, block_name):
+
+    # Block names are only unique within a project, so the history is keyed by both
+    return f"{os.path.normpath(proj_dir_path)}::{block_name}"
+
+
+def estimate_block_costs(excel_files, proj_dir_path, history=None):
+
+    # Returns {excel_file: (predicted_seconds, work_units)}
+    history = load_runtime_history() if history is None else history
+    units = {}
+    for excel_file in excel_files:
+        block_name = block_name_from_excel(excel_file)
+        workbook_kb = os.path.getsize(excel_file) / 1024 if os.path.exists(excel_file) else 0
+        units[excel_file] = (CELL_WEIGHT * workbook_cell_count(excel_file)
+                             + WORKBOOK_KB_WEIGHT * workbook_kb
+                             + ARTIFACT_KB_WEIGHT * artifact_bytes(block_name, proj_dir_path) / 1024)
+
+    # Calibrate seconds per work unit from blocks that have both a recorded runtime and estimate
+    ratios = sorted(entry["seconds"] / entry["units"] for entry in history.values()
+                    if entry.get("units") and entry.get("seconds") is not None)
+    seconds_per_unit = ratios[len(ratios) // 2] if ratios else DEFAULT_SECONDS_PER_UNIT
+
+    costs = {}
+    for excel_file, work_units in units.items():
+        recorded = history.get(history_key(proj_dir_path, block_name_from_excel(excel_file)), {})
+        if recorded.get("seconds") is not None:
+            predicted = recorded["seconds"]
+        else:
+            predicted = work_units * seconds_per_unit
+        costs[excel_file] = (predicted, work_units)
+    return costs
+
+
+def lpt_order(excel_files, costs):
+
+    # Longest processing time first; ties keep their canonical order (sorted() is stable)
+    return sorted(excel_files, key=lambda excel_file: -costs[excel_file][0])
+
+
+def record_block_runtimes(costs, timings, proj_dir_path, history_file=RUNTIME_HISTORY_FILE):
+
+    # costs / timings are keyed by the excel_file of one project's blocks
+    history = load_runtime_history(history_file)
+    for excel_file, seconds in timings.items():
+        predicted, work_units = costs.get(excel_file, (None, None))
+        block_name = block_name_from_excel(excel_file)
+        if predicted is not None:
+            custom_print(f"[INFO] Runtime for {block_name}: predicted {predicted:.2f}s, actual {seconds:.2f}s")
+        history[history_key(proj_dir_path, block_name)] = {"seconds": round(seconds, 3), "units": work_units}
+    save_runtime_history(history, history_file)
+    custom_print(f"[CREATED] Saved block runtime history to {history_file}")
+
+
+def lpt_makespan(seconds, workers=1):
+
+    # Makespan of the given block times dispatched longest-first to `workers` parallel workers
+    loads = [0.0] * max(workers, 1)
+    for value in sorted(seconds, reverse=True):
+        loads[loads.index(min(loads))] += value
+    return max(loads)
+
+
+def runtime_report(costs, timings, makespan, workers=1):
+
+    # The worst-predicted block and the run's makespan against the one predicted for its blocks; empty when no
+    # timed block had a prediction. costs / timings are keyed by excel_file, or by (project, excel_file) in a batch
+    predicted = {key: costs[key][0] for key in timings if key in costs}
+    if not predicted:
+        return {}
+    worst = max(predicted, key=lambda key: abs(timings[key] - predicted[key]))
+    return {
+        "worst": (block_name_from_excel(worst[1] if isinstance(worst, tuple) else worst), predicted[worst], timings[worst]),
+        "makespan": makespan,
+        "predicted_makespan": lpt_makespan(predicted.values(), workers),
+    }
+
+
+def format_runtime_report(report):
+
+    if not report:
+        return "no block runtimes predicted"
+    block_name, predicted, actual = report["worst"]
+    return (f"makespan {report['makespan']:.2f}s against {report['predicted_makespan']:.2f}s predicted; "
+            f"worst block {block_name} took {actual:.2f}s against {predicted:.2f}s predicted")
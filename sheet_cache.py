@@ -0,0 +1,145 @@
+"""
+Sheet Cache Module
+Contains the per-sheet change detection: every sheet of a block workbook is fingerprinted from its XML part
+inside the xlsx zip (plus the shared strings it references), and each check's result is stored with the
+fingerprints of the sheets it reads. A check is only recomputed when one of its sheets changed.
+"""
+
+import os
+import re
+import json
+import hashlib
+import zipfile
+import posixpath
+import config
+from utils import custom_print
+from checks import CHECKS, FIRST_SHEET
+
+
+SHEET_CACHE_FILE = "sheet_cache.json"
+# Version 2: a cached result is only reused with the measures stored next to it (analysis_inputs "measures")
+# Version 3: results from before the analysis inputs' version 2 are recomputed, so their stored inputs are rewritten
+SHEET_CACHE_VERSION = 3
+
+# Sheets each summary check reads, as declared in the check registry
+CHECK_SHEETS = {check.name: check.sheets for check in CHECKS if check.sheets}
+
+_SHEET_RE = re.compile(rb'<sheet\b[^>]*?\bname="([^"]*)"[^>]*?\br:id="([^"]*)"')
+_REL_RE = re.compile(rb'<Relationship\b[^>]*?\bId="([^"]*)"[^>]*?\bTarget="([^"]*)"')
+_REL_RE_TARGET_FIRST = re.compile(rb'<Relationship\b[^>]*?\bTarget="([^"]*)"[^>]*?\bId="([^"]*)"')
+_SHARED_STRING_RE = re.compile(rb"<si>(.*?)</si>", re.S)
+_SHARED_REF_RE = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>(?:<f\b[^>]*(?:/>|>.*?</f>))?<v>(\d+)</v>', re.S)
+
+
+def _unescape_name(name):
+
+    return (name.replace(b"&lt;", b"<").replace(b"&gt;", b">").replace(b"&quot;", b'"')
+                .replace(b"&apos;", b"'").replace(b"&amp;", b"&").decode("utf-8"))
+
+
+def _inline_shared(match, shared_strings):
+
+    position = int(match.group(1))
+    text = shared_strings[position] if position < len(shared_strings) else b""
+    cell = match.group(0)
+    start, end = match.start(1) - match.start(0), match.end(1) - match.start(0)
+    return cell[:start] + b"\x1f" + text + b"\x1f" + cell[end:]
+
+
+def sheet_fingerprints(excel_file):
+
+    # Returns ([sheet names in workbook order], {sheet name: fingerprint}), or (None, None) if unreadable
+    try:
+        with zipfile.ZipFile(excel_file) as archive:
+            workbook = archive.read("xl/workbook.xml")
+            rels_xml = archive.read("xl/_rels/workbook.xml.rels")
+            rels = dict(_REL_RE.findall(rels_xml))
+            rels.update((rel_id, target) for target, rel_id in _REL_RE_TARGET_FIRST.findall(rels_xml))
+            names = set(archive.namelist())
+            shared_strings = []
+            if "xl/sharedStrings.xml" in names:
+                shared_strings = _SHARED_STRING_RE.findall(archive.read("xl/sharedStrings.xml"))
+
+            sheet_names = []
+            fingerprints = {}
+            for raw_name, rel_id in _SHEET_RE.findall(workbook):
+                sheet_name = _unescape_name(raw_name)
+                target = rels[rel_id].decode("utf-8")
+                part = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                sheet_xml = archive.read(part)
+                # Cell text lives in sharedStrings.xml; hash the sheet with each string index replaced by the
+                # string itself, so an edit elsewhere in the workbook that renumbers them is no change here
+                sheet_xml = _SHARED_REF_RE.sub(lambda match: _inline_shared(match, shared_strings), sheet_xml)
+                sheet_names.append(sheet_name)
+                fingerprints[sheet_name] = hashlib.sha1(sheet_xml).hexdigest()
+            return sheet_names, fingerprints
+    except (OSError, KeyError, IndexError, zipfile.BadZipFile) as e:
+        custom_print(f"[WARNING] Could not fingerprint sheets of {excel_file}: {e}")
+        return None, None
+
+
+def _settings_key():
+
+    # Cached results are only valid for the reporting settings they were produced with
+    return [SHEET_CACHE_VERSION, config.DETAILED_INFO, config.FMAX_HIGHEST_ONLY, config.TCQ_HIGHEST_ONLY,
+            config.MPW_HIGHEST_ONLY, config.DRV_HIGHEST_ONLY]
+
+
+class SheetResultCache:
+
+    def __init__(self, excel_file, output_dir):
+        self.excel_file = excel_file
+        self.path = os.path.join(output_dir, SHEET_CACHE_FILE)
+        self.sheet_names, self.fingerprints = sheet_fingerprints(excel_file)
+        self.settings = _settings_key()
+        self.checks = {}
+        self.hits = []
+        self.misses = []
+        if self.fingerprints is not None and os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    stored = json.load(f)
+                if stored.get("settings") == self.settings:
+                    self.checks = stored.get("checks", {})
+            except (OSError, ValueError) as e:
+                custom_print(f"[WARNING] Ignoring unreadable sheet cache {self.path}: {e}")
+
+    def _check_key(self, check):
+        sheets = [self.sheet_names[0] if sheet == FIRST_SHEET and self.sheet_names else sheet
+                  for sheet in CHECK_SHEETS[check]]
+        return {sheet: self.fingerprints.get(sheet) for sheet in sheets}
+
+    def is_fresh(self, check):
+        if self.fingerprints is None:
+            return False
+        entry = self.checks.get(check)
+        return entry is not None and entry["sheets"] == self._check_key(check)
+
+    def stale_sheets(self, selected=None):
+        # Sheets some (selected) check still has to read; None means every sheet
+        if self.fingerprints is None:
+            return None
+        stale = set()
+        for check in CHECK_SHEETS:
+            if (selected is None or check in selected) and not self.is_fresh(check):
+                stale.update(sheet for sheet in self._check_key(check) if sheet in self.fingerprints)
+        return stale
+
+    def result(self, check, compute):
+        if self.is_fresh(check):
+            self.hits.append(check)
+            return self.checks[check]["value"]
+        value = compute()
+        self.misses.append(check)
+        if self.fingerprints is not None:
+            self.checks[check] = {"sheets": self._check_key(check), "value": value}
+        return value
+
+    def save(self):
+        if self.fingerprints is None or not self.misses:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"settings": self.settings, "checks": self.checks}, f, default=str)
+        os.replace(tmp_path, self.path)
+        custom_print(f"[INFO] Sheet cache for {self.excel_file}: reused {sorted(set(self.hits))}, recomputed {sorted(set(self.misses))}")
@@ -0,0 +1,142 @@
+"""
+Sheet Loader Module
+Contains the pre-parsed workbook used when sheets are decoded ahead of analysis (see pipeline.py), and the
+projected sheet decoding both paths share: a check declares the columns and corner prefixes it reads from a
+sheet, only those columns are handed to the pandas parser and only the kept rows are returned.
+"""
+
+import pandas as pd
+from config import SHEET_PROJECTION_ENABLE
+from utils import custom_print
+
+
+# Placeholder for the workbook's first sheet (the Dashboard sheet the PNR status columns are read from)
+FIRST_SHEET = "<first sheet>"
+
+# Header row used when each sheet is decoded; sheets not listed are read with header=0
+SHEET_HEADER_MODES = {
+    "MIN_PULSE_WIDTH": None,
+}
+
+# Sheet name -> SheetProjection, declared by the checks that read the sheet (see declare_projection)
+SHEET_PROJECTIONS = {}
+
+
+class SheetProjection:
+
+    # columns: positions to keep, or a callable mapping the header row (cell values, "" when empty) to them
+    #     (None keeps every column).
+    # row_prefixes: keep only data rows whose first cell is a string starting with one of these.
+    def __init__(self, columns=None, row_prefixes=None):
+        self.columns = columns
+        self.row_prefixes = tuple(row_prefixes) if row_prefixes else None
+
+    def positions(self, header):
+        if self.columns is None:
+            return None
+        columns = self.columns(header) if callable(self.columns) else self.columns
+        return sorted(set(columns))
+
+    def row_filter(self):
+        # Compiled once per sheet: the verdict for each distinct corner name is computed a single time
+        if self.row_prefixes is None:
+            return None
+        prefixes = self.row_prefixes
+        verdicts = {}
+
+        def keep(value):
+            if not isinstance(value, str):
+                return False
+            verdict = verdicts.get(value)
+            if verdict is None:
+                verdict = verdicts[value] = value.startswith(prefixes)
+            return verdict
+
+        return keep
+
+
+def declare_projection(sheet_name, projection):
+
+    SHEET_PROJECTIONS[sheet_name] = projection
+
+
+def _header_row(worksheet):
+
+    # First row's cell values as the parser sees them: empty cells read "" and whole numbers are ints
+    if worksheet.parent.read_only:
+        # Dimensions recorded in the file can be wrong; read the row as it is
+        worksheet.reset_dimensions()
+    for row in worksheet.iter_rows(min_row=1, max_row=1, values_only=True):
+        header = ["" if value is None else value for value in row]
+        while header and header[-1] == "":
+            header.pop()
+        return [int(value) if isinstance(value, float) and value.is_integer() else value for value in header]
+    return []
+
+
+def read_projected_sheet(xls, sheet_name, projection):
+
+    # Equivalent to parse(header=0) followed by the projection: the parser only gets the kept columns (usecols),
+    # so each keeps the name and dtype the full sheet gives it, and the kept rows are selected from its result
+    positions = projection.positions(_header_row(xls.book[sheet_name]))
+    usecols = None
+    if positions is not None:
+        names = list(pd.ExcelFile.parse(xls, sheet_name, header=0, nrows=0).columns)
+        # Columns past the header row are named as the parser names them
+        kept = {names[position] if position < len(names) else f"Unnamed: {position}" for position in positions}
+        if projection.row_prefixes is not None and names:
+            kept.add(names[0])
+        usecols = lambda name: name in kept
+    df = pd.ExcelFile.parse(xls, sheet_name, header=0, usecols=usecols)
+    keep_row = projection.row_filter()
+    if keep_row is not None and df.shape[1]:
+        df = df[df.iloc[:, 0].map(keep_row).to_numpy(dtype=bool)].reset_index(drop=True)
+        if positions is not None and 0 not in positions:
+            df = df.iloc[:, 1:]
+    return df
+
+
+class ProjectedExcelFile(pd.ExcelFile):
+
+    # pd.ExcelFile whose parse() applies the declared projection of a sheet read with the default header row
+    def parse(self, sheet_name=0, header=0, **kwargs):
+        projection = SHEET_PROJECTIONS.get(sheet_name) if SHEET_PROJECTION_ENABLE else None
+        if projection is None or header != 0 or kwargs or self.engine != "openpyxl":
+            return super().parse(sheet_name, header=header, **kwargs)
+        return read_projected_sheet(self, sheet_name, projection)
+
+
+def load_workbook_sheets(excel_file, only=None):
+
+    # Decode every sheet (or only the sheets in `only`) once, with the header mode the checks read it with
+    # (FIRST_SHEET in `only` stands for the workbook's first sheet)
+    sheets = {}
+    with ProjectedExcelFile(excel_file) as xls:
+        for idx, sheet_name in enumerate(xls.sheet_names):
+            if only is not None and sheet_name not in only and not (idx == 0 and FIRST_SHEET in only):
+                continue
+            header = SHEET_HEADER_MODES.get(sheet_name, 0)
+            sheets[sheet_name] = (header, xls.parse(sheet_name, header=header))
+    custom_print(f"[INFO] Decoded {len(sheets)} sheets from {excel_file}")
+    return sheets
+
+
+class ParsedWorkbook:
+
+    # Stands in for pd.ExcelFile: exposes sheet_names and parse() over already-decoded sheets.
+    # sheet_names lists every sheet of the workbook, also the ones left undecoded.
+    def __init__(self, excel_file, sheets, sheet_names=None):
+        self.excel_file = excel_file
+        self._sheets = sheets
+        self.sheet_names = list(sheets) if sheet_names is None else list(sheet_names)
+
+    def parse(self, sheet_name, header=0):
+        if sheet_name not in self._sheets:
+            if sheet_name in self.sheet_names:
+                raise ValueError(f"Worksheet '{sheet_name}' was not decoded")
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        loaded_header, df = self._sheets[sheet_name]
+        if loaded_header != header:
+            raise ValueError(f"Sheet '{sheet_name}' was decoded with header={loaded_header}, not header={header}")
+        # Callers modify the frames they get back, so always hand out a copy
+        return df.copy()
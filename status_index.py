@@ -0,0 +1,201 @@
+"""
+Status Index Module
+Contains the status bitmask index: each block's per-check status (CLEAN / NOT CLEAN / N/A / FILE NOT FOUND for
+every summary column) is packed into one fixed-width integer, kept in a NumPy array beside the results, so
+filters such as "HOLD and DRV both dirty" or "clean on everything except LVS" are a few vectorized integer
+operations over any number of block-runs.
+
+Filter expressions are comma-separated terms, all of which must hold:
+    HOLD=NOT CLEAN,DRV=NOT CLEAN        HOLD and DRV both dirty
+    *=CLEAN,LVS!=CLEAN                  clean on everything except LVS (* is every column not named elsewhere)
+    FMAX=NOT CLEAN|N/A                  either status
+
+Usage:
+    python status_index.py "*=CLEAN,LVS!=CLEAN"             # latest run's status index
+    python status_index.py "HOLD=NOT CLEAN" --history       # every block-run in the results history
+"""
+
+import os
+import sys
+import argparse
+import builtins
+import numpy as np
+from config import SUMMARY_CHECK_COLUMNS, STATUS_INDEX_FILE, RESULTS_DB_FILE, proj_dir_path
+from utils import toggle_print, custom_print
+from summary_values import check_status, STATUSES, STATUS_NA
+from results_sink import summary_record
+from results_db import open_results_db
+
+
+# Two bits per summary column: the column's status is STATUSES[(bits >> 2 * column) & 3]
+STATUS_BITS = 2
+STATUS_MASK = (1 << STATUS_BITS) - 1
+COLUMN_SHIFTS = {check: STATUS_BITS * idx for idx, check in enumerate(SUMMARY_CHECK_COLUMNS)}
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+def encode_statuses(statuses):
+
+    # statuses is {check: status}; columns left out count as N/A
+    bits = 0
+    for check, shift in COLUMN_SHIFTS.items():
+        bits |= STATUS_CODES[statuses.get(check, STATUS_NA)] << shift
+    return bits
+
+
+def row_bits(row):
+
+    record = summary_record(row, {}, {})
+    return encode_statuses({check: check_status(check, value) for check, value in record["checks"].items()})
+
+
+def parse_filter(expression):
+
+    # Returns [(check, allowed status codes, negated)]; raises ValueError on an unknown check or status
+    terms = []
+    named = set()
+    for term in [term.strip() for term in expression.split(",") if term.strip()]:
+        negated = "!=" in term
+        check, _, statuses = term.partition("!=" if negated else "=")
+        check = check.strip()
+        if check != "*" and check not in COLUMN_SHIFTS:
+            raise ValueError(f"Unknown check '{check}'; expected one of {SUMMARY_CHECK_COLUMNS} or *")
+        codes = []
+        for status in statuses.split("|"):
+            status = status.strip().upper()
+            if status not in STATUS_CODES:
+                raise ValueError(f"Unknown status '{status}'; expected one of {STATUSES}")
+            codes.append(STATUS_CODES[status])
+        terms.append((check, codes, negated))
+        named.add(check)
+    expanded = []
+    for check, codes, negated in terms:
+        if check == "*":
+            expanded.extend((other, codes, negated) for other in SUMMARY_CHECK_COLUMNS if other not in named)
+        else:
+            expanded.append((check, codes, negated))
+    return expanded
+
+
+class StatusIndex:
+
+    def __init__(self, block_names, compilers, owners, run_ids, bits):
+        self.block_names = np.asarray(block_names, dtype=object)
+        self.compilers = np.asarray(compilers, dtype=object)
+        self.owners = np.asarray(owners, dtype=object)
+        self.run_ids = np.asarray(run_ids, dtype=np.int64)
+        self.bits = np.asarray(bits, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.bits)
+
+    @classmethod
+    def from_rows(cls, all_output_data, blocks_comp_names, blocks_owners, run_id=0):
+        rows = [row for row in all_output_data if row != ["Error processing file"]]
+        block_names = [summary_record(row, {}, {})["block_name"] for row in rows]
+        return cls(block_names, [blocks_comp_names.get(name, "N/A") for name in block_names],
+                   [blocks_owners.get(name, "N/A") for name in block_names], [run_id] * len(rows),
+                   [row_bits(row) for row in rows])
+
+    @classmethod
+    def from_history(cls, db_path=RESULTS_DB_FILE, project=proj_dir_path):
+        # One entry per stored block-run, packed straight from the status column of the history
+        conn = open_results_db(db_path)
+        try:
+            rows = conn.execute(
+                "SELECT r.run_id, r.block_name, r.compiler, r.owner, r.check_name, r.status FROM block_results r "
+                "JOIN runs ON runs.run_id = r.run_id WHERE runs.project = ? ORDER BY r.run_id, r.block_name",
+                (project,)).fetchall()
+        finally:
+            conn.close()
+        entries = {}
+        for run_id, block_name, compiler, owner, check_name, status in rows:
+            entry = entries.setdefault((run_id, block_name), [compiler, owner, 0])
+            if check_name in COLUMN_SHIFTS and status in STATUS_CODES:
+                entry[2] |= STATUS_CODES[status] << COLUMN_SHIFTS[check_name]
+        keys = list(entries)
+        return cls([block_name for _, block_name in keys], [entries[key][0] for key in keys],
+                   [entries[key][1] for key in keys], [run_id for run_id, _ in keys],
+                   [entries[key][2] for key in keys])
+
+    def save(self, path=STATUS_INDEX_FILE):
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, block_names=self.block_names.astype(str), compilers=self.compilers.astype(str),
+                 owners=self.owners.astype(str), run_ids=self.run_ids, bits=self.bits)
+        os.replace(tmp_path, path)
+        custom_print(f"[CREATED] Status index ({len(self)} blocks) -> {path}")
+
+    @classmethod
+    def load(cls, path=STATUS_INDEX_FILE):
+        with np.load(path) as data:
+            return cls(data["block_names"], data["compilers"], data["owners"], data["run_ids"], data["bits"])
+
+    def status(self, check):
+        # Status codes of one column for every entry
+        return (self.bits >> COLUMN_SHIFTS[check]) & STATUS_MASK
+
+    def mask(self, expression):
+        # Terms with one allowed status are folded into a single masked compare; the rest are tested per column
+        terms = parse_filter(expression) if isinstance(expression, str) else expression
+        required_mask = 0
+        required_bits = 0
+        result = np.ones(len(self.bits), dtype=bool)
+        for check, codes, negated in terms:
+            shift = COLUMN_SHIFTS[check]
+            if len(codes) == 1 and not negated:
+                required_mask |= STATUS_MASK << shift
+                required_bits |= codes[0] << shift
+            else:
+                matched = np.isin(self.status(check), codes)
+                result &= ~matched if negated else matched
+        if required_mask:
+            result &= (self.bits & np.uint32(required_mask)) == np.uint32(required_bits)
+        return result
+
+    def select(self, expression):
+        # Block names (in index order) matching the filter
+        return list(self.block_names[self.mask(expression)])
+
+    def counts(self, check):
+        # {status: number of entries} for one column
+        return dict(zip(STATUSES, np.bincount(self.status(check), minlength=len(STATUSES)).tolist()))
+
+
+def filter_rows(all_output_data, blocks_comp_names, blocks_owners, expression):
+
+    # The all_output_data rows matching the filter, in their original order
+    rows = [row for row in all_output_data if row != ["Error processing file"]]
+    index = StatusIndex.from_rows(rows, blocks_comp_names, blocks_owners)
+    return [row for row, keep in zip(rows, index.mask(expression)) if keep]
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Filter blocks by check status through the status bitmask index")
+    parser.add_argument("filter", help='e.g. "HOLD=NOT CLEAN,DRV=NOT CLEAN" or "*=CLEAN,LVS!=CLEAN"')
+    parser.add_argument("--history", action="store_true", help="Filter every block-run in the results history")
+    parser.add_argument("--db", default=RESULTS_DB_FILE, help="SQLite history file (with --history)")
+    parser.add_argument("--project", default=proj_dir_path, help="Project the runs were made for (with --history)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    toggle_print(False)
+    builtins.custom_print = custom_print
+    if args.history:
+        index = StatusIndex.from_history(args.db, args.project)
+    elif os.path.exists(STATUS_INDEX_FILE):
+        index = StatusIndex.load(STATUS_INDEX_FILE)
+    else:
+        print(f"No status index at {STATUS_INDEX_FILE}; run main.py first or use --history", file=sys.stderr)
+        sys.exit(1)
+    try:
+        mask = index.mask(args.filter)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+    for position in np.flatnonzero(mask):
+        run = f"run {index.run_ids[position]}: " if args.history else ""
+        print(f"{run}{index.block_names[position]} ({index.compilers[position]}, {index.owners[position]})")
+    print(f"{int(mask.sum())} of {len(index)} match", file=sys.stderr)
@@ -0,0 +1,62 @@
+"""
+Summary Client Module
+Contains the thin client for the resident summary daemon: it submits one summary job over the Unix socket
+and waits for the reply. Only the standard library and config are imported, so start-up stays cheap.
+
+Usage:
+    python summary_client.py                          # all blocks in BLOCK_INFO
+    python summary_client.py --blocks i36_i50 CDM_top --output group_a_summary.xlsx
+    python summary_client.py --only drc,lvs,erc,ant     # same --only / --skip / --diff-against / --filter as main.py
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+from config import DAEMON_SOCKET
+
+
+def submit_job(job, socket_path=DAEMON_SOCKET):
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(job) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reply:
+            return json.loads(reply.readline())
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Submit a block summary job to the resident daemon")
+    parser.add_argument("--blocks", nargs="+", metavar="BLOCK",
+                        help="Blocks to summarize (default: all of BLOCK_INFO); such jobs are not stored in the result history")
+    parser.add_argument("--output", help="Summary workbook to write (default: Output_xls_name)")
+    parser.add_argument("--resume", action="store_true", help="Replay the run journal and only process missing blocks")
+    parser.add_argument("--no-record", action="store_true", help="Do not store this run in the result history")
+    parser.add_argument("--diff-against", metavar="RUN", help="Also write a delta report against a stored run (run id or 'last')")
+    parser.add_argument("--filter", metavar="EXPR", dest="status_filter", help="Also write the blocks matching a status filter")
+    parser.add_argument("--only", metavar="CHECKS", help="Run only these checks, comma-separated (see main.py --only)")
+    parser.add_argument("--skip", metavar="CHECKS", help="Leave these checks out")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Unix socket the daemon listens on")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    job = {"cwd": os.getcwd(), "blocks": args.blocks, "output": args.output,
+           "resume": args.resume, "record": not args.no_record, "diff_against": args.diff_against,
+           "filter": args.status_filter, "only": args.only, "skip": args.skip}
+    try:
+        reply = submit_job(job, args.socket)
+    except OSError as e:
+        print(f"No summary daemon on {args.socket} ({e}); start one with: python summary_daemon.py", file=sys.stderr)
+        sys.exit(2)
+    if reply["status"] != "ok":
+        print(f"Summary job failed: {reply['error']}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote '{reply['output_file']}' for {reply['blocks']} blocks in {reply['seconds']}s", flush=True)
+    if reply.get("runtime_prediction"):
+        print(f"Runtime prediction: {reply['runtime_prediction']}", flush=True)
+    if reply["missing"]:
+        print(f"Workbooks not found: {', '.join(reply['missing'])}", flush=True)
@@ -0,0 +1,164 @@
+"""
+Summary Daemon Module
+Contains the resident summary daemon: pandas, the check modules and the worker pools stay loaded in one
+long-lived process that takes summary jobs over a local Unix socket (see summary_client.py).
+
+Usage:
+    python summary_daemon.py                # serve on DAEMON_SOCKET until Ctrl-C / SIGTERM
+"""
+
+import os
+import json
+import time
+import signal
+import socket
+import argparse
+import builtins
+import socketserver
+from config import (
+    ALL_BLOCK_CSV_FILES_DIR,
+    BLOCK_INFO,
+    Output_xls_name,
+    DAEMON_SOCKET
+)
+from utils import toggle_print, custom_print
+from checks import select_checks
+from status_index import parse_filter
+from run_outputs import RunOutputs
+from scheduler import format_runtime_report
+from main import sort_block_info, process_blocks
+
+
+def select_blocks(blocks=None):
+
+    # blocks is None (every block in BLOCK_INFO), a list of block names, or a list of block info dicts
+    if blocks is None:
+        return list(BLOCK_INFO)
+    known = {block["block_name"]: block for block in BLOCK_INFO}
+    selected = []
+    for block in blocks:
+        if isinstance(block, dict):
+            selected.append({"compiler": "N/A", "owner": "N/A", **block})
+        else:
+            selected.append(known.get(block, {"block_name": block, "compiler": "N/A", "owner": "N/A"}))
+    return selected
+
+
+def run_job(job):
+
+    start_time = time.time()
+    # Bad check / filter names are rejected before any block is processed (ValueError -> error reply)
+    selected = select_checks(job.get("only"), job.get("skip"))
+    if job.get("filter") is not None:
+        parse_filter(job["filter"])
+
+    # Jobs run one at a time, so each can work from the directory the client was started in
+    os.chdir(job.get("cwd", os.getcwd()))
+    os.makedirs(ALL_BLOCK_CSV_FILES_DIR, exist_ok=True)
+
+    block_info_sorted = sort_block_info(select_blocks(job.get("blocks")))
+    blocks_comp_names = {block["block_name"]: block["compiler"] for block in block_info_sorted}
+    blocks_owners = {block["block_name"]: block["owner"] for block in block_info_sorted}
+
+    # A job for some of the blocks is not a project run: it is not stored in the results history (which the results
+    # API, regressed_blocks and --diff-against last read as whole-project runs), does not reset the run journal or
+    # the progress NDJSON, and leaves the project-wide roll-ups alone
+    subset = job.get("blocks") is not None
+    runtime_stats = {}
+    all_output_data = process_blocks(block_info_sorted, blocks_comp_names, blocks_owners, resume=job.get("resume", False),
+                                     selected=selected, subset=subset, runtime_stats=runtime_stats)
+    # Same post-processing as main.py
+    outputs = RunOutputs(block_info_sorted, blocks_comp_names, blocks_owners, output_file=job.get("output") or Output_xls_name,
+                         selected=selected, diff_against=job.get("diff_against"), status_filter=job.get("filter"),
+                         record=job.get("record", True) and not subset, rollups=not subset)
+    run_id = outputs.publish(all_output_data)
+
+    return {
+        "status": "ok",
+        "output_file": os.path.abspath(outputs.output_file),
+        "blocks": len(block_info_sorted),
+        "missing": [row[1] for row in all_output_data if row[0] == "File Not Found"],
+        "run_id": run_id,
+        "seconds": round(time.time() - start_time, 3),
+        "runtime_prediction": format_runtime_report(runtime_stats),
+    }
+
+
+class SummaryJobHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        # One JSON job per connection, answered with one JSON reply line
+        line = self.rfile.readline()
+        if not line.strip():
+            # A liveness probe (see _socket_in_use) connects and closes without sending a job
+            return
+        try:
+            job = json.loads(line)
+            custom_print(f"[INFO] Summary job: {job}")
+            reply = run_job(job)
+        except Exception as e:
+            reply = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        custom_print(f"[INFO] Summary job reply: {reply}")
+        try:
+            self.wfile.write((json.dumps(reply, default=str) + "\n").encode("utf-8"))
+        except BrokenPipeError:
+            custom_print("[WARNING] Client disconnected before the summary job finished")
+
+
+def _socket_in_use(socket_path):
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+            return True
+        except OSError:
+            return False
+
+
+_DAEMON_PID = os.getpid()
+
+
+def _stop_on_sigterm(signum, frame):
+
+    # Pipeline workers forked from the daemon inherit this handler; they just exit
+    if os.getpid() != _DAEMON_PID:
+        os._exit(0)
+    raise KeyboardInterrupt
+
+
+def serve(socket_path=DAEMON_SOCKET):
+
+    if os.path.exists(socket_path):
+        if _socket_in_use(socket_path):
+            raise RuntimeError(f"A summary daemon is already listening on {socket_path}")
+        # Left behind by a daemon that did not shut down cleanly
+        os.remove(socket_path)
+
+    global _DAEMON_PID
+    _DAEMON_PID = os.getpid()
+    toggle_print(False)
+    builtins.custom_print = custom_print
+    # Serve jobs sequentially: each job already fans out over the pipeline processes
+    server = socketserver.UnixStreamServer(socket_path, SummaryJobHandler)
+    signal.signal(signal.SIGTERM, _stop_on_sigterm)
+    print(f"    [ Summary daemon listening on {socket_path} (Ctrl-C to stop) ]", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n    [ Summary daemon stopped ]", flush=True)
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Resident block summary daemon")
+    parser.add_argument("--socket", default=DAEMON_SOCKET, help="Unix socket to listen on")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    serve(args.socket)
@@ -0,0 +1,85 @@
+"""
+Summary Values Module
+Contains helpers that interpret the per-check summary strings: a normalized status per check and
+the worst of the numbers (with its corner) the check reported, from the measures it recorded.
+"""
+
+import hashlib
+from config import IR_DROP_CLEAN_PERCENT
+
+
+STATUS_CLEAN = "CLEAN"
+STATUS_NOT_CLEAN = "NOT CLEAN"
+STATUS_NA = "N/A"
+STATUS_MISSING = "FILE NOT FOUND"
+STATUSES = [STATUS_CLEAN, STATUS_NOT_CLEAN, STATUS_NA, STATUS_MISSING]
+
+# Checks where a lower worst value is worse (negative slack); for the rest a larger magnitude is worse
+LOWER_IS_WORSE = {"HOLD", "MPW"}
+
+# Checks left out of a run (main.py --only / --skip) read "skipped" and count as N/A
+_NA_MARKERS = ("NOT APPLICABLE", "EMPTY SHEET", "NO VALID", "NO CLOCK GROUPS", "NO CLK_GRP", "ERROR", "NOT ENOUGH", "INSUFFICIENT",
+               "SKIPPED")
+
+
+def _all_parts(value, predicate):
+
+    parts = [part.strip().rstrip(".") for part in value.split("|")]
+    return len(parts) > 0 and all(predicate(part) for part in parts)
+
+
+def check_status(check, value):
+
+    value = "" if value is None else str(value)
+    upper = value.upper().strip()
+    if "NOT FOUND" in upper:
+        return STATUS_MISSING
+    if upper == "" or upper == "N/A":
+        return STATUS_NA
+    if check in ("PARA ERRORS", "NOT ANNOTATED", "MPW VIOLATION", "DRC", "LVS", "ERC", "ANT", "MPW"):
+        if upper == "CLEAN":
+            return STATUS_CLEAN
+    elif check == "HOLD":
+        if upper == "HOLD CLEAN":
+            return STATUS_CLEAN
+    elif check == "FMAX":
+        if _all_parts(value, lambda part: part.endswith(": TCC")):
+            return STATUS_CLEAN
+    elif check == "DRV":
+        if upper == "TRAN: CLEAN | CAP: CLEAN":
+            return STATUS_CLEAN
+    elif check == "TCQ":
+        if _all_parts(value, lambda part: part.upper().endswith(": CLEAN")):
+            return STATUS_CLEAN
+    elif check in ("VDD", "VSS"):
+        if upper.endswith("%"):
+            try:
+                return STATUS_CLEAN if float(upper[:-1]) <= IR_DROP_CLEAN_PERCENT else STATUS_NOT_CLEAN
+            except ValueError:
+                return STATUS_NA
+    elif check == "Formality":
+        if upper == "PASSING":
+            return STATUS_CLEAN
+        if upper == "NOT PASSING":
+            return STATUS_NOT_CLEAN
+    if any(marker in upper for marker in _NA_MARKERS):
+        return STATUS_NA
+    return STATUS_NOT_CLEAN
+
+
+def worst_measure(check, measures, entry=None):
+
+    # Returns (worst value, corner) of a check's measures ([(entry, value, corner)], see CheckContext.measures),
+    # only those of one entry (an FMAX / TCQ sub-block) when given; (None, None) when it reported no number
+    values = [(value, corner) for name, value, corner in measures or () if entry is None or name == entry]
+    if not values:
+        return None, None
+    if check in LOWER_IS_WORSE:
+        return min(values, key=lambda measure: measure[0])
+    return max(values, key=lambda measure: abs(measure[0]))
+
+
+def row_fingerprint(values):
+
+    # Stable hash of a block's check values; equal fingerprints mean the row is unchanged
+    return hashlib.sha1("\x1f".join("" if value is None else str(value) for value in values).encode("utf-8")).hexdigest()
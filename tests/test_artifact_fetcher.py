@@ -0,0 +1,70 @@
+import time
+import threading
+import pytest
+import artifact_fetcher
+from artifact_fetcher import fetch_block_artifacts
+from checks import CHECKS, CheckContext, run_checks
+
+
+class FakeInput:
+
+    def __init__(self, key, read):
+        self.key = key
+        self._read = read
+
+    def read(self, excel_file, proj_dir_path):
+        return self._read(excel_file)
+
+
+@pytest.fixture
+def hung_read(monkeypatch):
+
+    # A report read that hangs (like a stuck NFS mount) until the test ends
+    release = threading.Event()
+
+    def hang(excel_file):
+        release.wait(10)
+        return "late"
+
+    def fail(excel_file):
+        raise OSError("permission denied")
+
+    monkeypatch.setitem(artifact_fetcher.ARTIFACTS, "hung", FakeInput("hung", hang))
+    monkeypatch.setitem(artifact_fetcher.ARTIFACTS, "fast", FakeInput("fast", lambda excel_file: f"read {excel_file}"))
+    monkeypatch.setitem(artifact_fetcher.ARTIFACTS, "broken", FakeInput("broken", fail))
+    yield
+    release.set()
+
+
+def test_hung_read_times_out_without_holding_up_the_others(hung_read):
+
+    start = time.monotonic()
+    artifacts = fetch_block_artifacts(["blk_metrics.xlsx"], ".", concurrency=4, timeout=0.3, keys=["hung", "fast", "broken"])
+    assert time.monotonic() - start < 2
+    block = artifacts["blk"]
+    assert isinstance(block["hung"], TimeoutError)
+    assert block["fast"] == "read blk_metrics.xlsx"
+    assert isinstance(block["broken"], OSError)
+
+
+def test_timeout_covers_waiting_for_a_slot(hung_read):
+
+    # The only slot is held by the hung read, so the other read times out waiting for it instead of blocking forever
+    start = time.monotonic()
+    artifacts = fetch_block_artifacts(["blk_metrics.xlsx"], ".", concurrency=1, timeout=0.3, keys=["hung", "fast"])
+    assert time.monotonic() - start < 2
+    assert isinstance(artifacts["blk"]["hung"], TimeoutError)
+    assert isinstance(artifacts["blk"]["fast"], TimeoutError)
+
+
+def test_timed_out_reports_map_to_the_checks_error_values(tmp_path):
+
+    timed_out = TimeoutError("timed out")
+    context = CheckContext(str(tmp_path / "blk_metrics.xlsx"), str(tmp_path), str(tmp_path),
+                           artifacts={key: timed_out for key in ("drc", "lvs", "ant", "ir", "formality")})
+    checks = [check for check in CHECKS if check.artifacts or check.depends == ["IR"]]
+    results = run_checks(context, checks, workers=1)
+    assert results["DRC"] == "Error reading DRC file: timed out"
+    assert results["ERC"] == "Error reading ERC file: timed out"
+    assert results["IR"] == (None, None)
+    assert results["Formality"] == "Error Processing Log"
@@ -0,0 +1,89 @@
+import os
+import pytest
+import run_outputs
+from checks import Check, CheckContext, select_checks, prefetch_keys, run_checks, SKIPPED_VALUE
+from run_journal import start_journal, checkpoint_block, load_journal
+from run_outputs import RunOutputs
+
+
+def test_no_selection_runs_every_check():
+
+    assert select_checks() is None
+    assert select_checks("", "") is None
+
+
+def test_only_and_skip_select_by_group():
+
+    assert select_checks("drc,LVS") == {"DRC", "LVS"}
+    assert select_checks("mpw") == {"MPW", "MPW VIOLATION"}
+    skipped = select_checks(skip="ir,fmax")
+    assert not skipped & {"IR", "VDD", "VSS", "FMAX"}
+    assert {"HOLD", "DRC", "Formality"} <= skipped
+    assert select_checks("drc,lvs", "lvs") == {"DRC"}
+
+
+def test_unknown_check_is_rejected():
+
+    with pytest.raises(ValueError, match="bogus"):
+        select_checks("drc,bogus")
+
+
+def test_prefetch_only_reads_selected_reports():
+
+    assert prefetch_keys(select_checks("lvs,erc")) == ["lvs"]
+    assert prefetch_keys(select_checks("hold,fmax")) == []
+    assert prefetch_keys(None) == ["drc", "lvs", "ant", "ir", "formality"]
+
+
+def test_unselected_checks_and_their_dependents_are_skipped(tmp_path):
+
+    computed = []
+
+    def compute(name, value):
+        def run(ctx, *args):
+            computed.append(name)
+            return value
+        return run
+
+    checks = [
+        Check("A", compute("A", "a")),
+        Check("B", compute("B", "b")),
+        Check("C", compute("C", "c"), depends=["B"]),
+    ]
+    context = CheckContext(str(tmp_path / "blk_metrics.xlsx"), str(tmp_path), str(tmp_path))
+    results = run_checks(context, checks, workers=1, selected={"A", "C"})
+    assert results == {"A": "a", "B": SKIPPED_VALUE, "C": SKIPPED_VALUE}
+    assert computed == ["A"]
+
+
+def test_checkpoint_of_another_selection_is_not_replayed(tmp_path):
+
+    journal_dir = str(tmp_path / "journal")
+    excel_file = tmp_path / "blk_metrics.xlsx"
+    excel_file.write_bytes(b"v1")
+    excel_files = {"blk": str(excel_file)}
+    start_journal(journal_dir)
+    checkpoint_block("blk", str(excel_file), ["blk", "skipped"], journal_dir, selected={"DRC"})
+
+    assert load_journal(excel_files, journal_dir) == {}
+    assert load_journal(excel_files, journal_dir, selected={"LVS"}) == {}
+    assert load_journal(excel_files, journal_dir, selected={"DRC"}) == {"blk": ["blk", "skipped"]}
+
+
+def test_partial_run_only_writes_the_summary(tmp_path, monkeypatch):
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("a run of selected checks must not touch the history or roll-ups")
+
+    for name in ("record_run", "update_run", "build_cube", "build_hierarchy", "block_measures"):
+        monkeypatch.setattr(run_outputs, name, unexpected)
+    monkeypatch.setattr(run_outputs, "RESULTS_DB_ENABLE", 1)
+    monkeypatch.setattr(run_outputs, "CUBE_ENABLE", 1)
+    monkeypatch.setattr(run_outputs.StatusIndex, "from_rows", unexpected)
+
+    block_info = [{"block_name": "blk", "compiler": "COMP", "owner": "owner"}]
+    output_file = str(tmp_path / "summary.xlsx")
+    outputs = RunOutputs(block_info, {"blk": "COMP"}, {"blk": "owner"}, output_file=output_file, selected={"DRC"})
+    row = ["blk"] + [SKIPPED_VALUE] * 8 + ["DRC File Not Found"] + [SKIPPED_VALUE] * 6
+    assert outputs.publish([row]) is None
+    assert os.path.exists(output_file)
@@ -0,0 +1,56 @@
+import os
+import time
+import multiprocessing
+import pytest
+import pipeline
+from pipeline import run_pipeline
+
+pytestmark = pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                                reason="the patched workers reach the child processes through fork")
+
+
+def _flooding_parser(task_queue, parsed_queue, file_kwargs):
+
+    # Keeps offering parsed workbooks, so it blocks on the full parsed_queue once nobody consumes them
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        parsed_queue.put((task, {}, None))
+
+
+def _crashing_analyser(parsed_queue, result_queue, main_headers, sub_headers, artifacts, file_kwargs):
+
+    # Dies like an analyser killed by the OOM killer or a crash in a native reader
+    os._exit(1)
+
+
+def test_dead_analysers_do_not_hang_the_pipeline(monkeypatch):
+
+    monkeypatch.setattr(pipeline, "_parser_worker", _flooding_parser)
+    monkeypatch.setattr(pipeline, "_analysis_worker", _crashing_analyser)
+    excel_files = [f"blk{idx}_metrics.xlsx" for idx in range(8)]
+
+    start = time.monotonic()
+    results = list(run_pipeline(excel_files, [], [], parser_workers=2, analysis_workers=2, queue_size=1))
+    assert time.monotonic() - start < 15
+    assert results == [(excel_file, ["Error processing file"]) for excel_file in excel_files]
+
+
+def test_project_tasks_come_back_as_given(monkeypatch):
+
+    def echo_analyser(parsed_queue, result_queue, main_headers, sub_headers, artifacts, file_kwargs):
+        while True:
+            item = parsed_queue.get()
+            if item is None:
+                break
+            task = item[0]
+            result_queue.put((task, [pipeline.task_workbook(task), file_kwargs[task]["proj_dir_path"]], 0.0, None))
+
+    monkeypatch.setattr(pipeline, "_parser_worker", _flooding_parser)
+    monkeypatch.setattr(pipeline, "_analysis_worker", echo_analyser)
+    tasks = [("projA/", "blk_metrics.xlsx"), ("projB/", "blk_metrics.xlsx")]
+    file_kwargs = {task: {"proj_dir_path": task[0]} for task in tasks}
+
+    results = dict(run_pipeline(tasks, [], [], file_kwargs=file_kwargs))
+    assert results == {task: ["blk_metrics.xlsx", task[0]] for task in tasks}
@@ -0,0 +1,57 @@
+import os
+from run_journal import start_journal, checkpoint_block, load_journal
+
+
+def _workbook(tmp_path, block_name, content=b"v1"):
+
+    path = tmp_path / f"{block_name}_metrics.xlsx"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_resume_replays_checkpointed_rows(tmp_path):
+
+    journal_dir = str(tmp_path / "journal")
+    excel_files = {"blk_a": _workbook(tmp_path, "blk_a"), "blk_b": _workbook(tmp_path, "blk_b")}
+    start_journal(journal_dir)
+    checkpoint_block("blk_a", excel_files["blk_a"], ["blk_a", "CLEAN"], journal_dir)
+
+    start_journal(journal_dir, resume=True)
+    assert load_journal(excel_files, journal_dir) == {"blk_a": ["blk_a", "CLEAN"]}
+
+
+def test_fresh_run_clears_the_journal(tmp_path):
+
+    journal_dir = str(tmp_path / "journal")
+    excel_files = {"blk_a": _workbook(tmp_path, "blk_a")}
+    start_journal(journal_dir)
+    checkpoint_block("blk_a", excel_files["blk_a"], ["blk_a", "CLEAN"], journal_dir)
+
+    start_journal(journal_dir, resume=False)
+    assert load_journal(excel_files, journal_dir) == {}
+
+
+def test_changed_workbook_is_reprocessed(tmp_path):
+
+    journal_dir = str(tmp_path / "journal")
+    excel_files = {"blk_a": _workbook(tmp_path, "blk_a")}
+    start_journal(journal_dir)
+    checkpoint_block("blk_a", excel_files["blk_a"], ["blk_a", "CLEAN"], journal_dir)
+
+    _workbook(tmp_path, "blk_a", b"v2 with more rows")
+    assert load_journal(excel_files, journal_dir) == {}
+
+
+def test_unreadable_and_torn_checkpoints_are_ignored(tmp_path):
+
+    journal_dir = str(tmp_path / "journal")
+    excel_files = {"blk_a": _workbook(tmp_path, "blk_a"), "blk_b": _workbook(tmp_path, "blk_b")}
+    start_journal(journal_dir)
+    checkpoint_block("blk_a", excel_files["blk_a"], ["blk_a", "CLEAN"], journal_dir)
+    with open(os.path.join(journal_dir, "blk_b.json"), "w") as f:
+        f.write('{"block_name": "blk_b", "row": [')
+    # A temp file left behind by a checkpoint interrupted before its rename
+    with open(os.path.join(journal_dir, ".blk_a.x.tmp"), "w") as f:
+        f.write("{")
+
+    assert load_journal(excel_files, journal_dir) == {"blk_a": ["blk_a", "CLEAN"]}
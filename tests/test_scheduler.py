@@ -0,0 +1,26 @@
+from scheduler import lpt_makespan, runtime_report, format_runtime_report
+
+
+def test_lpt_makespan_fills_the_least_loaded_worker():
+
+    assert lpt_makespan([3, 3, 2, 2, 2], 2) == 7
+    assert lpt_makespan([3, 1], 1) == 4
+    assert lpt_makespan([], 2) == 0
+
+
+def test_runtime_report_names_the_worst_prediction():
+
+    costs = {"a_metrics.xlsx": (1.0, 10), "b_metrics.xlsx": (2.0, 20), "c_metrics.xlsx": (5.0, 50)}
+    timings = {"a_metrics.xlsx": 4.0, "b_metrics.xlsx": 2.5}
+    report = runtime_report(costs, timings, makespan=4.2, workers=2)
+    assert report == {"worst": ("a", 1.0, 4.0), "makespan": 4.2, "predicted_makespan": 2.0}
+    assert format_runtime_report(report) == ("makespan 4.20s against 2.00s predicted; "
+                                             "worst block a took 4.00s against 1.00s predicted")
+
+
+def test_runtime_report_of_batch_tasks_and_unpredicted_runs():
+
+    report = runtime_report({("projA", "x_metrics.xlsx"): (1.0, 10)}, {("projA", "x_metrics.xlsx"): 1.5}, makespan=1.5)
+    assert report["worst"] == ("x", 1.0, 1.5)
+    assert runtime_report({}, {"a_metrics.xlsx": 1.0}, makespan=1.0) == {}
+    assert format_runtime_report({}) == "no block runtimes predicted"
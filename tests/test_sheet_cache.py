@@ -0,0 +1,95 @@
+import zipfile
+import pytest
+import xlsxwriter
+import config
+from sheet_cache import SheetResultCache, sheet_fingerprints
+
+CHECK_VALUES = {"PARA ERRORS": "CLEAN", "NOT ANNOTATED": "CLEAN", "MPW": "CLEAN", "HOLD": "HOLD CLEAN", "FMAX": "fmax",
+                "DRV": "drv", "TCQ": "TCQ Not Applicable"}
+
+
+def _write_workbook(path, dashboard=("PARA ERRORS", "CLEAN"), fmax="func.min.ffgnp"):
+
+    # xlsxwriter keeps cell text in sharedStrings.xml, like the STA tool's workbooks
+    workbook = xlsxwriter.Workbook(str(path))
+    for name, row in [("Dashboard", list(dashboard)), ("MIN_PULSE_WIDTH", ["corner", "wns"]),
+                      ("HOLD_MASTER_CLK_SUM", ["clk", "wns"]), ("HOLD_MASTER_CLK", ["clk", "corner"]),
+                      ("FMAX", ["corner", fmax]), ("DRV", ["tran", "cap"]), ("TCQ", ["block", "tcq"])]:
+        workbook.add_worksheet(name).write_row(0, 0, row)
+    workbook.close()
+    return str(path)
+
+
+def _sheet_xml(excel_file, index):
+
+    with zipfile.ZipFile(excel_file) as archive:
+        return archive.read(f"xl/worksheets/sheet{index}.xml")
+
+
+def _fill(cache):
+
+    for check, value in CHECK_VALUES.items():
+        cache.result(check, lambda value=value: value)
+    cache.save()
+
+
+@pytest.fixture
+def cached_workbook(tmp_path):
+
+    excel_file = _write_workbook(tmp_path / "blk_metrics.xlsx")
+    _fill(SheetResultCache(excel_file, str(tmp_path)))
+    return excel_file
+
+
+def test_unchanged_workbook_reuses_every_result(cached_workbook, tmp_path):
+
+    cache = SheetResultCache(cached_workbook, str(tmp_path))
+    assert cache.stale_sheets() == set()
+    for check, value in CHECK_VALUES.items():
+        assert cache.result(check, lambda: pytest.fail(f"{check} recomputed")) == value
+
+
+def test_only_checks_reading_a_changed_sheet_are_recomputed(cached_workbook, tmp_path):
+
+    _write_workbook(cached_workbook, fmax="func.max.ssgnp")
+    cache = SheetResultCache(cached_workbook, str(tmp_path))
+    assert cache.stale_sheets() == {"FMAX"}
+    assert not cache.is_fresh("FMAX")
+    assert all(cache.is_fresh(check) for check in CHECK_VALUES if check != "FMAX")
+    assert cache.stale_sheets(selected={"HOLD", "DRV"}) == set()
+
+
+def test_renumbered_shared_strings_do_not_invalidate_other_sheets(cached_workbook, tmp_path):
+
+    _, before = sheet_fingerprints(cached_workbook)
+    fmax_xml = _sheet_xml(cached_workbook, 5)
+    # A new string on the first sheet shifts the shared string indices every later sheet refers to
+    _write_workbook(cached_workbook, dashboard=("PARA ERRORS", "NOT CLEAN", "see DRV"))
+    _, after = sheet_fingerprints(cached_workbook)
+    assert _sheet_xml(cached_workbook, 5) != fmax_xml
+    assert before["Dashboard"] != after["Dashboard"]
+    assert {name: digest for name, digest in before.items() if name != "Dashboard"} == \
+           {name: digest for name, digest in after.items() if name != "Dashboard"}
+
+    cache = SheetResultCache(cached_workbook, str(tmp_path))
+    assert cache.stale_sheets() == {"Dashboard"}
+    assert not cache.is_fresh("PARA ERRORS") and not cache.is_fresh("NOT ANNOTATED")
+
+
+def test_changed_reporting_settings_invalidate_the_cache(cached_workbook, tmp_path, monkeypatch):
+
+    monkeypatch.setattr(config, "DETAILED_INFO", 1 - config.DETAILED_INFO)
+    cache = SheetResultCache(cached_workbook, str(tmp_path))
+    assert not any(cache.is_fresh(check) for check in CHECK_VALUES)
+
+
+def test_unreadable_workbook_is_never_cached(tmp_path):
+
+    excel_file = tmp_path / "blk_metrics.xlsx"
+    excel_file.write_bytes(b"not a zip")
+    cache = SheetResultCache(str(excel_file), str(tmp_path))
+    assert cache.stale_sheets() is None
+    assert cache.result("HOLD", lambda: "HOLD CLEAN") == "HOLD CLEAN"
+    assert not cache.is_fresh("HOLD")
+    cache.save()
+    assert not (tmp_path / "sheet_cache.json").exists()
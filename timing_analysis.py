@@ -4,18 +4,153 @@ Contains functions for processing timing-related metrics: HOLD, FMAX, TCQ, and M
 """
 
 import os
+import atexit
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from utils import custom_print
-
-
-def process_hold_data(excel_file, output_dir):
+from config import INTRA_BLOCK_WORKERS, INTRA_BLOCK_MIN_ITEMS, TCQ_THRESHOLD_PERCENT, ANALYSIS_MEMO_ENABLE
+from utils import custom_print, read_sheet
+from corners import corner_table, CornerMetrics
+from analysis_memo import analysis_memo
+from layout_plans import layout_plans
+from sheet_loader import SheetProjection, declare_projection
+
+
+_intra_block_pool = None
+
+# FMAX rows are kept for corners of these modes
+FMAX_CORNER_PREFIXES = ('func', 'test', 'fbist')
+
+# Columns _analyze_hold_group reads from each clock group (WNS, TNS, FEP)
+HOLD_GROUP_COLUMNS = 3
+
+
+def hold_sheet_columns(header):
+
+    # The corner column plus the first HOLD_GROUP_COLUMNS columns from every named header cell (the clock groups)
+    columns = {0}
+    for position, name in enumerate(header):
+        if position and name != "":
+            columns.update(range(position, position + HOLD_GROUP_COLUMNS))
+    return columns
+
+
+declare_projection("HOLD_MASTER_CLK", SheetProjection(columns=hold_sheet_columns))
+declare_projection("FMAX", SheetProjection(row_prefixes=FMAX_CORNER_PREFIXES))
+
+
+def map_ordered(func, arg_tuples, workers=INTRA_BLOCK_WORKERS):
+
+    # Runs func over per-group / per-sub-block arguments, fanning out to a process pool for large
+    # blocks; results always come back in input order so the summary text is deterministic.
+    global _intra_block_pool
+    if workers <= 1 or len(arg_tuples) < INTRA_BLOCK_MIN_ITEMS:
+        return [func(*args) for args in arg_tuples]
+    if _intra_block_pool is None:
+        _intra_block_pool = ProcessPoolExecutor(max_workers=workers)
+        atexit.register(_intra_block_pool.shutdown)
+        custom_print(f"[INFO] Started intra-block worker pool with {workers} workers")
+    return list(_intra_block_pool.map(func, *zip(*arg_tuples)))
+
+
+def map_memoized(kind, func, arg_tuples, csv_name, workers=INTRA_BLOCK_WORKERS):
+
+    # map_ordered over (name, slice, output_dir, *params) tuples, reusing the result of any identical slice seen
+    # before; on a hit the CSV the analysis leaves in output_dir (csv_name) is written back from the memo.
+    if not ANALYSIS_MEMO_ENABLE:
+        return map_ordered(func, arg_tuples, workers)
+    results = [None] * len(arg_tuples)
+    keys = [None] * len(arg_tuples)
+    pending = []
+    for idx, args in enumerate(arg_tuples):
+        name, data, output_dir = args[:3]
+        if data is None:
+            pending.append(idx)
+            continue
+        keys[idx] = analysis_memo.key(kind, name, data, args[3:])
+        entry = analysis_memo.get(kind, keys[idx])
+        if entry is None:
+            pending.append(idx)
+            continue
+        results[idx], csv_text = entry
+        if csv_text is not None:
+            with open(os.path.join(output_dir, csv_name.format(name=name)), "w") as f:
+                f.write(csv_text)
+
+    computed = map_ordered(func, [arg_tuples[idx] for idx in pending], workers)
+    for idx, result in zip(pending, computed):
+        results[idx] = result
+        if keys[idx] is not None:
+            name, _, output_dir = arg_tuples[idx][:3]
+            csv_file = os.path.join(output_dir, csv_name.format(name=name))
+            csv_text = None
+            if os.path.exists(csv_file):
+                with open(csv_file, "r") as f:
+                    csv_text = f.read()
+            analysis_memo.put(keys[idx], result, csv_text)
+    return results
+
+
+def _analyze_hold_group(clk_grp_name, table, output_dir):
+
+    # Returns (result entry or None, clean flag, [(clock group, WNS, corner)] reported) for one clock group
+    if len(table.columns) < HOLD_GROUP_COLUMNS:
+        custom_print(f"[WARNING] {clk_grp_name} does not have enough columns to process.")
+        return None, False, []
+
+    csv_file = os.path.join(output_dir, f"{clk_grp_name}_grouped.csv")
+    wns = table.columns["wns"]
+    if not (wns < 0).any():
+        formatted_row = f"{clk_grp_name} : CLEAN"
+        custom_print(formatted_row)
+        clean, group_measures = True, []
+    else:
+        row = table.farthest("wns")
+        formatted_row = (f"{clk_grp_name} {table.corner(row)} : WNS: {wns[row]}; "
+                         f"TNS: {table.value('tns', row)}; FEP: {table.value('fep', row)}")
+        custom_print(f"[CREATED] Farthest value from zero in {clk_grp_name}: {formatted_row}")
+        clean, group_measures = False, [(clk_grp_name, float(wns[row]), table.corner(row))]
+
+    with open(csv_file, "w") as f:
+        f.write(formatted_row + "\n")
+    custom_print(f"[CREATED] Result for {clk_grp_name} saved to CSV: {csv_file}")
+    return formatted_row, clean, group_measures
+
+
+def hold_group_table(hold_rows, corner_ids, start_idx, end_idx):
+
+    # One clock group's WNS (numeric), TNS and FEP columns, read straight from the sheet's data rows
+    positions = dict(zip(("wns", "tns", "fep"), range(start_idx, min(end_idx, start_idx + HOLD_GROUP_COLUMNS))))
+    wns = {"wns": positions.pop("wns")}
+    return CornerMetrics.from_frame(hold_rows, wns, raw=positions, corner_ids=corner_ids)
+
+
+def compile_hold_plan(columns, clk_grps):
+
+    # [start, end) column range of every clock group (None when absent); None when the sheet has no clk_grp columns
+    clk_grp_indices = [i for i, col in enumerate(columns) if col.startswith("clk_grp")]
+    if not clk_grp_indices:
+        return None
+
+    group_ranges = []
+    for clk_grp_name in clk_grps:
+        matching_indices = [i for i, col in enumerate(columns) if col == clk_grp_name]
+        if not matching_indices:
+            group_ranges.append(None)
+            continue
+        start_idx = matching_indices[0]
+        next_clk_indices = [i for i in clk_grp_indices if i > start_idx]
+        group_ranges.append([start_idx, next_clk_indices[0] if next_clk_indices else len(columns)])
+    return group_ranges
+
+
+def process_hold_data(excel_file, output_dir, xls=None, workers=INTRA_BLOCK_WORKERS, capture=None, measures=None):
 
     hold_sheet = "HOLD_MASTER_CLK"
     summary_sheet = "HOLD_MASTER_CLK_SUM"
 
     try:
-        df_summary = pd.read_excel(excel_file, sheet_name=summary_sheet)
+        df_summary = read_sheet(excel_file, summary_sheet, xls)
         clk_grps = df_summary.iloc[0:, 0].tolist()
 
         clk_grps_csv = os.path.join(output_dir, "HOLD_MASTER_CLK_SUM_allclk_grps.csv")
@@ -28,62 +163,40 @@ def process_hold_data(excel_file, output_dir):
             custom_print("[WARNING] No clock groups found in the HOLD_MASTER_CLK_SUM sheet.")
             return "No clock groups found"
 
-        df_hold = pd.read_excel(excel_file, sheet_name=hold_sheet)
-        clk_grp_indices = [i for i, col in enumerate(df_hold.columns) if col.startswith("clk_grp")]
+        df_hold = read_sheet(excel_file, hold_sheet, xls)
+        hold_header = list(df_hold.columns)
+        group_ranges = layout_plans.plan("HOLD", hold_header, clk_grps, lambda: compile_hold_plan(hold_header, clk_grps))
 
-        if not clk_grp_indices:
+        if group_ranges is None:
             custom_print("[WARNING] No 'clk_grp' columns found in the HOLD_MASTER_CLK sheet.")
             return "No clk_grp columns found"
 
-        hold_corners = df_hold.iloc[:, [0]]
+        # The first row under the header names each group's columns; the corner column is interned once for all groups
+        hold_rows = df_hold.iloc[1:]
+        corner_ids = corner_table.intern_column(hold_rows.iloc[:, 0])
         clk_group_results = []
         all_clean = True
 
-        for clk_grp_name in clk_grps:
-            matching_indices = [i for i, col in enumerate(df_hold.columns) if col == clk_grp_name]
-            if not matching_indices:
+        group_args = []
+        for clk_grp_name, group_range in zip(clk_grps, group_ranges):
+            if group_range is None:
                 custom_print(f"[WARNING] Clock group '{clk_grp_name}' not found in HOLD_MASTER_CLK sheet.")
                 continue
 
-            start_idx = matching_indices[0]
-            next_clk_indices = [i for i in clk_grp_indices if i > start_idx]
-            end_idx = next_clk_indices[0] if next_clk_indices else len(df_hold.columns)
-
-            df_clk_grp = df_hold.iloc[:, start_idx:end_idx]
-            df_final = pd.concat([hold_corners, df_clk_grp], axis=1)
-            df_final = df_final.iloc[1:].reset_index(drop=True)
-
-            csv_file = os.path.join(output_dir, f"{clk_grp_name}_grouped.csv")
-            df_final.to_csv(csv_file, sep=' ', index=False, header=False)
-            custom_print(f"[CREATED] Data for {clk_grp_name} saved to CSV: {csv_file}")
-
-            df_csv = pd.read_csv(csv_file, sep=' ', header=None)
-            if df_csv.shape[1] > 3:
-                df_csv[1] = pd.to_numeric(df_csv[1], errors='coerce')
-
-                if not (df_csv[1] < 0).any():
-                    custom_print(f"{clk_grp_name} : CLEAN")
-                    clk_group_results.append(f"{clk_grp_name} : CLEAN")
-                else:
-                    all_clean = False
-                    max_abs_index = df_csv[1].abs().idxmax()
-                    max_abs_row = df_csv.loc[max_abs_index]
-
-                    func_name = max_abs_row[0]
-                    wns = max_abs_row[1]
-                    tns = max_abs_row[2]
-                    fep = max_abs_row[3]
+            start_idx, end_idx = group_range
+            group_args.append((clk_grp_name, hold_group_table(hold_rows, corner_ids, start_idx, end_idx), output_dir))
+        del df_hold, hold_rows
 
-                    formatted_row = f"{clk_grp_name} {func_name} : WNS: {wns}; TNS: {tns}; FEP: {fep}"
-                    clk_group_results.append(formatted_row)
-
-                    with open(csv_file, "w") as f:
-                        f.write(formatted_row + "\n")
-
-                    custom_print(f"[CREATED] Farthest value from zero in {clk_grp_name}: {formatted_row}")
-            else:
-                custom_print(f"[WARNING] {clk_grp_name} does not have enough columns to process.")
+        if capture is not None:
+            capture["HOLD"] = [(clk_grp_name, table) for clk_grp_name, table, _ in group_args]
+        for group_result, group_clean, group_measures in map_memoized("HOLD", _analyze_hold_group, group_args,
+                                                                      "{name}_grouped.csv", workers):
+            if not group_clean:
                 all_clean = False
+            if group_result is not None:
+                clk_group_results.append(group_result)
+            if measures is not None:
+                measures.extend(group_measures)
 
         output_string = " | ".join(clk_group_results) + "."
         if all_clean and clk_group_results:
@@ -98,7 +211,172 @@ def process_hold_data(excel_file, output_dir):
         return f"Error processing HOLD data: {str(e)}"
 
 
-def process_fmax_data(excel_file, clock_groups, xls, output_dir, highest_only=1):
+def _margin(value):
+
+    # Reported FMAX margin as a number; None when it is not one (NA)
+    try:
+        return float(str(value).rstrip('%'))
+    except (ValueError, TypeError):
+        return None
+
+
+def _fmax_measures(part, lines):
+
+    # (sub-block, TCC margin, corner) of every reported (corner, margin) line
+    return [(part, _margin(margin), corner) for corner, margin in lines if _margin(margin) is not None]
+
+
+def _analyze_fmax_part(part, part_data, output_dir, highest_only):
+
+    # Returns (FMAX result entry, [(sub-block, TCC margin, corner)] reported) for one sub-block slice; part_data is
+    # None when the sheet has no columns left for it
+    new_csv_file = os.path.join(output_dir, f"{part}_fmax.csv")
+    custom_print(f"Creating CSV file for block {part}: {new_csv_file}")
+    if part_data is None:
+        custom_print(f"[WARNING] Not enough columns for {part}.")
+        return f"{part}: Not enough data", []
+
+    if part_data.shape[1] > 1:
+        mask = part_data.iloc[:, 1] != "-"
+        part_data = part_data[mask]
+
+    part_data.to_csv(new_csv_file, index=False, sep=' ', header=False)
+    custom_print(f"[CREATED] Created {new_csv_file} with filtered data")
+
+    if part_data.shape[1] >= 4:
+        limit_col_idx = min(part_data.shape[1] - 3, part_data.shape[1] - 1)
+        tccmargin_col_idx = min(part_data.shape[1] - 2, part_data.shape[1] - 1)
+        holdmargin_col_idx = min(part_data.shape[1] - 1, part_data.shape[1] - 1)
+
+        if part_data.empty:
+            custom_print(f"[WARNING] No valid data for {part} after filtering.")
+            return f"{part}: No valid data", []
+
+        limit_col = part_data.iloc[:, limit_col_idx]
+        custom_print(f"[DEBUG] Unique values in limit_col for {part}: {limit_col.unique()}")
+        filtered_part_data = part_data[limit_col.str.contains('Memory|SMS', na=False, regex=True)]
+
+        custom_print(f"[DEBUG] Original rows: {len(part_data)}, Filtered rows: {len(filtered_part_data)}")
+        if filtered_part_data.empty:
+            custom_print(f"[DEBUG] No rows matched 'Memory|SMS' filter for {part}. Using all data instead.")
+            filtered_part_data = part_data
+
+        highest_sms = {"value": -1, "corner": "", "limit_value": "", "hold_margin": ""}
+        highest_memory = {"value": -1, "corner": "", "limit_value": "", "hold_margin": ""}
+        highest_general = {"value": -1, "corner": "", "limit_value": "", "hold_margin": ""}
+
+        all_lines = []
+        line_margins = []
+        has_tcc = False
+        for idx_row, row in filtered_part_data.iterrows():
+            limit_value = row.iloc[limit_col_idx] if limit_col_idx < len(row) else "Unknown"
+            if "TCC" in str(limit_value):
+                has_tcc = True
+                break
+
+        custom_print(f"[DEBUG] Block {part} has TCC: {has_tcc}")
+        if has_tcc:
+            custom_print(f"[INFO] Block {part} has TCC data - using simplified format")
+            return f"{part}: TCC", []
+
+        for idx_row, row in filtered_part_data.iterrows():
+            corner = row.iloc[0]
+            limit_value = row.iloc[limit_col_idx] if limit_col_idx < len(row) else "Unknown"
+            tcc_margin = row.iloc[tccmargin_col_idx] if tccmargin_col_idx < len(row) and pd.notna(row.iloc[tccmargin_col_idx]) else 'NA'
+            hold_margin = row.iloc[holdmargin_col_idx] if holdmargin_col_idx < len(row) and pd.notna(row.iloc[holdmargin_col_idx]) else 'NA'
+
+            tcc_margin_str = str(tcc_margin).rstrip('%')
+            hold_margin_str = str(hold_margin).rstrip('%')
+
+            formatted_line = f"{corner} ({limit_value}: {tcc_margin_str}%); Hold_margin: {hold_margin_str}"
+            all_lines.append(formatted_line)
+            line_margins.append((corner, tcc_margin_str))
+            custom_print(f"[DEBUG] Processing row - Corner: {corner}, Limit: {limit_value}, Margin: {tcc_margin_str}, Hold: {hold_margin_str}")
+
+            try:
+                margin_value = float(str(tcc_margin).rstrip('%'))
+                if "SMS" in str(limit_value) and margin_value > highest_sms["value"]:
+                    highest_sms = {
+                        "value": margin_value,
+                        "corner": corner,
+                        "limit_value": limit_value,
+                        "hold_margin": hold_margin_str
+                    }
+                    custom_print(f"[DEBUG] New highest SMS: {margin_value}% for {corner}")
+                elif "Memory" in str(limit_value) and margin_value > highest_memory["value"]:
+                    highest_memory = {
+                        "value": margin_value,
+                        "corner": corner,
+                        "limit_value": limit_value,
+                        "hold_margin": hold_margin_str
+                    }
+                    custom_print(f"[DEBUG] New highest Memory: {margin_value}% for {corner}")
+                elif margin_value > highest_general["value"]:
+                    highest_general = {
+                        "value": margin_value,
+                        "corner": corner,
+                        "limit_value": limit_value,
+                        "hold_margin": hold_margin_str
+                    }
+                    custom_print(f"[DEBUG] New highest general: {margin_value}% for {corner} ({limit_value})")
+            except (ValueError, TypeError) as e:
+                custom_print(f"[DEBUG] Error converting margin value '{tcc_margin}' to float: {e}")
+                continue
+
+        with open(new_csv_file, 'w') as outfile:
+            outfile.write('\n'.join(all_lines) if all_lines else f"{part}: No data")
+
+        if highest_only == 0:
+            if all_lines:
+                return f"{part}: {', '.join(all_lines)}", _fmax_measures(part, line_margins)
+            else:
+                return f"{part}: No data", []
+        else:
+            part_summary = []
+            reported = []
+            if highest_sms["value"] > -1:
+                sms_line = f"{highest_sms['corner']} ({highest_sms['limit_value']}: {highest_sms['value']}%); Hold_margin: {highest_sms['hold_margin']}"
+                part_summary.append(sms_line)
+                reported.append((highest_sms['corner'], highest_sms['value']))
+            if highest_memory["value"] > -1:
+                memory_line = f"{highest_memory['corner']} ({highest_memory['limit_value']}: {highest_memory['value']}%); Hold_margin: {highest_memory['hold_margin']}"
+                part_summary.append(memory_line)
+                reported.append((highest_memory['corner'], highest_memory['value']))
+            if len(part_summary) == 0 and highest_general["value"] > -1:
+                general_line = f"{highest_general['corner']} ({highest_general['limit_value']}: {highest_general['value']}%); Hold_margin: {highest_general['hold_margin']}"
+                part_summary.append(general_line)
+                reported.append((highest_general['corner'], highest_general['value']))
+
+            custom_print(f"[DEBUG] Part summary for {part}: {part_summary}")
+            if part_summary:
+                return f"{part}: {', '.join(part_summary)}", _fmax_measures(part, reported)
+            else:
+                if all_lines:
+                    custom_print(f"[DEBUG] Warning: Have {len(all_lines)} lines but empty part_summary for {part}")
+                    return f"{part}: {all_lines[0]}", _fmax_measures(part, line_margins[:1])
+                else:
+                    return f"{part}: No valid margin data", []
+    else:
+        custom_print(f"[WARNING] {part} does not have enough columns (needs at least 4).")
+        return f"{part}: Not enough columns", []
+
+
+def compile_fmax_plan(blocks, num_columns, part_size=7):
+
+    # Columns of every sub-block's part: the corner column plus its part_size columns (None when past the sheet)
+    part_columns = []
+    for idx, part in enumerate(blocks):
+        start_col = 1 + idx * part_size
+        end_col = start_col + part_size
+        if start_col >= num_columns:
+            part_columns.append(None)
+        else:
+            part_columns.append([0] + list(range(start_col, min(end_col, num_columns))))
+    return part_columns
+
+
+def process_fmax_data(excel_file, clock_groups, xls, output_dir, highest_only=1, workers=INTRA_BLOCK_WORKERS, capture=None,
+                      measures=None):
 
     try:
         excel_filename_without_ext = os.path.splitext(os.path.basename(excel_file))[0]
@@ -109,16 +387,19 @@ def process_fmax_data(excel_file, clock_groups, xls, output_dir, highest_only=1)
 
         if 'FMAX' in xls.sheet_names:
             custom_print("FMAX sheet is present.")
-            df_fmax = pd.read_excel(excel_file, sheet_name='FMAX')
+            df_fmax = read_sheet(excel_file, 'FMAX', xls)
+            fmax_header = list(df_fmax.columns)
 
             excel_filename_without_ext = os.path.splitext(os.path.basename(excel_file))[0]
             csv_file = os.path.join(output_dir, f"FMAX_{excel_filename_without_ext}.csv")
             df_fmax.to_csv(csv_file, index=False, sep=' ', header=False)
             custom_print(f"[CREATED] Sheet 'FMAX' converted to CSV: {csv_file} (space delimited, no header)")
 
-            df_fmax = pd.read_csv(csv_file, delimiter=' ', header=None)
-            df_fmax.iloc[:, 0] = df_fmax.iloc[:, 0].fillna('')
-            filtered_fmax = df_fmax[df_fmax.iloc[:, 0].str.startswith(('func', 'test', 'fbist'))]
+            # Text columns are read back as text, as they are when the rows the FMAX projection drops are present
+            text_columns = {position: str for position, dtype in enumerate(df_fmax.dtypes) if not pd.api.types.is_numeric_dtype(dtype)}
+            df_fmax = pd.read_csv(csv_file, delimiter=' ', header=None, dtype=text_columns)
+            corner_ids = corner_table.intern_column(df_fmax.iloc[:, 0])
+            filtered_fmax = df_fmax[corner_table.startswith_mask(corner_ids, FMAX_CORNER_PREFIXES)]
             filtered_fmax.to_csv(csv_file, index=False, sep=' ', header=False)
             custom_print(f"[CREATED] Main CSV file '{csv_file}' has been filtered.")
 
@@ -126,147 +407,22 @@ def process_fmax_data(excel_file, clock_groups, xls, output_dir, highest_only=1)
             blocks = [block for block in raw_blocks if block != "metrics"]
             custom_print(f"Identified blocks from filename: {blocks}")
 
-            part_size = 7
-            fmax_results = []
-            tcc_blocks = []
-
-            for idx, part in enumerate(blocks):
-                new_csv_file = os.path.join(output_dir, f"{part}_fmax.csv")
-                custom_print(f"Creating CSV file for block {part}: {new_csv_file}")
+            num_columns = filtered_fmax.shape[1]
+            part_columns = layout_plans.plan("FMAX", fmax_header, blocks + [num_columns],
+                                             lambda: compile_fmax_plan(blocks, num_columns))
 
-                start_col = 1 + idx * part_size
-                end_col = start_col + part_size
-
-                if start_col >= filtered_fmax.shape[1]:
-                    custom_print(f"[WARNING] Not enough columns for {part}.")
-                    fmax_results.append(f"{part}: Not enough data")
+            part_args = []
+            for part, columns_to_extract in zip(blocks, part_columns):
+                if columns_to_extract is None:
+                    part_args.append((part, None, output_dir, highest_only))
                     continue
+                part_args.append((part, filtered_fmax.iloc[:, columns_to_extract].copy(), output_dir, highest_only))
 
-                columns_to_extract = [0] + list(range(start_col, min(end_col, filtered_fmax.shape[1])))
-                part_data = filtered_fmax.iloc[:, columns_to_extract].copy()
-
-                if part_data.shape[1] > 1:
-                    mask = part_data.iloc[:, 1] != "-"
-                    part_data = part_data[mask]
-
-                part_data.to_csv(new_csv_file, index=False, sep=' ', header=False)
-                custom_print(f"[CREATED] Created {new_csv_file} with filtered data")
-
-                if part_data.shape[1] >= 4:
-                    limit_col_idx = min(part_data.shape[1] - 3, part_data.shape[1] - 1)
-                    tccmargin_col_idx = min(part_data.shape[1] - 2, part_data.shape[1] - 1)
-                    holdmargin_col_idx = min(part_data.shape[1] - 1, part_data.shape[1] - 1)
-
-                    if part_data.empty:
-                        custom_print(f"[WARNING] No valid data for {part} after filtering.")
-                        fmax_results.append(f"{part}: No valid data")
-                        continue
-
-                    limit_col = part_data.iloc[:, limit_col_idx]
-                    custom_print(f"[DEBUG] Unique values in limit_col for {part}: {limit_col.unique()}")
-                    filtered_part_data = part_data[limit_col.str.contains('Memory|SMS', na=False, regex=True)]
-
-                    custom_print(f"[DEBUG] Original rows: {len(part_data)}, Filtered rows: {len(filtered_part_data)}")
-                    if filtered_part_data.empty:
-                        custom_print(f"[DEBUG] No rows matched 'Memory|SMS' filter for {part}. Using all data instead.")
-                        filtered_part_data = part_data
-
-                    highest_sms = {"value": -1, "corner": "", "limit_value": "", "hold_margin": ""}
-                    highest_memory = {"value": -1, "corner": "", "limit_value": "", "hold_margin": ""}
-                    highest_general = {"value": -1, "corner": "", "limit_value": "", "hold_margin": ""}
-
-                    all_lines = []
-                    has_tcc = False
-                    for idx_row, row in filtered_part_data.iterrows():
-                        limit_value = row.iloc[limit_col_idx] if limit_col_idx < len(row) else "Unknown"
-                        if "TCC" in str(limit_value):
-                            has_tcc = True
-                            tcc_blocks.append(part)
-                            break
-
-                    custom_print(f"[DEBUG] Block {part} has TCC: {has_tcc}")
-                    if has_tcc:
-                        custom_print(f"[INFO] Block {part} has TCC data - using simplified format")
-                        fmax_results.append(f"{part}: TCC")
-                        continue
-
-                    for idx_row, row in filtered_part_data.iterrows():
-                        corner = row.iloc[0]
-                        limit_value = row.iloc[limit_col_idx] if limit_col_idx < len(row) else "Unknown"
-                        tcc_margin = row.iloc[tccmargin_col_idx] if tccmargin_col_idx < len(row) and pd.notna(row.iloc[tccmargin_col_idx]) else 'NA'
-                        hold_margin = row.iloc[holdmargin_col_idx] if holdmargin_col_idx < len(row) and pd.notna(row.iloc[holdmargin_col_idx]) else 'NA'
-
-                        tcc_margin_str = str(tcc_margin).rstrip('%')
-                        hold_margin_str = str(hold_margin).rstrip('%')
-
-                        formatted_line = f"{corner} ({limit_value}: {tcc_margin_str}%); Hold_margin: {hold_margin_str}"
-                        all_lines.append(formatted_line)
-                        custom_print(f"[DEBUG] Processing row - Corner: {corner}, Limit: {limit_value}, Margin: {tcc_margin_str}, Hold: {hold_margin_str}")
-
-                        try:
-                            margin_value = float(str(tcc_margin).rstrip('%'))
-                            if "SMS" in str(limit_value) and margin_value > highest_sms["value"]:
-                                highest_sms = {
-                                    "value": margin_value,
-                                    "corner": corner,
-                                    "limit_value": limit_value,
-                                    "hold_margin": hold_margin_str
-                                }
-                                custom_print(f"[DEBUG] New highest SMS: {margin_value}% for {corner}")
-                            elif "Memory" in str(limit_value) and margin_value > highest_memory["value"]:
-                                highest_memory = {
-                                    "value": margin_value,
-                                    "corner": corner,
-                                    "limit_value": limit_value,
-                                    "hold_margin": hold_margin_str
-                                }
-                                custom_print(f"[DEBUG] New highest Memory: {margin_value}% for {corner}")
-                            elif margin_value > highest_general["value"]:
-                                highest_general = {
-                                    "value": margin_value,
-                                    "corner": corner,
-                                    "limit_value": limit_value,
-                                    "hold_margin": hold_margin_str
-                                }
-                                custom_print(f"[DEBUG] New highest general: {margin_value}% for {corner} ({limit_value})")
-                        except (ValueError, TypeError) as e:
-                            custom_print(f"[DEBUG] Error converting margin value '{tcc_margin}' to float: {e}")
-                            continue
-
-                    with open(new_csv_file, 'w') as outfile:
-                        outfile.write('\n'.join(all_lines) if all_lines else f"{part}: No data")
-
-                    if highest_only == 0:
-                        if all_lines:
-                            fmax_results.append(f"{part}: {', '.join(all_lines)}")
-                        else:
-                            fmax_results.append(f"{part}: No data")
-                    else:
-                        part_summary = []
-                        if highest_sms["value"] > -1:
-                            sms_line = f"{highest_sms['corner']} ({highest_sms['limit_value']}: {highest_sms['value']}%); Hold_margin: {highest_sms['hold_margin']}"
-                            part_summary.append(sms_line)
-                        if highest_memory["value"] > -1:
-                            memory_line = f"{highest_memory['corner']} ({highest_memory['limit_value']}: {highest_memory['value']}%); Hold_margin: {highest_memory['hold_margin']}"
-                            part_summary.append(memory_line)
-                        if len(part_summary) == 0 and highest_general["value"] > -1:
-                            general_line = f"{highest_general['corner']} ({highest_general['limit_value']}: {highest_general['value']}%); Hold_margin: {highest_general['hold_margin']}"
-                            part_summary.append(general_line)
-
-                        custom_print(f"[DEBUG] Part summary for {part}: {part_summary}")
-                        if part_summary:
-                            fmax_results.append(f"{part}: {', '.join(part_summary)}")
-                        else:
-                            if all_lines:
-                                custom_print(f"[DEBUG] Warning: Have {len(all_lines)} lines but empty part_summary for {part}")
-                                fmax_results.append(f"{part}: {all_lines[0]}")
-                            else:
-                                fmax_results.append(f"{part}: No valid margin data")
-                else:
-                    custom_print(f"[WARNING] {part} does not have enough columns (needs at least 4).")
-                    fmax_results.append(f"{part}: Not enough columns")
-
-            return " | ".join(fmax_results) + "."
+            # Keep the per-part slices so what-if runs can re-apply other settings (see whatif.py)
+            parts = [(part, part_data) for part, part_data, _, _ in part_args]
+            if capture is not None:
+                capture["FMAX"] = parts
+            return analyze_fmax_parts(parts, output_dir, highest_only, workers, measures=measures)
         else:
             custom_print("FMAX sheet is not present.")
             return "FMAX sheet not found."
@@ -275,7 +431,110 @@ def process_fmax_data(excel_file, clock_groups, xls, output_dir, highest_only=1)
         return f"Error processing FMAX data: {e}"
 
 
-def process_tcq_data(excel_file, output_dir, highest_only=0):
+def analyze_fmax_parts(parts, output_dir, highest_only=1, workers=INTRA_BLOCK_WORKERS, measures=None):
+
+    # measures, when given, collects the (sub-block, TCC margin, corner) of every reported margin
+    try:
+        part_args = [(part, part_data, output_dir, highest_only) for part, part_data in parts]
+        part_results = map_memoized("FMAX", _analyze_fmax_part, part_args, "{name}_fmax.csv", workers)
+        if measures is not None:
+            for _, part_measures in part_results:
+                measures.extend(part_measures)
+        return " | ".join(entry for entry, _ in part_results) + "."
+    except Exception as e:
+        custom_print(f"[WARNING] Error processing FMAX data: {e}")
+        return f"Error processing FMAX data: {e}"
+
+
+def _analyze_tcq_block(block, combined_data, output_dir, highest_only, threshold=TCQ_THRESHOLD_PERCENT):
+
+    # Returns (result entry, applicable flag, [(sub-block, TCQ %, corner)] reported) for one sub-block's TCQ columns
+    block_csv_file = os.path.join(output_dir, f"{block}_tcq_data.csv")
+    combined_data.to_csv(block_csv_file, index=False, sep=' ', header=False)
+
+    block_df = pd.read_csv(block_csv_file, sep=' ', header=None)
+    block_df = block_df.iloc[1:].reset_index(drop=True)
+
+    if block_df.empty:
+        tcq_result_string = "TCQ Not Applicable"
+        custom_print(f"{block}: TCQ Data not applicable (empty after header removal). Reporting: {tcq_result_string}")
+        return f"{block}: {tcq_result_string}", False, []
+
+    if block_df.shape[1] < 2:
+        custom_print(f"[WARNING] Block {block} has fewer than 2 columns. Skipping.")
+        return f"{block}: Insufficient data", True, []
+
+    # TCQ is the last column as a percentage of the first data column
+    table = CornerMetrics.from_frame(block_df, {"tcq": 1, "value": block_df.shape[1] - 1}, raw={"corner": 0})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        table.columns["percentage"] = table.columns["value"] / table.columns["tcq"] * 100
+    raw_percentage = table.columns["percentage"]
+    rows = np.flatnonzero(np.abs(raw_percentage) >= threshold)
+
+    pd.DataFrame({0: table.columns["corner"][rows], 1: [f"{raw_percentage[row]:.2f}%" for row in rows],
+                  2: raw_percentage[rows]}).to_csv(block_csv_file, index=False, sep=' ', header=False)
+
+    if not len(rows):
+        return f"{block}: CLEAN", True, []
+
+    block_entries = []
+    if highest_only == 1:
+        rows = [table.farthest("percentage", rows)]
+    for row in rows:
+        block_entries.append(f"{table.corner(row)}: {raw_percentage[row]:.2f}%")
+
+    return f"{block}: " + ", ".join(block_entries), True, [(block, float(raw_percentage[row]), table.corner(row)) for row in rows]
+
+
+def combine_tcq_results(block_results):
+
+    tcq_percentage_entries = [entry for entry, applicable, _ in block_results]
+    all_not_applicable = not any(applicable for entry, applicable, _ in block_results)
+
+    if all_not_applicable:
+        return "TCQ Not Applicable"
+    elif tcq_percentage_entries:
+        return " | ".join(tcq_percentage_entries) + "."
+    else:
+        return "No TCQ data available."
+
+
+def compile_tcq_plan(data_columns, expected_block_names):
+
+    # Sub-block of each data column from the header text; None when no column names a sub-block, in which case
+    # the blocks are told apart from the data itself and the layout cannot be planned from the header
+    actual_blocks = []
+    actual_column_groups = []
+    current_group = []
+    current_block = None
+
+    for position, col in enumerate(data_columns):
+        col_str = str(col).lower()
+        block_match = None
+        for block in expected_block_names:
+            if block.lower() in col_str:
+                block_match = block
+                break
+
+        if block_match and block_match != current_block:
+            if current_group:
+                actual_column_groups.append(current_group)
+                actual_blocks.append(current_block)
+            current_group = [position]
+            current_block = block_match
+        else:
+            current_group.append(position)
+
+    if current_group:
+        actual_column_groups.append(current_group)
+        actual_blocks.append(current_block)
+
+    if not actual_blocks:
+        return None
+    return {"blocks": actual_blocks, "groups": actual_column_groups}
+
+
+def process_tcq_data(excel_file, output_dir, highest_only=0, xls=None, workers=INTRA_BLOCK_WORKERS, capture=None, measures=None):
 
     try:
         base_name = os.path.splitext(excel_file)[0]
@@ -283,41 +542,22 @@ def process_tcq_data(excel_file, output_dir, highest_only=0):
             base_name = base_name[:-len('_metrics')]
         expected_block_names = base_name.split('_')
         
-        df = pd.read_excel(excel_file, sheet_name='TCQ')
+        df = read_sheet(excel_file, 'TCQ', xls)
         
         if df.empty:
             custom_print(f"[WARNING] TCQ Sheet in {excel_file} is empty.")
             return "Empty Sheet"
         
         data_columns = df.columns[1:]
+        tcq_header = list(df.columns)
+        header_plan = layout_plans.plan("TCQ", tcq_header, expected_block_names,
+                                        lambda: compile_tcq_plan(tcq_header[1:], expected_block_names))
         actual_blocks = []
         actual_column_groups = []
-        
-        if len(data_columns) > 0:
-            current_group = []
-            current_block = None
-            
-            for col in data_columns:
-                col_str = str(col).lower()
-                block_match = None
-                for block in expected_block_names:
-                    if block.lower() in col_str:
-                        block_match = block
-                        break
-                
-                if block_match and block_match != current_block:
-                    if current_group:
-                        actual_column_groups.append(current_group)
-                        actual_blocks.append(current_block)
-                    current_group = [col]
-                    current_block = block_match
-                else:
-                    current_group.append(col)
-            
-            if current_group:
-                actual_column_groups.append(current_group)
-                actual_blocks.append(current_block)
-        
+        if header_plan is not None:
+            actual_blocks = list(header_plan["blocks"])
+            actual_column_groups = [data_columns[positions] for positions in header_plan["groups"]]
+
         if not actual_blocks:
             custom_print(f"[WARNING] Couldn't identify block patterns in columns. Trying to detect based on column count.")
             non_nan_patterns = df.iloc[:, 1:].notna().sum()
@@ -348,128 +588,97 @@ def process_tcq_data(excel_file, output_dir, highest_only=0):
                     actual_column_groups = [data_columns]
         
         custom_print(f"Detected blocks: {actual_blocks}")
-        tcq_percentage_entries = []
-        all_not_applicable = True
-        
+        block_args = []
         for idx, block in enumerate(actual_blocks):
             block_columns = actual_column_groups[idx]
             block_data = df.loc[:, block_columns]
             combined_data = pd.concat([df.iloc[:, 0], block_data], axis=1)
-            
-            block_csv_file = os.path.join(output_dir, f"{block}_tcq_data.csv")
-            combined_data.to_csv(block_csv_file, index=False, sep=' ', header=False)
-            
-            block_df = pd.read_csv(block_csv_file, sep=' ', header=None)
-            block_df = block_df.iloc[1:].reset_index(drop=True)
-            
-            if block_df.empty:
-                tcq_result_string = "TCQ Not Applicable"
-                tcq_percentage_entries.append(f"{block}: {tcq_result_string}")
-                custom_print(f"{block}: TCQ Data not applicable (empty after header removal). Reporting: {tcq_result_string}")
-                continue
-            
-            all_not_applicable = False
-            if block_df.shape[1] < 2:
-                custom_print(f"[WARNING] Block {block} has fewer than 2 columns. Skipping.")
-                tcq_percentage_entries.append(f"{block}: Insufficient data")
-                continue
-            
-            try:
-                block_df[1] = pd.to_numeric(block_df[1], errors='coerce')
-            except Exception as conv_err:
-                custom_print(f"[WARNING] Error converting column 1 to numeric for block {block}: {conv_err}")
-                raise
-            
-            try:
-                block_df.iloc[:, -1] = pd.to_numeric(block_df.iloc[:, -1], errors='coerce')
-            except Exception as conv_err:
-                custom_print(f"[WARNING] Error converting last column to numeric for block {block}: {conv_err}")
-                raise
-            
-            tcq_percentage = (block_df.iloc[:, -1] / block_df[1]) * 100
-            block_df['raw_percentage'] = tcq_percentage
-            tcq_percentage_formatted = tcq_percentage.apply(lambda x: f"{x:.2f}%" if not pd.isna(x) else "")
-            block_df['tcq_percentage'] = tcq_percentage_formatted
-            
-            filtered_data = block_df[abs(block_df['raw_percentage']) >= 10][[0, 'tcq_percentage', 'raw_percentage']]
-            filtered_data.to_csv(block_csv_file, index=False, sep=' ', header=False)
-            
-            if not filtered_data.empty:
-                block_entries = []
-                if highest_only == 1:
-                    max_percentage_idx = filtered_data['raw_percentage'].abs().idxmax()
-                    max_row = filtered_data.loc[max_percentage_idx]
-                    corner = max_row[0]
-                    percentage = max_row['tcq_percentage']
-                    block_entries.append(f"{corner}: {percentage}")
-                else:
-                    for _, row in filtered_data.iterrows():
-                        corner = row[0]
-                        percentage = row['tcq_percentage']
-                        block_entries.append(f"{corner}: {percentage}")
-                
-                tcq_percentage_entries.append(f"{block}: " + ", ".join(block_entries))
-            else:
-                tcq_percentage_entries.append(f"{block}: CLEAN")
-        
-        if all_not_applicable:
-            return "TCQ Not Applicable"
-        elif tcq_percentage_entries:
-            return " | ".join(tcq_percentage_entries) + "."
-        else:
-            return "No TCQ data available."
+            block_args.append((block, combined_data))
+
+        if capture is not None:
+            capture["TCQ"] = block_args
+        return analyze_tcq_blocks(block_args, output_dir, highest_only, workers=workers, measures=measures)
         
     except Exception as e:
         custom_print(f"[WARNING] TCQ Not Applicable: {e}")
         return "TCQ Not Applicable"
 
 
-def process_min_pulse_width(excel_file, output_dir, highest_only=1):
+def analyze_tcq_blocks(blocks, output_dir, highest_only=0, threshold=TCQ_THRESHOLD_PERCENT, workers=INTRA_BLOCK_WORKERS,
+                       measures=None):
+
+    # measures, when given, collects the (sub-block, TCQ %, corner) of every reported entry
+    try:
+        block_args = [(block, combined_data, output_dir, highest_only, threshold) for block, combined_data in blocks]
+        block_results = map_memoized("TCQ", _analyze_tcq_block, block_args, "{name}_tcq_data.csv", workers)
+        if measures is not None:
+            for _, _, block_measures in block_results:
+                measures.extend(block_measures)
+        return combine_tcq_results(block_results)
+    except Exception as e:
+        custom_print(f"[WARNING] TCQ Not Applicable: {e}")
+        return "TCQ Not Applicable"
+
+
+def process_min_pulse_width(excel_file, output_dir, highest_only=1, xls=None, capture=None, measures=None):
 
     try:
         sheet_name = "MIN_PULSE_WIDTH"
+        df = read_sheet(excel_file, sheet_name, xls, header=None)
+        if capture is not None:
+            capture["MPW"] = df
+        return analyze_min_pulse_width(df, output_dir, highest_only, measures=measures)
+
+    except Exception as e:
+        custom_print(f"[WARNING] Error processing MIN_PULSE_WIDTH data: {e}")
+        return "Error processing MIN_PULSE_WIDTH data"
+
+
+def analyze_min_pulse_width(df, output_dir, highest_only=1, measures=None):
+
+    # measures, when given, collects the (None, WNS, corner) of every reported row
+    try:
         csv_file = os.path.join(output_dir, "MIN_PULSE_WIDTH.csv")
-        df = pd.read_excel(excel_file, sheet_name=sheet_name, header=None)
 
         if df.empty:
             return "Empty Sheet"
 
         df.to_csv(csv_file, sep=' ', header=None, index=False)
-        custom_print(f"Sheet '{sheet_name}' successfully converted to '{csv_file}' with space as delimiter.")
+        custom_print(f"Sheet 'MIN_PULSE_WIDTH' successfully converted to '{csv_file}' with space as delimiter.")
 
         df = pd.read_csv(csv_file, sep=r'\s+', engine='python', header=None)
-        corner_col = df.columns[0]
-        wns_col = df.columns[1]
-        fep_col = df.columns[2]
-
-        df[wns_col] = pd.to_numeric(df[wns_col], errors='coerce')
-        df = df.dropna(subset=[wns_col])
+        table = CornerMetrics.from_frame(df, {"wns": 1}, raw={"fep": 2})
+        table = table.take(table.present(["wns"]))
+        wns = table.columns["wns"]
 
-        if df.empty:
+        if not len(table):
             return "No valid MIN_PULSE_WIDTH data"
 
-        if (df[wns_col] == 0).all():
+        if (wns == 0).all():
             return "CLEAN"
 
         if highest_only == 1:
-            farthest_row = df.loc[df[wns_col].abs().idxmax()]
-            if farthest_row[wns_col] == 0:
+            row = table.farthest("wns")
+            if wns[row] == 0:
                 return "CLEAN"
 
-            formatted_output = f"{farthest_row[corner_col]} - WNS: {farthest_row[wns_col]}; FEP: {farthest_row[fep_col]}"
+            formatted_output = f"{table.corner(row)} - WNS: {wns[row]}; FEP: {table.value('fep', row)}"
             with open(csv_file, "w") as f:
                 f.write(formatted_output)
+            if measures is not None:
+                measures.append((None, float(wns[row]), table.corner(row)))
 
             custom_print(f"File '{csv_file}' has been updated with the farthest WNS row.")
             return formatted_output
         elif highest_only == 0:
             output_lines = []
             with open(csv_file, "w") as f:
-                for index, row in df.iterrows():
-                    if row[wns_col] != 0:
-                        formatted_output = f"{row[corner_col]} - WNS: {row[wns_col]}; FEP: {row[fep_col]}"
-                        output_lines.append(formatted_output)
-                        f.write(formatted_output + "\n")
+                for row in np.flatnonzero(wns != 0):
+                    formatted_output = f"{table.corner(row)} - WNS: {wns[row]}; FEP: {table.value('fep', row)}"
+                    output_lines.append(formatted_output)
+                    f.write(formatted_output + "\n")
+                    if measures is not None:
+                        measures.append((None, float(wns[row]), table.corner(row)))
 
             if not output_lines:
                 custom_print(f"File '{csv_file}' has been updated (no WNS != 0 rows found).")
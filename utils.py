@@ -1,5 +1,6 @@
 
 
+import os
 import sys
 import platform
 import builtins
@@ -61,3 +62,33 @@ def check_clean_status(df, column_name):
             else:
                 return "NOT CLEAN"
     return "N/A"
+
+
+def block_name_from_excel(excel_file):
+
+    block_name = os.path.splitext(os.path.basename(excel_file))[0]
+    if block_name.endswith("_metrics"):
+        block_name = block_name[:-len("_metrics")]
+    return block_name
+
+
+def read_head_lines(path, count):
+
+    # Up to `count` lines from the start of a text file, read line by line so large reports are not loaded whole
+    lines = []
+    with open(path, 'r') as f:
+        for _ in range(count):
+            line = f.readline()
+            if not line:
+                break
+            lines.append(line)
+    return lines
+
+
+def read_sheet(excel_file, sheet_name, xls=None, header=0):
+
+    # Reuse an already-open workbook (pd.ExcelFile or sheet_loader.ParsedWorkbook) when one is passed in
+    if xls is not None:
+        return xls.parse(sheet_name, header=header)
+    import pandas as pd
+    return pd.read_excel(excel_file, sheet_name=sheet_name, header=header)
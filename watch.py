@@ -0,0 +1,130 @@
+"""
+Watch Module
+Contains the long-running watch mode: the block workbooks and the PV/, ir_drop_rh/ and formality/
+trees under proj_dir_path are polled, changes are debounced, and only the affected blocks are
+re-summarized before the run's outputs are republished (see run_outputs.py).
+"""
+
+import os
+import json
+import time
+from datetime import datetime
+from config import (
+    proj_dir_path,
+    MAIN_HEADERS,
+    SUB_HEADERS,
+    ARTIFACT_PREFETCH,
+    PIPELINE_ENABLE,
+    PROGRESSIVE_OUTPUT,
+    PROGRESS_NDJSON_FILE,
+    WATCH_POLL_INTERVAL,
+    WATCH_DEBOUNCE
+)
+from utils import custom_print, block_name_from_excel
+from excel_processor import process_excel_file, summary_row
+from artifact_fetcher import fetch_block_artifacts
+from pipeline import run_pipeline
+from checks import prefetch_keys
+from run_journal import checkpoint_block
+from results_sink import summary_record
+
+
+def block_input_paths(block_name, proj_dir_path=proj_dir_path):
+
+    # Workbook plus every artifact tree a block's summary row is built from
+    return [
+        f"{block_name}_metrics.xlsx",
+        os.path.join(proj_dir_path, "PV", "drc", block_name),
+        os.path.join(proj_dir_path, "PV", "lvs", block_name),
+        os.path.join(proj_dir_path, "PV", "ant", block_name),
+        os.path.join(proj_dir_path, "ir_drop_rh", block_name),
+        os.path.join(proj_dir_path, "formality", block_name),
+    ]
+
+
+def block_input_stamp(block_name, proj_dir_path=proj_dir_path):
+
+    stamp = []
+    for path in block_input_paths(block_name, proj_dir_path):
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            stamp.append((path, stat.st_size, stat.st_mtime_ns))
+        elif os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    stamp.append((file_path, stat.st_size, stat.st_mtime_ns))
+    return tuple(sorted(stamp))
+
+
+def snapshot_inputs(block_names, proj_dir_path=proj_dir_path):
+
+    return {block_name: block_input_stamp(block_name, proj_dir_path) for block_name in block_names}
+
+
+def resummarize_blocks(block_names, selected=None):
+
+    # Returns {block_name: output_data} for the given blocks; selected as in process_excel_file
+    excel_files = {block_name: f"{block_name}_metrics.xlsx" for block_name in block_names}
+    existing = [excel_file for excel_file in excel_files.values() if os.path.exists(excel_file)]
+    artifacts = fetch_block_artifacts(existing, proj_dir_path, keys=prefetch_keys(selected)) if ARTIFACT_PREFETCH else {}
+
+    results = {block_name: None for block_name in block_names}
+    if PIPELINE_ENABLE and len(existing) > 1:
+        file_kwargs = {excel_file: {"selected": selected} for excel_file in existing}
+        for excel_file, output_data in run_pipeline(existing, MAIN_HEADERS, SUB_HEADERS, artifacts, file_kwargs=file_kwargs):
+            results[block_name_from_excel(excel_file)] = output_data
+    else:
+        for excel_file in existing:
+            block_name = block_name_from_excel(excel_file)
+            results[block_name] = process_excel_file(excel_file, MAIN_HEADERS, SUB_HEADERS,
+                                                     artifacts=artifacts.get(block_name), selected=selected)
+    return results
+
+
+def watch_blocks(block_info_sorted, blocks_comp_names, blocks_owners, all_output_data, snapshot, outputs,
+                 poll_interval=WATCH_POLL_INTERVAL, debounce=WATCH_DEBOUNCE, selected=None):
+
+    # snapshot is the input state all_output_data was built from; outputs is the run_outputs.RunOutputs that published
+    # it, so every change updates the same run and roll-ups instead of starting new ones; runs until interrupted
+    block_names = [block["block_name"] for block in block_info_sorted]
+    row_index = {block_name: idx for idx, block_name in enumerate(block_names)}
+    changed_at = {}
+
+    print(f"    [ Watching {len(block_names)} blocks every {poll_interval}s (Ctrl-C to stop) ]", flush=True)
+    try:
+        while True:
+            time.sleep(poll_interval)
+            current = snapshot_inputs(block_names)
+            now = time.time()
+            for block_name in block_names:
+                if current[block_name] != snapshot[block_name]:
+                    # Every new change restarts the block's debounce window
+                    changed_at[block_name] = now
+                    snapshot[block_name] = current[block_name]
+
+            ready = [block_name for block_name, stamp_time in changed_at.items() if now - stamp_time >= debounce]
+            if not ready:
+                continue
+            for block_name in ready:
+                del changed_at[block_name]
+
+            custom_print(f"[INFO] Inputs changed for: {ready}")
+            for block_name, output_data in resummarize_blocks(ready, selected).items():
+                row = summary_row(block_name, output_data) if output_data is not None else ["File Not Found", block_name]
+                all_output_data[row_index[block_name]] = row
+                checkpoint_block(block_name, f"{block_name}_metrics.xlsx", row, selected=selected)
+                if PROGRESSIVE_OUTPUT:
+                    record = summary_record(row, blocks_comp_names, blocks_owners)
+                    record["completed"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    with open(PROGRESS_NDJSON_FILE, "a") as f:
+                        f.write(json.dumps(record, default=str) + "\n")
+
+            outputs.publish(all_output_data, changed=ready)
+            print(f" [{time.strftime('%H:%M:%S')}] Re-summarized {', '.join(sorted(ready))} -> '{outputs.output_file}'", flush=True)
+    except KeyboardInterrupt:
+        print("\n    [ Watch stopped ]", flush=True)
@@ -0,0 +1,125 @@
+"""
+What-If Module
+Contains the what-if re-summarize: the analysis-ready inputs kept by the last run are re-evaluated with
+other thresholds and reporting settings (TCQ cut, IR nominal voltage, highest-only and detailed info)
+without reading the workbooks or the project tree again.
+
+Usage:
+    python whatif.py --tcq-threshold 5 --ir-nominal 0.75 --mpw-highest-only 0 --detailed-info 0
+"""
+
+import os
+import sys
+import time
+import argparse
+import builtins
+from config import (
+    ALL_BLOCK_CSV_FILES_DIR,
+    MAIN_HEADERS,
+    SUB_HEADERS,
+    BLOCK_INFO,
+    SUMMARY_CHECK_COLUMNS,
+    TCQ_THRESHOLD_PERCENT,
+    IR_NOMINAL_VOLTAGE,
+    WHATIF_XLSX_FILE
+)
+from utils import toggle_print, custom_print
+from summary_values import check_status, STATUS_NOT_CLEAN
+from analysis_inputs import load_analysis_inputs
+from timing_analysis import analyze_fmax_parts, analyze_tcq_blocks, analyze_min_pulse_width
+from design_checks import analyze_drv_data, ir_percentage
+from excel_processor import create_output_excel, block_output_dir
+from main import sort_block_info
+
+
+# Settings the summary is produced with today; a what-if run with these reproduces the last summary
+DEFAULT_SETTINGS = {
+    "tcq_threshold": TCQ_THRESHOLD_PERCENT,
+    "ir_nominal": IR_NOMINAL_VOLTAGE,
+    "fmax_highest_only": 1,
+    "tcq_highest_only": 0,
+    "mpw_highest_only": 1,
+    "drv_highest_only": 1,
+    "detailed_info": 1,
+}
+
+
+def _column(check):
+
+    return 1 + SUMMARY_CHECK_COLUMNS.index(check)
+
+
+def resummarize_block(inputs, settings, scratch_dir):
+
+    # Returns the block's summary row with the settings applied
+    row = list(inputs["row"])
+    if inputs.get("FMAX") is not None:
+        row[_column("FMAX")] = analyze_fmax_parts(inputs["FMAX"], scratch_dir, settings["fmax_highest_only"])
+    if inputs.get("TCQ") is not None:
+        row[_column("TCQ")] = analyze_tcq_blocks(inputs["TCQ"], scratch_dir, settings["tcq_highest_only"], settings["tcq_threshold"])
+    if inputs.get("MPW") is not None:
+        mpw_details = analyze_min_pulse_width(inputs["MPW"].copy(), scratch_dir, settings["mpw_highest_only"])
+        row[_column("MPW")] = mpw_details
+        row[_column("MPW VIOLATION")] = "CLEAN" if mpw_details == "CLEAN" else "NOT CLEAN"
+    if inputs.get("DRV") is not None:
+        row[_column("DRV")] = analyze_drv_data(inputs["DRV"], scratch_dir, settings["drv_highest_only"])
+    vdd_value_str, vss_value_str = inputs["ir"]
+    row[_column("VDD")] = ir_percentage(vdd_value_str, settings["ir_nominal"])
+    row[_column("VSS")] = ir_percentage(vss_value_str, settings["ir_nominal"])
+
+    if not settings["detailed_info"]:
+        # Simple status: violation details collapse to NOT CLEAN
+        for check in SUMMARY_CHECK_COLUMNS:
+            if check_status(check, row[_column(check)]) == STATUS_NOT_CLEAN:
+                row[_column(check)] = "NOT CLEAN"
+    return row
+
+
+def resummarize(block_info_sorted, settings, csv_dir=ALL_BLOCK_CSV_FILES_DIR):
+
+    # Returns all_output_data in block_info_sorted order; blocks without stored inputs are reported as not found
+    scratch_root = os.path.join(csv_dir, "whatif")
+    all_output_data = []
+    for block in block_info_sorted:
+        excel_file = f"{block['block_name']}_metrics.xlsx"
+        inputs = load_analysis_inputs(block_output_dir(excel_file, csv_dir))
+        if inputs is None or "row" not in inputs:
+            custom_print(f"[WARNING] No stored analysis inputs of a full run for {block['block_name']}; run main.py first")
+            all_output_data.append(["File Not Found", block["block_name"]])
+            continue
+        scratch_dir = block_output_dir(excel_file, scratch_root)
+        os.makedirs(scratch_dir, exist_ok=True)
+        all_output_data.append(resummarize_block(inputs, settings, scratch_dir))
+    return all_output_data
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Re-summarize the last run with other thresholds, without re-reading inputs")
+    parser.add_argument("--tcq-threshold", type=float, default=DEFAULT_SETTINGS["tcq_threshold"], help="TCQ |percentage| cut")
+    parser.add_argument("--ir-nominal", type=float, default=DEFAULT_SETTINGS["ir_nominal"], help="Nominal supply voltage for IR drop %%")
+    for check in ("fmax", "tcq", "mpw", "drv"):
+        parser.add_argument(f"--{check}-highest-only", type=int, choices=[0, 1], default=DEFAULT_SETTINGS[f"{check}_highest_only"],
+                            help=f"1 reports only the worst {check.upper()} entry, 0 all of them")
+    parser.add_argument("--detailed-info", type=int, choices=[0, 1], default=DEFAULT_SETTINGS["detailed_info"],
+                        help="0 collapses violation details to NOT CLEAN")
+    parser.add_argument("--output", default=WHATIF_XLSX_FILE, help="What-if summary workbook to write")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    toggle_print(False)
+    builtins.custom_print = custom_print
+    settings = {key: getattr(args, key) for key in DEFAULT_SETTINGS}
+    start_time = time.time()
+    block_info_sorted = sort_block_info(BLOCK_INFO)
+    all_output_data = resummarize(block_info_sorted, settings)
+    if all(row[0] == "File Not Found" for row in all_output_data):
+        print(" No stored analysis inputs of a full run; run main.py without --only / --skip first", flush=True)
+        sys.exit(1)
+    blocks_comp_names = {block["block_name"]: block["compiler"] for block in block_info_sorted}
+    blocks_owners = {block["block_name"]: block["owner"] for block in block_info_sorted}
+    create_output_excel(all_output_data, SUB_HEADERS, MAIN_HEADERS, blocks_comp_names, blocks_owners, output_file=args.output)
+    changed = {key: value for key, value in settings.items() if value != DEFAULT_SETTINGS[key]}
+    print(f" What-if summary {changed or '(default settings)'} -> '{args.output}' in {time.time() - start_time:.1f}s", flush=True)
@@ -0,0 +1,295 @@
+"""
+Work Queue Module
+Contains the distributed block queue: a coordinator writes the block list to a queue directory on a shared
+filesystem, any number of workers (on one host or many hosts sharing NFS) claim blocks with exclusive
+lock files and write one result file per block, and the coordinator merges the results in canonical
+order. Claims carry a heartbeat counter bumped while a block is processed; a claim whose counter a worker
+sees unchanged for CLAIM_STALE_SECONDS (on its own clock) is reclaimed.
+
+Usage:
+    python work_queue.py submit [--queue DIR]              # coordinator: queue every block of BLOCK_INFO
+    python work_queue.py worker [--queue DIR]              # on each host, as many times as wanted
+    python work_queue.py merge  [--queue DIR] [--no-wait]  # coordinator: wait (up to --timeout) for all blocks, write the summary
+    python work_queue.py run --local-workers 4             # submit + local workers + merge in one go
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import builtins
+import tempfile
+import threading
+import subprocess
+from config import (
+    proj_dir_path,
+    MAIN_HEADERS,
+    SUB_HEADERS,
+    BLOCK_INFO,
+    Output_xls_name,
+    SCHEDULER_ENABLE,
+    RESULTS_DB_ENABLE,
+    WORK_QUEUE_DIR,
+    CLAIM_HEARTBEAT,
+    CLAIM_STALE_SECONDS,
+    WORK_QUEUE_POLL,
+    MERGE_TIMEOUT,
+    ALL_BLOCK_CSV_FILES_DIR
+)
+from utils import toggle_print, custom_print
+from excel_processor import process_excel_file, create_output_excel, summary_row, block_measures
+from scheduler import estimate_block_costs, lpt_order
+from results_db import record_run
+from main import sort_block_info
+
+
+def _write_json_atomic(path, data):
+
+    # Temp file in the same directory + fsync + rename: other hosts see the old file or the complete new one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _claim_path(queue_dir, block_name):
+
+    return os.path.join(queue_dir, "claims", f"{block_name}.claim")
+
+
+def _result_path(queue_dir, block_name):
+
+    return os.path.join(queue_dir, "results", f"{block_name}.json")
+
+
+def submit_blocks(block_info=BLOCK_INFO, queue_dir=WORK_QUEUE_DIR, proj_dir_path=proj_dir_path, output_file=Output_xls_name):
+
+    # Starts a fresh queue; blocks are listed largest first so workers pick them up in LPT order
+    block_info_sorted = sort_block_info(block_info)
+    for sub_dir in ("claims", "results"):
+        os.makedirs(os.path.join(queue_dir, sub_dir), exist_ok=True)
+        for name in os.listdir(os.path.join(queue_dir, sub_dir)):
+            os.remove(os.path.join(queue_dir, sub_dir, name))
+
+    workbooks = {block["block_name"]: f"{block['block_name']}_metrics.xlsx" for block in block_info_sorted}
+    existing_files = [excel_file for excel_file in workbooks.values() if os.path.exists(excel_file)]
+    dispatch_order = existing_files
+    if SCHEDULER_ENABLE and existing_files:
+        dispatch_order = lpt_order(existing_files, estimate_block_costs(existing_files, proj_dir_path))
+    block_of = {excel_file: block_name for block_name, excel_file in workbooks.items()}
+
+    _write_json_atomic(os.path.join(queue_dir, "tasks.json"), {
+        "workdir": os.getcwd(),
+        "proj_dir_path": proj_dir_path,
+        "output_file": output_file,
+        "block_info": block_info_sorted,
+        "tasks": [{"block_name": block_of[excel_file], "excel_file": excel_file} for excel_file in dispatch_order],
+    })
+    custom_print(f"[CREATED] Queued {len(dispatch_order)} blocks in {queue_dir}")
+    return len(dispatch_order)
+
+
+def load_tasks(queue_dir=WORK_QUEUE_DIR):
+
+    with open(os.path.join(queue_dir, "tasks.json"), "r") as f:
+        return json.load(f)
+
+
+# {claim_path: (claim contents, time.monotonic() they were first seen)} as observed by this process
+_CLAIMS_SEEN = {}
+
+
+def _claim_owner():
+
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _read_claim(claim_path):
+
+    with open(claim_path, "r") as f:
+        return f.read()
+
+
+def try_claim(queue_dir, block_name, stale_seconds=CLAIM_STALE_SECONDS, seen=_CLAIMS_SEEN):
+
+    # Returns True when this worker now owns the block. A claim is stale once its heartbeat counter has not changed
+    # for stale_seconds on this process's own clock: hosts' clocks and NFS mtimes are never compared
+    claim_path = _claim_path(queue_dir, block_name)
+    owner = _claim_owner()
+    try:
+        fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            contents = _read_claim(claim_path)
+        except FileNotFoundError:
+            return False
+        now = time.monotonic()
+        if seen.get(claim_path, (None,))[0] != contents:
+            seen[claim_path] = (contents, now)
+        age = now - seen[claim_path][1]
+        if age < stale_seconds or os.path.exists(_result_path(queue_dir, block_name)):
+            return False
+        # The claimant stopped refreshing its claim: move it aside (only one reclaimer's rename succeeds)
+        stale_path = f"{claim_path}.stale.{owner.replace(':', '.')}"
+        try:
+            os.rename(claim_path, stale_path)
+        except FileNotFoundError:
+            return False
+        os.remove(stale_path)
+        del seen[claim_path]
+        custom_print(f"[WARNING] Reclaiming {block_name}: claim unchanged for {age:.0f}s")
+        return try_claim(queue_dir, block_name, stale_seconds, seen)
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{owner} 0\n")
+    return True
+
+
+def _heartbeat(claim_path, stop_event, interval):
+
+    # Bumps the counter in the claim file; stops once the claim is gone or was taken over by another worker
+    owner = _claim_owner()
+    beat = 0
+    while not stop_event.wait(interval):
+        beat += 1
+        try:
+            with open(claim_path, "r+") as f:
+                if f.read().split(" ")[0] != owner:
+                    return
+                f.seek(0)
+                f.write(f"{owner} {beat}\n")
+                f.truncate()
+                f.flush()
+                os.fsync(f.fileno())
+        except FileNotFoundError:
+            return
+
+
+def _release_claim(claim_path):
+
+    # A claim reclaimed while this worker was slow belongs to the new claimant and is left alone
+    try:
+        if _read_claim(claim_path).split(" ")[0] == _claim_owner():
+            os.remove(claim_path)
+    except FileNotFoundError:
+        pass
+
+
+def run_worker(queue_dir=WORK_QUEUE_DIR, heartbeat=CLAIM_HEARTBEAT, stale_seconds=CLAIM_STALE_SECONDS, poll=WORK_QUEUE_POLL):
+
+    # Processes claimable blocks until every block of the queue has a result; returns the number processed
+    queue = load_tasks(queue_dir)
+    os.chdir(queue["workdir"])
+    processed = 0
+    while True:
+        remaining = [task for task in queue["tasks"] if not os.path.exists(_result_path(queue_dir, task["block_name"]))]
+        if not remaining:
+            return processed
+        claimed_any = False
+        for task in remaining:
+            if os.path.exists(_result_path(queue_dir, task["block_name"])) or not try_claim(queue_dir, task["block_name"], stale_seconds):
+                continue
+            claimed_any = True
+            claim_path = _claim_path(queue_dir, task["block_name"])
+            stop_event = threading.Event()
+            beat = threading.Thread(target=_heartbeat, args=(claim_path, stop_event, heartbeat), daemon=True)
+            beat.start()
+            try:
+                start_time = time.time()
+                output_data = process_excel_file(task["excel_file"], MAIN_HEADERS, SUB_HEADERS,
+                                                 proj_dir_path=queue["proj_dir_path"])
+                _write_json_atomic(_result_path(queue_dir, task["block_name"]), {
+                    "block_name": task["block_name"],
+                    "row": summary_row(task["block_name"], output_data),
+                    "worker": _claim_owner(),
+                    "seconds": round(time.time() - start_time, 3),
+                })
+                processed += 1
+            finally:
+                stop_event.set()
+                beat.join()
+                _release_claim(claim_path)
+        if not claimed_any:
+            # Everything left is claimed by live workers; wait for results or for a claim to go stale
+            time.sleep(poll)
+
+
+def merge_results(queue_dir=WORK_QUEUE_DIR, wait=True, poll=WORK_QUEUE_POLL, timeout=MERGE_TIMEOUT):
+
+    # Returns all_output_data in canonical block order; missing results are reported as not found.
+    # With wait, results are awaited for at most timeout seconds (None: no limit)
+    queue = load_tasks(queue_dir)
+    pending = {task["block_name"] for task in queue["tasks"]}
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        pending = {block_name for block_name in pending if not os.path.exists(_result_path(queue_dir, block_name))}
+        if not pending or not wait:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            custom_print(f"[WARNING] Gave up waiting for results after {timeout}s")
+            break
+        time.sleep(poll if deadline is None else min(poll, max(0, deadline - time.monotonic())))
+
+    all_output_data = []
+    for block in queue["block_info"]:
+        result_path = _result_path(queue_dir, block["block_name"])
+        if os.path.exists(result_path):
+            with open(result_path, "r") as f:
+                all_output_data.append(json.load(f)["row"])
+        else:
+            all_output_data.append(["File Not Found", block["block_name"]])
+    if pending:
+        custom_print(f"[WARNING] Merged without results for: {sorted(pending)}")
+    return queue, all_output_data
+
+
+def write_merged_summary(queue, all_output_data):
+
+    blocks_comp_names = {block["block_name"]: block["compiler"] for block in queue["block_info"]}
+    blocks_owners = {block["block_name"]: block["owner"] for block in queue["block_info"]}
+    output_file = os.path.join(queue["workdir"], queue["output_file"])
+    create_output_excel(all_output_data, SUB_HEADERS, MAIN_HEADERS, blocks_comp_names, blocks_owners, output_file=output_file)
+    if RESULTS_DB_ENABLE:
+        # The workers leave each block's measures under the shared workdir
+        measures = block_measures(blocks_comp_names, os.path.join(queue["workdir"], ALL_BLOCK_CSV_FILES_DIR))
+        record_run(all_output_data, blocks_comp_names, blocks_owners, output_file=output_file, project=queue["proj_dir_path"],
+                   measures=measures)
+    print(f" Merged {len(all_output_data)} blocks -> '{output_file}'", flush=True)
+
+
+def parse_args(argv=None):
+
+    parser = argparse.ArgumentParser(description="Distributed block processing through a shared-filesystem queue")
+    parser.add_argument("command", choices=["submit", "worker", "merge", "run"])
+    parser.add_argument("--queue", default=WORK_QUEUE_DIR, help="Queue directory (must be on a filesystem all workers share)")
+    parser.add_argument("--no-wait", action="store_true", help="merge: write the summary with the results available now")
+    parser.add_argument("--timeout", type=float, default=MERGE_TIMEOUT,
+                        help="merge: seconds to wait for missing results before merging what is there")
+    parser.add_argument("--local-workers", type=int, default=2, help="run: worker processes to start on this host")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    toggle_print(False)
+    builtins.custom_print = custom_print
+    queue_dir = os.path.abspath(args.queue)
+    if args.command in ("submit", "run"):
+        print(f" Queued {submit_blocks(queue_dir=queue_dir)} blocks in {queue_dir}", flush=True)
+    if args.command == "worker":
+        print(f" Worker {socket.gethostname()}:{os.getpid()} processed {run_worker(queue_dir)} blocks", flush=True)
+    if args.command == "run":
+        workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), "worker", "--queue", queue_dir])
+                   for _ in range(max(1, args.local_workers))]
+        for worker in workers:
+            worker.wait()
+    if args.command in ("merge", "run"):
+        write_merged_summary(*merge_results(queue_dir, wait=not args.no_wait, timeout=args.timeout))